@@ -0,0 +1,10 @@
+# Fantasy Hockey Flask App - ASGI entry point for production
+#
+# Serve with any ASGI server, for example:
+#   uvicorn asgi:application --host 0.0.0.0 --port 8000
+#   hypercorn asgi:application --bind 0.0.0.0:8000
+from flaskr import create_app
+from flaskr.asgi import AsgiAdapter
+
+# Create the app using the factory pattern and wrap it for ASGI
+application = AsgiAdapter(create_app())
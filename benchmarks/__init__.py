@@ -0,0 +1 @@
+# Benchmarks for the fantasy hockey application
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Load-test the threaded Werkzeug server against the ASGI adapter.
+
+Each mode is served from its own process on a throwaway database.  While
+``--long-polls`` dashboard clients hold ``/changes`` requests open, a
+closed-loop load of ``--concurrency`` clients hits ``/players/api`` for
+``--duration`` seconds; requests per second, latency percentiles and the
+server's thread count are reported per mode.
+
+The ASGI mode uses uvicorn when it is installed.  Otherwise it is driven
+by a minimal asyncio HTTP/1.0 front end (one request per connection, as
+the load generator sends them), which is enough to compare the two
+concurrency models but is not a production server.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+
+
+def populate(path, players):
+    app = create_app({'DATABASE': path, 'AUTOCOMPLETE_PRELOAD': False})
+    with app.app_context():
+        init_db()
+        db = get_db()
+        db.executemany(
+            'INSERT INTO players (id, name, position) VALUES (?, ?, ?)',
+            ((i, f'Player {i:06d}', 'CDLRG'[i % 5]) for i in range(1, players + 1))
+        )
+        db.commit()
+    get_pool(app).close()
+
+
+# -- servers (run in a child process) ----------------------------------------
+
+async def serve_asgi(application, port):
+    """Minimal HTTP front end for the adapter when uvicorn is not installed."""
+    async def handle(reader, writer):
+        head = await reader.readuntil(b'\r\n\r\n')
+        method, target, _ = head.split(b'\r\n', 1)[0].decode('latin1').split(' ', 2)
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http', 'http_version': '1.0', 'method': method, 'scheme': 'http',
+            'path': path, 'query_string': query.encode('latin1'), 'root_path': '',
+            'headers': [tuple(line.split(b': ', 1)) for line in head.split(b'\r\n')[1:] if b': ' in line],
+            'server': ('127.0.0.1', port), 'client': writer.get_extra_info('peername')[:2],
+        }
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await reader.read()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                lines = [f'HTTP/1.0 {message["status"]} OK'.encode()]
+                lines += [name + b': ' + value for name, value in message['headers']]
+                writer.write(b'\r\n'.join(lines) + b'\r\n\r\n')
+            else:
+                writer.write(message.get('body', b''))
+                await writer.drain()
+
+        try:
+            await application(scope, receive, send)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def serve(mode, path, port, workers):
+    app = create_app({'DATABASE': path, 'AUTOCOMPLETE_PRELOAD': False, 'ASGI_WORKERS': workers,
+                      'DATABASE_POOL_SIZE': workers, 'CHANGES_POLL_INTERVAL': 0.25})
+    app.add_url_rule('/_threads', 'threads', lambda: {'threads': threading.active_count()})
+    if mode == 'threaded':
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', port, app, threaded=True)
+        server.socket.listen(1024)
+        server.serve_forever()
+        return
+
+    from flaskr.asgi import AsgiAdapter
+    application = AsgiAdapter(app)
+    try:
+        import uvicorn
+    except ImportError:
+        asyncio.run(serve_asgi(application, port))
+    else:
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning', backlog=1024)
+
+
+# -- load generator ------------------------------------------------------------
+
+async def get(port, target):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {target} HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n'.encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), body
+
+
+async def wait_ready(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await get(port, '/_threads')
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def load(port, args):
+    await wait_ready(port)
+    _, body = await get(port, '/changes?tables=players')
+    token = json.loads(body)['token']
+    polls = [asyncio.ensure_future(get(port, f'/changes?tables=players&since={token}&timeout=60'))
+             for _ in range(args.long_polls)]
+    await asyncio.sleep(1)
+
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + args.duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status, _ = await get(port, '/players/api?limit=50&fields=id,name,position')
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.monotonic() - start
+    _, body = await get(port, '/_threads')
+    threads = json.loads(body)['threads']
+    for poll in polls:
+        poll.cancel()
+    await asyncio.gather(*polls, return_exceptions=True)
+    return len(latencies) / elapsed, latencies, errors, threads
+
+
+def run_mode(mode, path, port, args):
+    server = subprocess.Popen([sys.executable, __file__, '--serve', mode, '--database', path,
+                               '--port', str(port), '--workers', str(args.workers)])
+    try:
+        return asyncio.run(load(port, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test threaded vs ASGI serving')
+    parser.add_argument('--players', type=int, default=5000, help='Players in the database (default: 5000)')
+    parser.add_argument('--long-polls', type=int, default=200, help='Open /changes clients (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent API clients (default: 16)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of API load per mode (default: 5)')
+    parser.add_argument('--workers', type=int, default=8, help='ASGI worker threads and pool size (default: 8)')
+    parser.add_argument('--port', type=int, default=8765, help='First port to serve on (default: 8765)')
+    parser.add_argument('--serve', choices=('threaded', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.database, args.port, args.workers)
+        return
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    try:
+        populate(db_path, args.players)
+        print(f'/players/api under {args.concurrency} clients for {args.duration:g}s'
+              f' with {args.long_polls} open long-polls:')
+        for offset, mode in enumerate(('threaded', 'asgi')):
+            rate, latencies, errors, threads = run_mode(mode, db_path, args.port + offset, args)
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+            print(f'  {mode:<9} {rate:8.1f} req/s  p50 {quantiles[49] * 1000:7.2f} ms'
+                  f'  p99 {quantiles[98] * 1000:7.2f} ms  {errors} errors  {threads} server threads')
+    finally:
+        os.close(db_fd)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark season leaderboards.
+
+Measures what the trigger-maintained ``player_leaders`` table costs at
+ingest (season stat lines and per-game lines) and compares reading a top
+list from it with the ``ORDER BY ... LIMIT`` query over ``player_stats`` it
+replaces.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.leaders import LEADER_STATS, check_leaders, leaders
+
+
+def seasons(count):
+    return [f'{year}-{(year + 1) % 100:02d}' for year in range(2024 - count, 2024)]
+
+
+def populate(db, players, season_names, seed=0):
+    """Insert ``players`` players with a stat line in each season; returns seconds."""
+    rng = random.Random(seed)
+    db.executemany(
+        'INSERT INTO players (id, name, position) VALUES (?, ?, ?)',
+        ((i, f'Player {i:06d}', 'CDLRG'[i % 5]) for i in range(1, players + 1))
+    )
+    start = time.perf_counter()
+    for season in season_names:
+        rows = []
+        for i in range(1, players + 1):
+            goals, assists = rng.randint(0, 50), rng.randint(0, 70)
+            goalie = i % 5 == 4
+            rows.append((i, season, goals, assists, goals + assists,
+                         rng.randint(0, 40) if goalie else None,
+                         round(rng.uniform(0.880, 0.935), 3) if goalie else None))
+        rng.shuffle(rows)
+        db.executemany(
+            'INSERT INTO player_stats (player_id, season, goals, assists, points, wins, save_percentage)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+    db.commit()
+    return time.perf_counter() - start
+
+
+def ingest_games(db, players, games, season, seed=1):
+    """Insert ``games`` game lines into ``season``; returns seconds."""
+    rng = random.Random(seed)
+    rows = {}
+    while len(rows) < games:
+        player_id = rng.randint(1, players)
+        date = f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        rows[(player_id, date)] = (player_id, season, date, rng.choice((0, 0, 0, 1, 1, 2)), rng.choice((0, 0, 1, 1, 2)))
+    start = time.perf_counter()
+    db.executemany(
+        'INSERT INTO player_game_stats (player_id, season, game_date, goals, assists) VALUES (?, ?, ?, ?, ?)',
+        rows.values()
+    )
+    db.commit()
+    return time.perf_counter() - start
+
+
+def scan(db, season, stat, limit):
+    return db.execute(
+        f'SELECT p.id, p.name, s.{stat} FROM player_stats s JOIN players p ON p.id = s.player_id'
+        f' WHERE s.season = ? AND s.{stat} IS NOT NULL ORDER BY s.{stat} DESC, p.id LIMIT ?',
+        (season, limit)
+    ).fetchall()
+
+
+def timings(func, repeat):
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.append(time.perf_counter() - start)
+    return statistics.median(result), max(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark season leaderboards')
+    parser.add_argument('--players', type=int, default=20000, help='Number of players (default: 20000)')
+    parser.add_argument('--seasons', type=int, default=5, help='Seasons of stats per player (default: 5)')
+    parser.add_argument('--games', type=int, default=50000, help='Game lines to ingest (default: 50000)')
+    parser.add_argument('--limit', type=int, default=10, help='Leaders per list (default: 10)')
+    parser.add_argument('--repeat', type=int, default=200, help='Reads per measurement (default: 200)')
+    args = parser.parse_args()
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    app = create_app({'DATABASE': db_path})
+    season_names = seasons(args.seasons)
+
+    try:
+        with app.app_context():
+            init_db()
+            db = get_db()
+            stats_seconds = populate(db, args.players, season_names)
+            games_seconds = ingest_games(db, args.players, args.games, season_names[-1])
+            stale = check_leaders(db)
+
+            print(f'{args.players} players x {args.seasons} seasons, {args.games} game lines:')
+            print(f'  season stat lines  {stats_seconds:8.2f} s  '
+                  f'{stats_seconds / (args.players * args.seasons) * 1e6:7.2f} us/row')
+            print(f'  game lines         {games_seconds:8.2f} s  {games_seconds / args.games * 1e6:7.2f} us/row')
+            print(f'  stale leaderboards {len(stale)}')
+            print(f'Top {args.limit} of {season_names[-1]}, median / max of {args.repeat} reads:')
+            for stat in LEADER_STATS:
+                stored = timings(lambda: leaders(db, season_names[-1], stat, args.limit), args.repeat)
+                scanned = timings(lambda: scan(db, season_names[-1], stat, args.limit), args.repeat)
+                print(f'  {stat:<16} leaders {stored[0] * 1e6:7.1f} / {stored[1] * 1e6:7.1f} us'
+                      f'   ORDER BY {scanned[0] * 1e6:9.1f} / {scanned[1] * 1e6:9.1f} us')
+    finally:
+        get_pool(app).close()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML rendering of the players list.
+
+Compares the per-row cost of the old view code, which built the page with
+repeated ``html += f'...'``, against the precompiled ``players.html``
+template, both fully rendered and streamed through the real endpoint.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from markupsafe import escape
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+
+
+def populate(rows):
+    """Insert ``rows`` players spread over a handful of teams."""
+    db = get_db()
+    db.executemany(
+        'INSERT INTO nhl_teams (name, city, abbreviation, conference, division) VALUES (?, ?, ?, ?, ?)',
+        [(f'Team {i}', f'City {i}', f'T{i:02d}', 'Eastern', 'Atlantic') for i in range(32)]
+    )
+    db.executemany(
+        'INSERT INTO players (name, position, team_id, jersey_number, age) VALUES (?, ?, ?, ?, ?)',
+        ((f'Player {i:06d}', 'CDLRG'[i % 5], (i % 33) or None, i % 99, 20 + i % 20) for i in range(rows))
+    )
+    db.commit()
+
+
+def render_concat(players):
+    """The players.index loop as it was before templates were used."""
+    html = '<h1>Players</h1><ul>'
+    for player in players:
+        html += f'<li><a href="/players/{player["id"]}">{player["name"]} - {player["position"]} - {player["team_name"] or "Free Agent"}</a></li>'
+    html += '</ul><a href="/">Back to Home</a>'
+    return html
+
+
+def render_concat_escaped(players):
+    """The same loop with the HTML escaping the template applies."""
+    html = '<h1>Players</h1><ul>'
+    for player in players:
+        html += f'<li><a href="/players/{player["id"]}">{escape(player["name"])} - {escape(player["position"])} - {escape(player["team_name"] or "Free Agent")}</a></li>'
+    html += '</ul><a href="/">Back to Home</a>'
+    return html
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark players list rendering')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of players (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is kept (default: 5)')
+    args = parser.parse_args()
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    app = create_app({'DATABASE': db_path, 'MAX_PAGE_SIZE': args.rows})
+
+    try:
+        with app.test_request_context():
+            init_db()
+            populate(args.rows)
+            players = get_db().execute(
+                'SELECT p.id, p.name, p.position, p.jersey_number, p.age, t.name as team_name, t.abbreviation'
+                ' FROM players p LEFT JOIN nhl_teams t ON p.team_id = t.id'
+                ' ORDER BY p.name, p.id'
+            ).fetchall()
+            template = app.jinja_env.get_template('players.html')
+
+            results = {
+                'string concatenation': best_of(args.repeat, lambda: render_concat(players)),
+                'concatenation + escaping': best_of(args.repeat, lambda: render_concat_escaped(players)),
+                'compiled template': best_of(
+                    args.repeat, lambda: template.render(players=players, limit=args.rows, next_cursor=None)
+                ),
+            }
+
+        client = app.test_client()
+        url = f'/players/?limit={args.rows}'
+        results['streamed endpoint (incl. query)'] = best_of(args.repeat, lambda: client.get(url).data)
+
+        print(f'Rendering {args.rows} players (best of {args.repeat}):')
+        for label, seconds in results.items():
+            per_row = seconds / args.rows * 1e6
+            print(f'  {label:<32} {seconds * 1000:8.2f} ms  {per_row:6.2f} us/row')
+    finally:
+        get_pool(app).close()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark every blueprint route on a synthetic dataset.
+
+A dataset of the chosen ``--scale`` (see ``datasets.py``) is built once and
+cached.  Each route is then driven two ways:
+
+- ``client``: sequential requests through the Flask test client, which
+  measures the application and SQLite cost without any HTTP server
+- ``socket``: ``--concurrency`` clients for ``--duration`` seconds per
+  route against ``dev_server.py --production`` (the pre-forking server)
+  on a local port
+
+Throughput and latency percentiles are printed and, with each mode's peak
+RSS, written to a JSON report (``--output``) with sorted keys, so reports from two commits
+can be diffed directly or with ``--compare``.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote_plus
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import SCALES, dataset
+from flaskr import create_app
+from flaskr.synthetic import FIRST_NAMES, SURNAME_STARTS
+
+TABLES = ('players', 'player_stats', 'users', 'fantasy_leagues', 'fantasy_teams', 'fantasy_team_players')
+
+# name: path template; {player}, {team}, {league}, {fantasy_team}, {first}
+# (a first name) and {prefix} (a surname start) are drawn at random for
+# each request, the names URL-encoded (some are not ASCII)
+ROUTES = {
+    'index': '/',
+    'players.index': '/players/?limit=50',
+    'players.detail': '/players/{player}',
+    'players.api': '/players/api?limit=50',
+    'players.api_filtered': '/players/api?season=2023-24&position=C&sort=-points&limit=50',
+    'players.search_api': '/players/search/api?q={first}',
+    'players.autocomplete': '/players/autocomplete?q={prefix}',
+    'players.leaders': '/players/leaders?stat=points',
+    'teams.index': '/teams/',
+    'teams.detail': '/teams/{team}',
+    'teams.api': '/teams/api',
+    'leagues.index': '/leagues/',
+    'leagues.detail': '/leagues/{league}',
+    'leagues.team_detail': '/leagues/{league}/teams/{fantasy_team}',
+    'leagues.api': '/leagues/api',
+}
+
+
+def row_counts(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f'SELECT count(*) FROM {table}').fetchone()[0] for table in TABLES}
+    finally:
+        conn.close()
+
+
+def fantasy_teams(path):
+    """``(league_id, fantasy_team_id)`` pairs; leagues differ in size."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT league_id, id FROM fantasy_teams ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+
+def paths(template, counts, teams, rng):
+    """Endless request paths for ``template``."""
+    while True:
+        league, fantasy_team = rng.choice(teams)
+        yield template.format(
+            player=rng.randint(1, counts['players']),
+            team=rng.randint(1, 32),
+            league=league,
+            fantasy_team=fantasy_team,
+            first=quote_plus(rng.choice(FIRST_NAMES)),
+            prefix=quote_plus(rng.choice(SURNAME_STARTS)[:3]),
+        )
+
+
+def summarize(latencies, errors, elapsed):
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else (latencies or [0]) * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'max_ms': round(max(latencies, default=0) * 1000, 3),
+    }
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# -- test client ---------------------------------------------------------------
+
+def run_client(path, counts, teams, routes, args):
+    """The test client benchmark, in a fresh process.
+
+    Building an uncached dataset happens in this process, so its peak RSS
+    would be the generator's rather than the app's.
+    """
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(client_benchmark, (path, counts, teams, routes, args))
+
+
+def client_benchmark(path, counts, teams, routes, args):
+    app = create_app({'DATABASE': path, 'AUTOCOMPLETE_REFRESH': 0})
+    client = app.test_client()
+    results = {}
+    for name in routes:
+        requests = paths(ROUTES[name], counts, teams, random.Random(args.seed))
+        for _ in range(args.warmup):
+            client.get(next(requests)).data
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            began = time.perf_counter()
+            response = client.get(next(requests))
+            response.data
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - began)
+            else:
+                errors += 1
+        results[name] = summarize(latencies, errors, time.perf_counter() - start)
+        report_line('client', name, results[name])
+    return {'routes': results, 'peak_rss_mb': peak_rss_mb()}
+
+
+# -- local socket server -------------------------------------------------------
+
+def serve(path, port, workers, rss_file):
+    from flaskr.prefork import PreforkServer
+    logging.basicConfig(level=logging.WARNING)
+    app = create_app({'DATABASE': path, 'AUTOCOMPLETE_REFRESH': 0, 'STATS_ENDPOINTS': True})
+    PreforkServer(app, '127.0.0.1', port, workers=workers).run()
+    # the largest of the server's processes, its workers all reaped by now
+    with open(rss_file, 'w') as f:
+        f.write(str(max(peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN))))
+
+
+def get(port, target):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', target)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return get(port, '/_workers')
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def load(port, template, counts, teams, args):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client(seed):
+        nonlocal errors
+        requests = paths(template, counts, teams, random.Random(seed))
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            try:
+                status = get(port, next(requests))
+            except Exception:
+                # counted as an error rather than ending this client early
+                status = None
+            elapsed = time.perf_counter() - began
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=client, args=(args.seed + i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def run_socket(path, counts, teams, routes, args):
+    fd, rss_file = tempfile.mkstemp(suffix='.rss')
+    os.close(fd)
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', '--database', path,
+                               '--port', str(args.port), '--workers', str(args.workers), '--rss-file', rss_file])
+    try:
+        wait_ready(args.port)
+        results = {}
+        for name in routes:
+            requests = paths(ROUTES[name], counts, teams, random.Random(args.seed))
+            for _ in range(args.warmup):
+                get(args.port, next(requests))
+            results[name] = load(args.port, ROUTES[name], counts, teams, args)
+            report_line('socket', name, results[name])
+    finally:
+        server.terminate()
+        server.wait()
+        with open(rss_file) as f:
+            rss = f.read()
+        os.unlink(rss_file)
+    return {'routes': results, 'peak_rss_mb': float(rss) if rss else None}
+
+
+# -- reports -------------------------------------------------------------------
+
+def report_line(mode, name, result):
+    print(f'  {mode:<6} {name:<22} {result["rps"]:9.1f} req/s  p50 {result["p50_ms"]:8.2f} ms'
+          f'  p95 {result["p95_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms  {result["errors"]} errors')
+
+
+def commit():
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return head
+
+
+def compare(old, new):
+    """Print throughput and p50 changes between two reports."""
+    print(f'{"mode":<6} {"route":<22} {"req/s old":>10} {"new":>10} {"change":>8}'
+          f' {"p50 ms old":>11} {"new":>9}')
+    for mode in ('client', 'socket'):
+        for name, result in sorted(new.get(mode, {}).get('routes', {}).items()):
+            before = old.get(mode, {}).get('routes', {}).get(name)
+            if before is None:
+                continue
+            change = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+            print(f'{mode:<6} {name:<22} {before["rps"]:10.1f} {result["rps"]:10.1f} {change:+7.1f}%'
+                  f' {before["p50_ms"]:11.2f} {result["p50_ms"]:9.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every route on a synthetic dataset')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Dataset size (default: small)')
+    parser.add_argument('--seed', type=int, default=0, help='Dataset and request seed (default: 0)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the cached dataset')
+    parser.add_argument('--modes', default='client,socket', help='client, socket or both (default: both)')
+    parser.add_argument('--routes', help='Comma-separated route names (default: all)')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per route (default: 5)')
+    parser.add_argument('--requests', type=int, default=200, help='Test client requests per route (default: 200)')
+    parser.add_argument('--duration', type=float, default=3.0, help='Socket seconds per route (default: 3)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Socket clients (default: 8)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Server worker processes (default: CPU count)')
+    parser.add_argument('--port', type=int, default=8766, help='Socket server port (default: 8766)')
+    parser.add_argument('--output', help='JSON report path (default: bench-<scale>.json)')
+    parser.add_argument('--compare', metavar='REPORT', help='Compare against an earlier JSON report')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--rss-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.database, args.port, args.workers, args.rss_file)
+        return
+
+    routes = args.routes.split(',') if args.routes else list(ROUTES)
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        parser.error(f'unknown routes: {", ".join(unknown)}')
+    modes = args.modes.split(',')
+
+    path = dataset(args.scale, args.seed, args.rebuild)
+    counts = row_counts(path)
+    teams = fantasy_teams(path)
+    print(f'{args.scale} dataset: ' + ', '.join(f'{table} {count:,}' for table, count in counts.items()))
+
+    report = {
+        'meta': {
+            'commit': commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'config': {
+            'scale': args.scale, 'seed': args.seed, 'warmup': args.warmup, 'requests': args.requests,
+            'duration': args.duration, 'concurrency': args.concurrency, 'workers': args.workers,
+        },
+        'dataset': counts,
+    }
+    if 'client' in modes:
+        report['client'] = run_client(path, counts, teams, routes, args)
+    if 'socket' in modes:
+        report['socket'] = run_socket(path, counts, teams, routes, args)
+
+    output = args.output or f'bench-{args.scale}.json'
+    with open(output, 'w', encoding='utf8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f'wrote {output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark fantasy scoring across many leagues.
+
+Compares scoring every team with the batched pass in ``flaskr.scoring``
+(one grouped query over all rosters) against the per-player approach of
+looking up each rostered player's stats and weighting them in Python, and
+against reading the trigger-maintained ``fantasy_standings`` table.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.scoring import SCORING_STATS, get_weights, team_points
+
+SEASON = '2024-25'
+
+
+def populate(leagues, teams, roster, players, seed=0):
+    """Insert ``leagues`` x ``teams`` fantasy teams with ``roster`` players each."""
+    rng = random.Random(seed)
+    db = get_db()
+    db.executemany(
+        'INSERT INTO players (id, name, position) VALUES (?, ?, ?)',
+        ((i, f'Player {i:06d}', 'CDLRG'[i % 5]) for i in range(1, players + 1))
+    )
+    db.executemany(
+        'INSERT INTO player_stats (player_id, season, goals, assists, plus_minus, penalty_minutes,'
+        ' wins, losses, saves, goals_against, shutouts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((i, SEASON, rng.randint(0, 50), rng.randint(0, 70), rng.randint(-20, 20), rng.randint(0, 80),
+          *((rng.randint(0, 40), rng.randint(0, 30), rng.randint(0, 1800), rng.randint(0, 150), rng.randint(0, 8))
+            if i % 5 == 4 else (0, 0, 0, 0, 0)))
+         for i in range(1, players + 1))
+    )
+    db.execute("INSERT INTO users (id, username, email, password_hash) VALUES (1, 'owner', 'o@example.com', 'x')")
+    db.executemany(
+        'INSERT INTO fantasy_leagues (id, name, commissioner_id, max_teams, season) VALUES (?, ?, 1, ?, ?)',
+        ((league, f'League {league}', teams, SEASON) for league in range(1, leagues + 1))
+    )
+    db.executemany(
+        'INSERT INTO fantasy_teams (id, name, owner_id, league_id) VALUES (?, ?, 1, ?)',
+        ((team, f'Team {team}', (team - 1) // teams + 1) for team in range(1, leagues * teams + 1))
+    )
+
+    def rosters():
+        for league in range(leagues):
+            picks = rng.sample(range(1, players + 1), teams * roster)
+            for slot, player_id in enumerate(picks):
+                team_id = league * teams + slot // roster + 1
+                yield team_id, player_id, 'starter' if slot % roster < roster - 4 else 'bench'
+
+    db.executemany(
+        'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)',
+        rosters()
+    )
+    db.commit()
+
+
+def per_player(db):
+    """Score each rostered starter with its own stats lookup."""
+    weights = {}
+    points = {}
+    for team_id, player_id, system, season in db.execute(
+        'SELECT ft.id, ftp.player_id, fl.scoring_system, fl.season FROM fantasy_team_players ftp'
+        ' JOIN fantasy_teams ft ON ftp.fantasy_team_id = ft.id'
+        ' JOIN fantasy_leagues fl ON ft.league_id = fl.id'
+        " WHERE ftp.position_type = 'starter'"
+    ).fetchall():
+        if system not in weights:
+            weights[system] = get_weights(db, system)
+        stats = db.execute(
+            f'SELECT {", ".join(SCORING_STATS)} FROM player_stats WHERE player_id = ? AND season = ?',
+            (player_id, season)
+        ).fetchone()
+        total = sum(stats[stat] * weight for stat, weight in weights[system].items()) if stats else 0
+        points[team_id] = points.get(team_id, 0) + total
+    return points
+
+
+def batched(db):
+    return {row['fantasy_team_id']: row['points'] for row in team_points(db)}
+
+
+def materialized(db):
+    return dict(db.execute('SELECT fantasy_team_id, points FROM fantasy_standings').fetchall())
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fantasy scoring')
+    parser.add_argument('--leagues', type=int, default=1000, help='Number of leagues (default: 1000)')
+    parser.add_argument('--teams', type=int, default=12, help='Teams per league (default: 12)')
+    parser.add_argument('--roster', type=int, default=20, help='Players per roster, 4 on the bench (default: 20)')
+    parser.add_argument('--players', type=int, default=2000, help='Player pool size (default: 2000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+    args = parser.parse_args()
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    app = create_app({'DATABASE': db_path})
+
+    try:
+        with app.app_context():
+            init_db()
+            populate(args.leagues, args.teams, args.roster, args.players)
+            db = get_db()
+
+            batched_seconds, batched_points = best_of(args.repeat, lambda: batched(db))
+            loop_seconds, loop_points = best_of(args.repeat, lambda: per_player(db))
+            stored_seconds, stored_points = best_of(args.repeat, lambda: materialized(db))
+
+            mismatched = sum(
+                1 for team, points in batched_points.items()
+                if abs(points - loop_points.get(team, 0)) > 1e-6
+                or abs(points - stored_points.get(team, 0)) > 1e-6
+            )
+
+        teams = args.leagues * args.teams
+        print(f'Scoring {args.leagues} leagues x {args.teams} teams (best of {args.repeat}):')
+        for label, seconds in (('batched query', batched_seconds), ('per-player lookups', loop_seconds),
+                               ('materialized read', stored_seconds)):
+            print(f'  {label:<20} {seconds * 1000:9.2f} ms  {seconds / teams * 1e6:7.2f} us/team')
+        print(f'  speedup {loop_seconds / batched_seconds:.1f}x, {mismatched} mismatched teams')
+    finally:
+        get_pool(app).close()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
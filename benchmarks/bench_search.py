@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text player search.
+
+Loads synthetic players and times ``flaskr.search.search_players`` for
+type-ahead prefixes of increasing length, whole names and team searches,
+reporting median, p95 and worst latency per query class.  The name queries
+are then repeated against the in-memory autocomplete index, directly and
+through the ``/players/autocomplete`` endpoint.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.autocomplete import PrefixIndex
+from flaskr.search import search_players
+
+FIRST = ('Connor', 'Auston', 'David', 'Nathan', 'Leon', 'Nikita', 'Cale', 'Sidney', 'Alex', 'Mitch',
+         'Jack', 'Quinn', 'Brady', 'Matthew', 'Kirill', 'Artemi', 'Mikko', 'Elias', 'Jason', 'Brad',
+         'Igor', 'Andrei', 'Juuse', 'Ilya', 'Jake', 'Tyler', 'Sebastian', 'Patrick', 'Evan', 'Roope')
+LAST = ('McDavid', 'Matthews', 'Pastrnak', 'MacKinnon', 'Draisaitl', 'Kucherov', 'Makar', 'Crosby',
+        'Ovechkin', 'Marner', 'Hughes', 'Tkachuk', 'Kaprizov', 'Panarin', 'Rantanen', 'Pettersson',
+        'Robertson', 'Marchand', 'Shesterkin', 'Vasilevskiy', 'Saros', 'Sorokin', 'Guentzel', 'Seguin',
+        'Aho', 'Kane', 'Bouchard', 'Hintz', 'Stamkos', 'Point', 'Barkov', 'Reinhart', 'Eichel', 'Stone')
+SYLLABLES = ('ka', 'ro', 'vi', 'ch', 'son', 'berg', 'ma', 'ne', 'ov', 'ski', 'lin', 'dah', 'tu', 'mi',
+             'ha', 'ri', 'ko', 'sen', 'la', 'ger', 'no', 'va', 'ek', 'pe', 'ter', 'gu', 'an', 'el')
+
+
+def surname(rng):
+    """A star's surname, or a made-up one from two to four syllables."""
+    if rng.random() < 0.2:
+        return rng.choice(LAST)
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def populate(rows, seed=0):
+    """Insert ``rows`` players with realistic, often repeated names."""
+    rng = random.Random(seed)
+    db = get_db()
+    db.executemany(
+        'INSERT INTO nhl_teams (name, city, abbreviation, conference, division) VALUES (?, ?, ?, ?, ?)',
+        [(f'Team{i}', f'City{i}', f'T{i:02d}', 'Eastern', 'Atlantic') for i in range(32)]
+    )
+    db.executemany(
+        'INSERT INTO players (name, position, team_id, jersey_number) VALUES (?, ?, ?, ?)',
+        ((f'{rng.choice(FIRST)} {surname(rng)}', rng.choice(('C', 'LW', 'RW', 'D', 'G')),
+          rng.randint(0, 32) or None, rng.randint(1, 98))
+         for _ in range(rows))
+    )
+    db.commit()
+
+
+def queries(rng, count):
+    """Yield ``(label, query)`` pairs of the shapes a search box sends."""
+    for _ in range(count):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        yield '1-char prefix', last[:1]
+        yield '2-char prefix', last[:2]
+        yield '3-char prefix', last[:3]
+        yield 'first + last prefix', f'{first} {last[:3]}'
+        yield 'full name', f'{first} {last}'
+        yield 'team', f'T{rng.randint(0, 31):02d}'
+
+
+def report(timings):
+    print(f'  {"query":<32} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8}')
+    for label, samples in timings.items():
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f'  {label:<32} {statistics.median(samples) * 1000:8.3f} {p95 * 1000:8.3f} {samples[-1] * 1000:8.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full-text player search')
+    parser.add_argument('--rows', type=int, default=50000, help='Number of players (default: 50000)')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per class (default: 200)')
+    parser.add_argument('--limit', type=int, default=20, help='Results per query (default: 20)')
+    args = parser.parse_args()
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    app = create_app({'DATABASE': db_path})
+
+    try:
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+
+            timings = {}
+            for label, query in queries(random.Random(1), args.queries):
+                start = time.perf_counter()
+                search_players(db, query, args.limit)
+                timings.setdefault(label, []).append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            index = PrefixIndex(app, interval=0)
+            index.start()
+            build = time.perf_counter() - start
+
+        autocomplete = {}
+        client = app.test_client()
+        for label, query in queries(random.Random(1), args.queries):
+            if label == 'team':
+                continue
+            start = time.perf_counter()
+            index.lookup(query, args.limit)
+            autocomplete.setdefault(label, []).append(time.perf_counter() - start)
+            start = time.perf_counter()
+            client.get('/players/autocomplete', query_string={'q': query, 'limit': args.limit})
+            autocomplete.setdefault('endpoint, ' + label, []).append(time.perf_counter() - start)
+
+        print(f'Searching {args.rows} players, limit {args.limit} ({args.queries} queries per class):')
+        report(timings)
+        print(f'Autocomplete index ({len(index)} players, built in {build * 1000:.0f} ms):')
+        report(autocomplete)
+    finally:
+        app.extensions['autocomplete'].stop()
+        get_pool(app).close()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent roster writes, draft-night style.
+
+A synthetic dataset with empty fantasy rosters is drafted by ``--processes``
+processes with ``--threads`` threads each, every thread reading a team's
+roster version and posting a one-player add, through the roster write API.
+Processes contend for SQLite's write lock the way pre-forked server workers
+do. Reports committed writes per second, latency percentiles and how many
+moves were rejected (player taken, stale version, roster full) or ran out
+of lock retries (503), then checks the standings still match a recompute.
+
+``--mode both`` (the default) runs the draft twice on fresh copies of the
+dataset: through each process's single-writer queue (WRITE_QUEUE, with its
+group commit sizes) and with every request thread taking the write lock
+itself.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.scoring import check_standings
+from flaskr.synthetic import NHL_PLAYERS, generate
+from flaskr.writes import get_write_queue
+
+CONFIG = {'AUTOCOMPLETE_PRELOAD': False, 'TEMPLATES_PRELOAD': False, 'AUTOCOMPLETE_REFRESH': 0}
+
+
+def build(path, players, leagues, seed):
+    app = create_app({'DATABASE': path, **CONFIG})
+    with app.app_context():
+        init_db()
+        generate(get_db(), players=players, leagues=leagues, roster_size=0, seed=seed)
+        teams = get_db().execute('SELECT league_id, id FROM fantasy_teams').fetchall()
+    get_pool(app).close()
+    return [tuple(team) for team in teams]
+
+
+def drafter(path, teams, threads, duration, seed, queued):
+    """One process: ``threads`` threads drafting until ``duration`` passes."""
+    import threading
+
+    app = create_app({'DATABASE': path, 'WRITE_QUEUE': queued, **CONFIG})
+    deadline = time.monotonic() + duration
+    results = []
+    lock = threading.Lock()
+
+    def run(thread_seed):
+        rng = random.Random(thread_seed)
+        client = app.test_client()
+        latencies, statuses = [], {}
+        while time.monotonic() < deadline:
+            league_id, team_id = rng.choice(teams)
+            url = f'/leagues/{league_id}/teams/{team_id}/roster'
+            version = client.get(url).get_json()['version']
+            began = time.perf_counter()
+            response = client.post(url, json={'version': version, 'add': [{'player_id': rng.randint(1, NHL_PLAYERS)}]})
+            latencies.append(time.perf_counter() - began)
+            body = response.get_json()
+            if response.status_code == 409:
+                key = 'stale' if 'version' in body else 'full' if 'roster_size' in body else 'taken'
+            else:
+                key = str(response.status_code)
+            statuses[key] = statuses.get(key, 0) + 1
+        with lock:
+            results.append((latencies, statuses))
+
+    workers = [threading.Thread(target=run, args=(seed * 1000 + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    writer = get_write_queue(app)
+    writer.stop()
+    get_pool(app).close()
+    return results, (writer.writes, writer.batches, writer.max_depth)
+
+
+def draft(args, path, teams, queued):
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        per_process = pool.starmap(drafter, [
+            (path, teams, args.threads, args.duration, args.seed + i, queued) for i in range(args.processes)
+        ])
+    elapsed = time.perf_counter() - start
+
+    latencies, statuses = [], {}
+    writes = batches = max_depth = 0
+    for results, (process_writes, process_batches, process_depth) in per_process:
+        writes += process_writes
+        batches += process_batches
+        max_depth = max(max_depth, process_depth)
+        for thread_latencies, thread_statuses in results:
+            latencies.extend(thread_latencies)
+            for key, count in thread_statuses.items():
+                statuses[key] = statuses.get(key, 0) + count
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'{"queued" if queued else "direct"}: {len(latencies):,} moves:'
+          f' {statuses.get("200", 0) / elapsed:,.0f} committed writes/s, {len(latencies) / elapsed:,.0f} moves/s')
+    print(f'  latency p50 {quantiles[49] * 1000:.2f} ms  p95 {quantiles[94] * 1000:.2f} ms'
+          f'  p99 {quantiles[98] * 1000:.2f} ms  max {max(latencies) * 1000:.2f} ms')
+    print('  outcomes: ' + ', '.join(f'{key} {count:,}' for key, count in sorted(statuses.items())))
+    if batches:
+        print(f'  group commits: {batches:,} for {writes:,} writes ({writes / batches:.2f} per commit),'
+              f' max queue depth {max_depth}')
+
+    app = create_app({'DATABASE': path, **CONFIG})
+    with app.app_context():
+        mismatches = check_standings(get_db())
+    get_pool(app).close()
+    print('  standings consistent' if not mismatches else f'  {len(mismatches)} standings out of date')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent roster writes')
+    parser.add_argument('--players', type=int, default=2000, help='Players (default: 2000)')
+    parser.add_argument('--leagues', type=int, default=200, help='Fantasy leagues (default: 200)')
+    parser.add_argument('--processes', type=int, default=4, help='Drafting processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per process (default: 4)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to draft (default: 10)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--mode', choices=('both', 'queued', 'direct'), default='both',
+                        help='Writes through the writer queue, directly, or both (default: both)')
+    args = parser.parse_args()
+
+    for queued in {'both': (True, False), 'queued': (True,), 'direct': (False,)}[args.mode]:
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        try:
+            teams = build(path, args.players, args.leagues, args.seed)
+            print(f'{len(teams):,} fantasy teams in {args.leagues:,} leagues;'
+                  f' {args.processes} processes x {args.threads} threads for {args.duration:g}s')
+            draft(args, path, teams, queued)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.unlink(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Synthetic benchmark datasets at fixed scales.
+
+Datasets come from ``flaskr.synthetic`` on the application schema and
+migrations, with the derived tables (standings, leaders, search) rebuilt
+after the load.  Generation is seeded, so a scale always yields the same
+rows, and built databases are cached under ``benchmarks/.data`` keyed by
+scale, schema version and ``DATASET_VERSION``.
+"""
+
+import os
+import shutil
+import time
+
+from flaskr import create_app
+from flaskr.db import get_db, get_migrations, get_pool, init_db
+from flaskr.synthetic import generate
+
+SCALES = {
+    'small': {'players': 1_000, 'leagues': 100},
+    'medium': {'players': 50_000, 'leagues': 1_000},
+    'large': {'players': 500_000, 'leagues': 10_000},
+}
+
+# part of the cache key: bump when flaskr.synthetic changes what it generates
+DATASET_VERSION = 2
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+
+def build(path, scale, seed=0):
+    """Create the database for ``scale`` at ``path``; returns ``(counts, seconds)``."""
+    start = time.perf_counter()
+    app = create_app({'DATABASE': path, 'AUTOCOMPLETE_PRELOAD': False, 'TEMPLATES_PRELOAD': False})
+    with app.app_context():
+        init_db()
+        db = get_db()
+        counts, _ = generate(db, seed=seed, **SCALES[scale])
+        db.execute('ANALYZE')
+    get_pool(app).close()
+    return counts, time.perf_counter() - start
+
+
+def dataset(scale, seed=0, rebuild=False):
+    """Path to a cached copy of the ``scale`` dataset, building it if needed."""
+    app = create_app({'DATABASE': os.devnull, 'AUTOCOMPLETE_PRELOAD': False, 'TEMPLATES_PRELOAD': False})
+    with app.app_context():
+        schema = get_migrations()[-1][0]
+    path = os.path.join(DATA_DIR, f'{scale}-seed{seed}-schema{schema}-v{DATASET_VERSION}.sqlite')
+    if rebuild or not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        partial = path + '.partial'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(partial + suffix):
+                os.unlink(partial + suffix)
+        counts, seconds = build(partial, scale, seed)
+        shutil.move(partial, path)
+        print(f'built {scale} dataset in {seconds:.1f}s: '
+              + ', '.join(f'{table} {count:,}' for table, count in counts.items()))
+    return path
@@ -7,10 +7,12 @@ Provides enhanced development features including auto-browser launch and live re
 import os
 import sys
 import argparse
+import logging
 import webbrowser
 import threading
 import time
 from flaskr import create_app
+from flaskr.prefork import PreforkServer
 
 def open_browser(url):
     """Open the default web browser to the specified URL after a short delay."""
@@ -25,6 +27,8 @@ def main():
     parser.add_argument('--no-browser', action='store_true', help='Don\'t automatically open browser')
     parser.add_argument('--no-reload', action='store_true', help='Disable live reload')
     parser.add_argument('--production', action='store_true', help='Run in production mode (no debug)')
+    parser.add_argument('--workers', '-w', type=int, help='Worker processes in production mode (default: CPU count)')
+    parser.add_argument('--access-log', action='store_true', help='Log every request in production mode')
 
     args = parser.parse_args()
 
@@ -64,6 +68,20 @@ def main():
         print(f"\n🛑 Press Ctrl+C to stop the server")
         print("=" * 50)
 
+    if not debug_mode:
+        # Pre-forked worker processes; see flaskr/prefork.py
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(message)s')
+        server = PreforkServer(app, host=args.host, port=args.port, workers=args.workers,
+                               access_log=args.access_log)
+        print(f"👷 Workers: {server.workers} (SIGHUP restarts them, SIGUSR1 logs request counts)")
+        print("=" * 50)
+        try:
+            server.run()
+        except Exception as e:
+            print(f"\n❌ Server error: {e}")
+            sys.exit(1)
+        return
+
     # Open browser automatically in development mode
     if debug_mode and not args.no_browser:
         threading.Timer(1, open_browser, args=(url,)).start()
@@ -1,6 +1,6 @@
 # Fantasy Hockey Flask App
 import os
-from flask import Flask
+from flask import Flask, render_template
 
 
 def create_app(test_config=None):
@@ -9,6 +9,81 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'hockey.sqlite'),
+        # connection pool and per-connection PRAGMA tuning
+        DATABASE_POOL_SIZE=8,
+        DATABASE_POOL_TIMEOUT=5.0,
+        DATABASE_CACHE_SIZE=-16000,  # negative values are KiB (~16 MB)
+        DATABASE_MMAP_SIZE=256 * 1024 * 1024,
+        # keyset pagination for list endpoints
+        PAGE_SIZE=50,
+        MAX_PAGE_SIZE=200,
+        # rows fetched per chunk when streaming /api responses
+        API_CHUNK_SIZE=500,
+        # read-through cache for reference data (entries, seconds)
+        CACHE_MAX_ENTRIES=2048,
+        CACHE_TTL=300.0,
+        # rows per executemany batch for `flask import-data`
+        BULK_BATCH_SIZE=5000,
+        # compile all templates at startup instead of on first render
+        TEMPLATES_PRELOAD=True,
+        # in-memory player name autocomplete: load at startup, seconds
+        # between checks for player changes (0 disables the refresher)
+        AUTOCOMPLETE_PRELOAD=True,
+        AUTOCOMPLETE_REFRESH=1.0,
+        AUTOCOMPLETE_LIMIT=10,
+        # ASGI mode (flaskr.asgi): worker threads for Flask views; None
+        # means DATABASE_POOL_SIZE
+        ASGI_WORKERS=None,
+        # /changes long-poll: seconds between version checks, default and
+        # maximum wait
+        CHANGES_POLL_INTERVAL=0.5,
+        CHANGES_TIMEOUT=25.0,
+        CHANGES_MAX_TIMEOUT=60.0,
+        # `dev_server.py --production` (flaskr.prefork): worker processes
+        # (None means one per CPU), pages rendered before forking so workers
+        # share them, and seconds a stopping worker may finish requests in
+        PREFORK_WORKERS=None,
+        PREFORK_WARM_PATHS=('/', '/players/', '/teams/', '/leagues/', '/teams/api', '/leagues/api'),
+        PREFORK_GRACEFUL_TIMEOUT=30.0,
+        # internal counters at /_pool, /_cache, /_writes, /_workers and
+        # (with PROFILING) /_metrics; off by default, since they are served
+        # without authentication
+        STATS_ENDPOINTS=False,
+        # request profiling (flaskr.profiling): Server-Timing headers and
+        # /_metrics; requests per endpoint kept for percentiles, and SQLite
+        # VM instructions between progress callbacks
+        PROFILING=False,
+        PROFILING_SAMPLES=1000,
+        PROFILING_VM_STEP=1000,
+        # slow-query log (flaskr.slowlog): statements slower than
+        # SLOW_QUERY_MS (None disables it) go to a rotating JSON-lines file
+        # with their query plan; full scans of these tables are flagged
+        SLOW_QUERY_MS=None,
+        SLOW_QUERY_LOG=os.path.join(app.instance_path, 'slow_queries.log'),
+        SLOW_QUERY_LOG_BYTES=10 * 1024 * 1024,
+        SLOW_QUERY_LOG_BACKUPS=5,
+        SLOW_QUERY_SCAN_TABLES=('players', 'player_stats', 'fantasy_team_players'),
+        # roster writes (flaskr.rosters): players and starters per team
+        ROSTER_SIZE=20,
+        ROSTER_STARTERS=16,
+        # write transactions (flaskr.writes): seconds an attempt waits for
+        # the write lock, retries after that, and the backoff between them
+        # (doubling from WRITE_BACKOFF up to WRITE_MAX_BACKOFF, jittered)
+        WRITE_BUSY_TIMEOUT=0.1,
+        WRITE_RETRIES=10,
+        WRITE_BACKOFF=0.005,
+        WRITE_MAX_BACKOFF=0.1,
+        # single-writer queue (flaskr.writes.WriteQueue): writes go through
+        # one writer thread per process, up to WRITE_QUEUE_BATCH per group
+        # commit; a full queue (WRITE_QUEUE_SIZE writes) is waited on for
+        # WRITE_QUEUE_TIMEOUT seconds, and a queued write's start for
+        # WRITE_QUEUE_RESULT_TIMEOUT seconds, before answering 503; a
+        # started write is waited on until it commits
+        WRITE_QUEUE=True,
+        WRITE_QUEUE_SIZE=1000,
+        WRITE_QUEUE_BATCH=100,
+        WRITE_QUEUE_TIMEOUT=1.0,
+        WRITE_QUEUE_RESULT_TIMEOUT=30.0,
     )
 
     if test_config is None:
@@ -24,12 +99,21 @@ def create_app(test_config=None):
     except OSError:
         pass
 
-    # register database functions
-    from . import db
+    # register database functions and the read-through cache
+    from . import autocomplete, bulk, cache, db, leaders, profiling, scoring, synthetic, writes
+    cache.init_app(app)
     db.init_app(app)
+    profiling.init_app(app)
+    writes.init_app(app)
+    bulk.init_app(app)
+    synthetic.init_app(app)
+    scoring.init_app(app)
+    leaders.init_app(app)
+    autocomplete.init_app(app)
 
     # register blueprints
-    from . import players, teams, leagues
+    from . import changes, players, teams, leagues
+    app.register_blueprint(changes.bp)
     app.register_blueprint(players.bp)
     app.register_blueprint(teams.bp)
     app.register_blueprint(leagues.bp)
@@ -37,13 +121,21 @@ def create_app(test_config=None):
     # a simple page that says hello
     @app.route('/')
     def index():
-        return '''
-        <h1>Fantasy Hockey Platform</h1>
-        <ul>
-            <li><a href="/players">Players</a></li>
-            <li><a href="/teams">Teams</a></li>
-            <li><a href="/leagues">Leagues</a></li>
-        </ul>
-        '''
+        return render_template('index.html')
+
+    if app.config['TEMPLATES_PRELOAD']:
+        preload_templates(app)
 
     return app
+
+
+def preload_templates(app):
+    """Compile every template into the Jinja cache up front.
+
+    Without this each template is parsed and compiled on its first render,
+    per process.  Outside of debug mode templates are not re-checked for
+    changes, so the cached compiled templates are used for every request.
+    """
+    env = app.jinja_env
+    for name in env.list_templates(extensions=['html']):
+        env.get_template(name)
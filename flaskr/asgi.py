@@ -0,0 +1,211 @@
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from flaskr import changes
+from flaskr.db import get_pool
+from flaskr.writes import get_write_queue
+
+
+class AsgiAdapter:
+    """Serve a Flask app to an ASGI server (uvicorn, hypercorn, ...).
+
+    Flask views and their blocking ``sqlite3`` calls run on a bounded thread
+    pool of ASGI_WORKERS threads (by default DATABASE_POOL_SIZE, so a worker
+    never waits for a connection).  Requests beyond that wait on the event
+    loop as coroutines, not as threads.  Response bodies, including the
+    streamed JSON arrays of the ``/api`` endpoints, are forwarded chunk by
+    chunk with the server's backpressure.
+
+    ``/changes`` is served natively: a waiting long-poll is a coroutine.
+    While any are waiting, one watcher task reads ``table_versions`` every
+    CHANGES_POLL_INTERVAL seconds on a worker and wakes them all, so open
+    dashboards cost neither a thread nor a query each.
+    """
+
+    def __init__(self, app, workers=None):
+        self.app = app
+        self.workers = workers or app.config['ASGI_WORKERS'] or app.config['DATABASE_POOL_SIZE']
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asgi')
+        self.native = {'/changes': self._changes}
+        self._versions = {}
+        self._tick = None
+        self._watcher = None
+        self._waiting = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            handler = self.native.get(scope['path'])
+            if handler is not None and scope['method'] in ('GET', 'HEAD'):
+                await handler(scope, receive, send)
+            else:
+                await self._wsgi(scope, receive, send)
+        else:
+            raise NotImplementedError(f'unsupported ASGI scope type {scope["type"]!r}')
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def close(self):
+        """Stop the worker threads and the writer, and close idle database connections."""
+        self.executor.shutdown(wait=True)
+        get_write_queue(self.app).stop()
+        get_pool(self.app).close()
+
+    async def run(self, func, *args):
+        """Run blocking ``func`` on the worker pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    # -- Flask views over WSGI -------------------------------------------------
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            # WSGI carries paths as UTF-8 bytes decoded as latin-1
+            'SCRIPT_NAME': root_path.encode('utf8').decode('latin1'),
+            'PATH_INFO': path.encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            environ[name] = f'{environ[name]},{value}' if name in environ else value
+        environ.setdefault('CONTENT_LENGTH', str(len(body)))
+        return environ
+
+    def _call_wsgi(self, environ, loop, send):
+        """Run the Flask app in a worker thread, sending as the body is produced."""
+        def forward(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+            }
+
+        result = self.app(environ, start_response)
+        try:
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not response.get('sent'):
+                    forward(response['start'])
+                    response['sent'] = True
+                forward({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not response.get('sent'):
+                forward(response['start'])
+            forward({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    async def _wsgi(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.extend(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        environ = self._environ(scope, bytes(body))
+        await self.run(self._call_wsgi, environ, asyncio.get_running_loop(), send)
+
+    # -- native long-poll --------------------------------------------------------
+
+    async def _changes(self, scope, receive, send):
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin1')))
+        try:
+            tables, since, timeout = changes.parse_args(args, self.app.config)
+            token, versions = await self.run(changes.poll, self.app, tables)
+        except ValueError as e:
+            await self._json(send, 400, {'error': str(e)})
+            return
+
+        disconnected = asyncio.ensure_future(self._disconnect(receive))
+        self._waiting += 1
+        try:
+            deadline = time.monotonic() + timeout
+            while token == since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self._watcher is None:
+                    self._start_watcher()
+                done, _ = await asyncio.wait({disconnected, self._tick}, timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    return
+                token, versions = changes.token(self._versions, tables)
+        finally:
+            self._waiting -= 1
+            disconnected.cancel()
+        await self._json(send, 200, changes.payload(since, token, versions))
+
+    def _start_watcher(self):
+        self._tick = asyncio.get_running_loop().create_future()
+        self._watcher = asyncio.ensure_future(self._watch())
+
+    async def _watch(self):
+        """Poll ``table_versions`` for waiting long-polls; stops when none are left."""
+        interval = self.app.config['CHANGES_POLL_INTERVAL']
+        try:
+            while self._waiting:
+                await asyncio.sleep(interval)
+                self._versions = await self.run(changes.read_versions, self.app)
+                tick, self._tick = self._tick, asyncio.get_running_loop().create_future()
+                tick.set_result(None)
+        finally:
+            self._watcher = None
+
+    async def _disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _json(self, send, status, data):
+        body = json.dumps(data).encode('utf8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
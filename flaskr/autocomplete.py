@@ -0,0 +1,283 @@
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+
+from flask import current_app
+
+from flaskr.db import get_pool
+
+log = logging.getLogger(__name__)
+
+# ``player_changes`` id that stands for every player
+RELOAD = 0
+
+
+def normalize(text):
+    """Casefold and strip accents, so "stutzle" finds "Stützle"."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _keys(name):
+    """Index keys for a name: the full name and the name from each later word."""
+    words = normalize(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def _merge(keys, ids, dropped, added):
+    """New arrays: ``keys``/``ids`` without ``dropped`` and with ``added`` merged in.
+
+    ``dropped`` holds ``(player_id, name)`` pairs whose keys are taken out
+    and ``added`` sorted ``(key, player_id)`` entries.  Each change is
+    located with ``bisect`` and the untouched runs between them are copied
+    as slices, so the arrays are walked once whatever the number of changes.
+    """
+    cuts = []
+    for player_id, name in dropped:
+        for key in _keys(name):
+            i = bisect.bisect_left(keys, key)
+            while ids[i] != player_id:
+                i += 1
+            cuts.append((i, 1, key, player_id))
+    cuts.extend((bisect.bisect_left(keys, key), 0, key, player_id) for key, player_id in added)
+    cuts.sort()
+    new_keys, new_ids = [], []
+    start = 0
+    for i, drop, key, player_id in cuts:
+        new_keys += keys[start:i]
+        new_ids += ids[start:i]
+        if drop:
+            start = i + 1
+        else:
+            new_keys.append(key)
+            new_ids.append(player_id)
+            start = i
+    new_keys += keys[start:]
+    new_ids += ids[start:]
+    return new_keys, new_ids
+
+
+def log_reload(db):
+    """Tell every index to reload ``players`` in full.
+
+    For loads that bypass the ``player_changes`` triggers; call it inside
+    the load's transaction.
+    """
+    db.execute(
+        'INSERT INTO player_changes (player_id, seq)'
+        ' VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM player_changes))'
+        ' ON CONFLICT (player_id) DO UPDATE SET seq = excluded.seq',
+        (RELOAD,)
+    )
+
+
+class PrefixIndex:
+    """In-memory prefix index over player names for autocomplete.
+
+    Keys are kept in a sorted list and looked up with ``bisect``, so a
+    lookup costs O(log n) plus the matches returned.  Every word of a name
+    starts a key, so "mcd" and "connor m" both find Connor McDavid.
+
+    The index is loaded from ``players`` at startup (or on first use) and
+    afterwards only diffs are applied: a daemon thread polls the players row
+    of ``table_versions`` every ``interval`` seconds and, when it moved,
+    reads the players logged in ``player_changes`` since its last refresh
+    and adds, moves or removes just those.  Updates build new arrays and
+    swap them in, so lookups only wait for the swap.  Lookups never touch
+    the database once the index is loaded.
+    """
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+        self._keys = []
+        self._ids = []
+        self._players = {}
+        self._version = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+
+    def _build(self, rows):
+        """Fresh arrays for ``rows``, sorted in one go."""
+        entries = sorted(
+            (key, row[0]) for row in rows for key in _keys(row[1])
+        )
+        keys = [key for key, _ in entries]
+        ids = [player_id for _, player_id in entries]
+        return keys, ids, {row[0]: row for row in rows}
+
+    def _patch(self, changed, removed):
+        """New arrays with ``changed`` rows put in and ``removed`` ids taken out."""
+        players = dict(self._players)
+        dropped = []
+        added = []
+        for player_id in removed:
+            old = players.pop(player_id, None)
+            if old is not None:
+                dropped.append((player_id, old[1]))
+        # the last row per id wins, as in ``players``
+        for row in {row[0]: row for row in changed}.values():
+            old = players.get(row[0])
+            if old == row:
+                continue
+            if old is not None:
+                dropped.append((row[0], old[1]))
+            added.extend((key, row[0]) for key in _keys(row[1]))
+            players[row[0]] = row
+        added.sort()
+        return (*_merge(self._keys, self._ids, dropped, added), players)
+
+    def _swap(self, arrays):
+        with self._lock:
+            self._keys, self._ids, self._players = arrays
+
+    def add(self, player_id, name, position):
+        """Add or replace one player."""
+        with self._update_lock:
+            self._swap(self._patch([(player_id, name, position)], ()))
+
+    def remove(self, player_id):
+        """Remove one player, if present."""
+        with self._update_lock:
+            self._swap(self._patch((), [player_id]))
+
+    def refresh(self):
+        """Bring the index up to date with ``players``; returns True if it changed.
+
+        Reads only the players logged in ``player_changes`` since the last
+        refresh; the whole table is read on the first load, after a reload
+        marker and when more than a quarter of the players changed.
+        """
+        with self._update_lock:
+            pool = get_pool(self.app)
+            db = pool.acquire()
+            try:
+                # one statement, so the version and the sequence come from one snapshot
+                version, seq = db.execute(
+                    "SELECT (SELECT version FROM table_versions WHERE name = 'players'),"
+                    ' (SELECT COALESCE(MAX(seq), 0) FROM player_changes)'
+                ).fetchone()
+                if self._loaded.is_set() and version is not None and version == self._version:
+                    return False
+                changes = None
+                # a log behind ours was recreated (init-db): start over
+                if self._loaded.is_set() and seq >= self._seq:
+                    changes = db.execute(
+                        'SELECT c.player_id, p.name, p.position FROM player_changes c'
+                        ' LEFT JOIN players p ON p.id = c.player_id WHERE c.seq > ? AND c.seq <= ?',
+                        (self._seq, seq)
+                    ).fetchall()
+                    if len(changes) > len(self._players) // 4 or any(row[0] == RELOAD for row in changes):
+                        # cheaper to re-sort everything than to insert one by one
+                        changes = None
+                if changes is None:
+                    rows = [tuple(row) for row in db.execute('SELECT id, name, position FROM players')]
+            finally:
+                pool.release(db)
+
+            # built outside ``_lock``: lookups go on against the old arrays meanwhile
+            if changes is None:
+                self._swap(self._build(rows))
+            elif changes:
+                self._swap(self._patch(
+                    [tuple(row) for row in changes if row[1] is not None],
+                    [row[0] for row in changes if row[1] is None]
+                ))
+            self._version = version
+            self._seq = seq
+            self.refreshes += 1
+        self._loaded.set()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                log.exception('autocomplete refresh failed')
+
+    def start(self):
+        """Load the index if needed and start the refresher thread."""
+        with self._start_lock:
+            if not self._loaded.is_set():
+                self.refresh()
+            if self.interval and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='autocomplete-refresh', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def after_fork(self):
+        """Restart the refresher in a forked worker.
+
+        Threads do not survive ``fork()``; the loaded index does, shared
+        copy-on-write with the parent, which stopped its refresher first.
+        """
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self._loaded.is_set():
+            self.start()
+
+    def lookup(self, prefix, limit=10):
+        """Up to ``limit`` players whose name has a word starting with ``prefix``.
+
+        Returns ``(id, name, position)`` tuples in key order, each player once.
+        """
+        prefix = ' '.join(normalize(prefix).split())
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            # updates swap in new arrays rather than changing these ones
+            keys, ids, players = self._keys, self._ids, self._players
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+            player_id = ids[i]
+            if player_id not in seen:
+                seen.add(player_id)
+                results.append(players[player_id])
+            i += 1
+        return results
+
+    @property
+    def loaded(self):
+        return self._loaded.is_set()
+
+    def __len__(self):
+        return len(self._players)
+
+
+def get_index(app=None):
+    """The app's autocomplete index, loaded and refreshing on first use."""
+    app = app or current_app
+    index = app.extensions['autocomplete']
+    if not index.loaded:
+        index.start()
+    return index
+
+
+def init_app(app):
+    index = app.extensions['autocomplete'] = PrefixIndex(app, app.config['AUTOCOMPLETE_REFRESH'])
+    if app.config['AUTOCOMPLETE_PRELOAD'] and os.path.exists(app.config['DATABASE']):
+        try:
+            index.start()
+        except sqlite3.Error as e:
+            # no schema yet (e.g. before `flask init-db`); load on first use
+            log.info('autocomplete index not preloaded: %s', e)
@@ -0,0 +1,462 @@
+import contextlib
+import csv
+import json
+import math
+import os
+import sqlite3
+import time
+from itertools import islice
+
+import click
+from flask import current_app
+
+from flaskr.cache import invalidate
+from flaskr.db import get_db
+
+
+class BulkImportError(ValueError):
+    """Raised for input records that cannot be imported."""
+
+
+PLAYER_COLUMNS = ('name', 'position', 'team_id', 'jersey_number', 'age', 'height', 'weight')
+
+STAT_COLUMNS = (
+    'games_played', 'goals', 'assists', 'points', 'plus_minus', 'penalty_minutes',
+    'wins', 'losses', 'saves', 'save_percentage', 'goals_against_average', 'shutouts',
+)
+
+REAL_STAT_COLUMNS = ('save_percentage', 'goals_against_average')
+
+IMPORT_TABLES = ('nhl_teams', 'players', 'player_stats', 'player_game_stats')
+
+GAME_COLUMNS = (
+    'goals', 'assists', 'plus_minus', 'penalty_minutes',
+    'saves', 'goals_against', 'minutes', 'shutout',
+)
+
+GAME_DECISIONS = ('W', 'L', 'OTL')
+
+# tables a game line changes, directly or through the aggregate triggers
+GAME_TABLES = ('player_game_stats', 'player_stats', 'player_leaders', 'fantasy_standings')
+
+
+def read_records(path):
+    """Lazily yield one dict per record from a .csv or .jsonl file."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf8') as f:
+        if ext == '.csv':
+            yield from csv.DictReader(f)
+        elif ext in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise BulkImportError(f'{path}: expected a .csv or .jsonl file')
+
+
+# SQLite stores integers as signed 64-bit
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+
+def _int(value):
+    if value is None or value == '':
+        return None
+    return _number(value)
+
+
+def _number(value, convert=int):
+    """``value`` as an int (or ``convert``), blank as 0.
+
+    Raises ``ValueError`` for anything SQLite could not store as given:
+    booleans, fractional counts, integers past 64 bits and non-finite reals.
+    """
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise ValueError(f'expected a number, not {value!r}')
+    if convert is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(f'expected a whole number, not {value!r}')
+    try:
+        number = convert(value)
+    except OverflowError:
+        raise ValueError(f'{value!r} is out of range')
+    if convert is int and not -SQLITE_MAX_INT - 1 <= number <= SQLITE_MAX_INT:
+        raise ValueError(f'{value!r} is out of range')
+    if convert is float and not math.isfinite(number):
+        raise ValueError(f'{value!r} is out of range')
+    return number
+
+
+@contextlib.contextmanager
+def relaxed_durability(db, cache_size=-262144):
+    """Trade crash safety for speed for the duration of a bulk load.
+
+    Turns off fsync and keeps the rollback journal in memory (if no other
+    connection holds the database in WAL mode), then restores the previous
+    settings.  A crash mid-load can corrupt the database, so only use this
+    for imports that can be re-run from the source files.
+    """
+    journal_mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+    synchronous = db.execute('PRAGMA synchronous').fetchone()[0]
+    previous_cache_size = db.execute('PRAGMA cache_size').fetchone()[0]
+
+    db.execute('PRAGMA synchronous = OFF')
+    db.execute('PRAGMA journal_mode = MEMORY')
+    db.execute(f'PRAGMA cache_size = {int(cache_size)}')
+    try:
+        yield
+    finally:
+        db.execute(f'PRAGMA cache_size = {int(previous_cache_size)}')
+        db.execute(f'PRAGMA journal_mode = {journal_mode}')
+        db.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+
+@contextlib.contextmanager
+def deferred_version_triggers(db, tables):
+    """Bump ``table_versions`` once per table instead of once per row.
+
+    Must be used inside the load's transaction: the per-row version
+    triggers on ``tables`` are dropped for the duration and recreated
+    afterwards, which other connections never observe since DDL is
+    transactional in SQLite.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    triggers = db.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        f" AND name LIKE '%\\_version\\_%' ESCAPE '\\' AND tbl_name IN ({placeholders})",
+        tuple(tables)
+    ).fetchall()
+    for name, _ in triggers:
+        db.execute(f'DROP TRIGGER "{name}"')
+    try:
+        yield
+    finally:
+        for _, sql in triggers:
+            db.execute(sql)
+        if triggers:
+            db.execute(
+                'UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP'
+                f' WHERE name IN ({placeholders})',
+                tuple(tables)
+            )
+
+
+@contextlib.contextmanager
+def suspended_triggers(db, tables):
+    """Drop every trigger on ``tables`` for the duration of a load.
+
+    Like ``deferred_version_triggers`` but for all triggers, including the
+    ones maintaining derived tables (standings, leaders, search): the
+    caller must rebuild those before the block ends.  Must be used inside
+    the load's transaction; ``table_versions`` is bumped once per table.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    triggers = db.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        f' AND tbl_name IN ({placeholders})',
+        tuple(tables)
+    ).fetchall()
+    for name, _ in triggers:
+        db.execute(f'DROP TRIGGER "{name}"')
+    try:
+        yield
+    finally:
+        for _, sql in triggers:
+            db.execute(sql)
+        db.execute(
+            'UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP'
+            f' WHERE name IN ({placeholders})',
+            tuple(tables)
+        )
+
+
+@contextlib.contextmanager
+def deferred_indexes(db, tables):
+    """Drop the secondary indexes on ``tables`` and build them after the load.
+
+    One ``CREATE INDEX`` over the loaded rows sorts once, instead of
+    updating every index row by row in random key order.  Indexes backing
+    UNIQUE or PRIMARY KEY constraints cannot be dropped and stay; the
+    others, unique ones included, are checked when rebuilt.  Must be used
+    inside the load's transaction.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    indexes = db.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        f' AND tbl_name IN ({placeholders})',
+        tuple(tables)
+    ).fetchall()
+    for name, _ in indexes:
+        db.execute(f'DROP INDEX "{name}"')
+    yield
+    for _, sql in indexes:
+        db.execute(sql)
+
+
+class BulkLoader:
+    """Batched inserts of teams, players, season stats and game lines.
+
+    Foreign keys are resolved through in-memory indexes (team abbreviation
+    and player name to id) built once per load.  Player ids are assigned
+    here rather than read back after inserting, so the index grows with
+    the load instead of being re-selected.  Stat and game records name
+    their player by ``player`` or, where two players share a name, by
+    ``player_id``; a shared name is never resolved to either of them.  The
+    caller owns the transaction; nothing is committed here.
+    """
+
+    def __init__(self, db, batch_size=5000):
+        self.db = db
+        self.batch_size = batch_size
+        self.counts = {}
+        self.team_ids = {
+            row[0]: row[1] for row in db.execute('SELECT abbreviation, id FROM nhl_teams')
+        }
+        self.player_ids = {}
+        self.ambiguous_names = set()
+        self.known_player_ids = set()
+        for name, player_id in db.execute('SELECT name, id FROM players'):
+            self._index_player(name, player_id)
+        self._next_player_id = db.execute(
+            'SELECT COALESCE(MAX(id), 0) + 1 FROM players'
+        ).fetchone()[0]
+
+    def _insert(self, table, sql, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.db.execute('SAVEPOINT bulk_batch')
+            try:
+                self.db.executemany(sql, batch)
+            except sqlite3.IntegrityError as e:
+                self.db.execute('ROLLBACK TO bulk_batch')
+                raise self._integrity_error(table, sql, batch, e)
+            finally:
+                self.db.execute('RELEASE bulk_batch')
+            self.counts[table] = self.counts.get(table, 0) + len(batch)
+
+    def _integrity_error(self, table, sql, batch, error):
+        """A ``BulkImportError`` naming the record of ``batch`` that broke a constraint.
+
+        The batch was rolled back to its savepoint, so its rows are replayed
+        one at a time to find the first that fails.
+        """
+        first = self.counts.get(table, 0) + 1
+        for number, row in enumerate(batch, first):
+            try:
+                self.db.execute(sql, row)
+            except sqlite3.IntegrityError as e:
+                return BulkImportError(f'{table} record {number} {row!r}: {e}')
+        return BulkImportError(f'{table} records {first}-{first + len(batch) - 1}: {error}')
+
+    def _team_id(self, abbreviation):
+        if abbreviation is None or abbreviation == '':
+            return None
+        try:
+            return self.team_ids[abbreviation]
+        except KeyError:
+            raise BulkImportError(f'unknown team abbreviation {abbreviation!r}')
+
+    def _index_player(self, name, player_id):
+        if name in self.player_ids or name in self.ambiguous_names:
+            self.player_ids.pop(name, None)
+            self.ambiguous_names.add(name)
+        else:
+            self.player_ids[name] = player_id
+        self.known_player_ids.add(player_id)
+
+    def _player_id(self, record):
+        player_id = _int(record.get('player_id'))
+        if player_id is not None:
+            if player_id not in self.known_player_ids:
+                raise BulkImportError(f'unknown player id {player_id}')
+            return player_id
+        name = record.get('player')
+        if name in self.ambiguous_names:
+            raise BulkImportError(f'player name {name!r} is shared by several players; give a player_id')
+        try:
+            return self.player_ids[name]
+        except KeyError:
+            raise BulkImportError(f'unknown player {name!r}')
+
+    def load_teams(self, records):
+        """Insert NHL teams: name, city, abbreviation, conference, division."""
+        def rows():
+            for record in records:
+                yield (record['name'], record['city'], record['abbreviation'],
+                       record['conference'], record['division'])
+
+        self._insert(
+            'nhl_teams',
+            'INSERT INTO nhl_teams (name, city, abbreviation, conference, division) VALUES (?, ?, ?, ?, ?)',
+            rows()
+        )
+        self.team_ids = {
+            row[0]: row[1] for row in self.db.execute('SELECT abbreviation, id FROM nhl_teams')
+        }
+
+    def load_players(self, records):
+        """Insert players; ``team`` is an abbreviation (blank for free agents)."""
+        def rows():
+            for record in records:
+                player_id = self._next_player_id
+                self._next_player_id += 1
+                self._index_player(record['name'], player_id)
+                yield (player_id, record['name'], record['position'],
+                       self._team_id(record.get('team')),
+                       _int(record.get('jersey_number')), _int(record.get('age')),
+                       record.get('height') or None, _int(record.get('weight')))
+
+        self._insert(
+            'players',
+            f'INSERT INTO players (id, {", ".join(PLAYER_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows()
+        )
+
+    def load_stats(self, records):
+        """Insert season stat lines; ``player`` is the player's name (or ``player_id``)."""
+        def rows():
+            for record in records:
+                yield (self._player_id(record), record['season'], *(
+                    _number(record.get(column), float if column in REAL_STAT_COLUMNS else int)
+                    for column in STAT_COLUMNS
+                ))
+
+        placeholders = ', '.join('?' for _ in range(len(STAT_COLUMNS) + 2))
+        self._insert(
+            'player_stats',
+            f'INSERT INTO player_stats (player_id, season, {", ".join(STAT_COLUMNS)}) VALUES ({placeholders})',
+            rows()
+        )
+
+    def load_games(self, records):
+        """Insert per-game stat lines; ``player`` is the player's name (or ``player_id``).
+
+        The season totals in ``player_stats`` are kept up to date by the
+        triggers on ``player_game_stats`` as each batch goes in.
+        """
+        def rows():
+            for record in records:
+                yield (self._player_id(record), record['season'], record['game_date'],
+                       record.get('decision') or None, *(
+                           _number(record.get(column), float if column == 'minutes' else int)
+                           for column in GAME_COLUMNS
+                       ))
+
+        placeholders = ', '.join('?' for _ in range(len(GAME_COLUMNS) + 4))
+        self._insert(
+            'player_game_stats',
+            'INSERT INTO player_game_stats (player_id, season, game_date, decision,'
+            f' {", ".join(GAME_COLUMNS)}) VALUES ({placeholders})',
+            rows()
+        )
+
+
+def insert_games(db, records, max_records=1000):
+    """Insert per-game stat lines that name their player by ``player_id``.
+
+    For live ingestion through the API rather than files: every record is
+    checked before anything is written, and a game already recorded for a
+    player is an error.  Run inside a write transaction; returns the
+    number of lines inserted.
+    """
+    if not isinstance(records, list) or not records:
+        raise BulkImportError('expected a non-empty list of game lines')
+    if len(records) > max_records:
+        raise BulkImportError(f'at most {max_records} game lines per request')
+
+    rows = []
+    for record in records:
+        if not isinstance(record, dict):
+            raise BulkImportError('each game line must be an object')
+        player_id = record.get('player_id')
+        if isinstance(player_id, bool) or not isinstance(player_id, int):
+            raise BulkImportError(f'player_id must be an integer, not {player_id!r}')
+        if not isinstance(record.get('season'), str) or not isinstance(record.get('game_date'), str):
+            raise BulkImportError('season and game_date are required strings')
+        decision = record.get('decision') or None
+        if decision is not None and decision not in GAME_DECISIONS:
+            raise BulkImportError(f'decision must be one of {", ".join(GAME_DECISIONS)}, not {decision!r}')
+        try:
+            numbers = [_number(record.get(column), float if column == 'minutes' else int) for column in GAME_COLUMNS]
+        except (TypeError, ValueError) as e:
+            raise BulkImportError(f'bad stat value for player {player_id}: {e}')
+        rows.append((player_id, record['season'], record['game_date'], decision, *numbers))
+
+    player_ids = sorted({row[0] for row in rows})
+    placeholders = ', '.join('?' for _ in player_ids)
+    known = {row[0] for row in db.execute(f'SELECT id FROM players WHERE id IN ({placeholders})', player_ids)}
+    for player_id in player_ids:
+        if player_id not in known:
+            raise BulkImportError(f'unknown player {player_id}')
+
+    placeholders = ', '.join('?' for _ in range(len(GAME_COLUMNS) + 4))
+    try:
+        db.executemany(
+            'INSERT INTO player_game_stats (player_id, season, game_date, decision,'
+            f' {", ".join(GAME_COLUMNS)}) VALUES ({placeholders})',
+            rows
+        )
+    except sqlite3.IntegrityError as e:
+        raise BulkImportError(f'game line already recorded: {e}')
+    return len(rows)
+
+
+def import_files(db, teams=None, players=None, stats=None, games=None, batch_size=5000):
+    """Stream the given files into the database in a single transaction.
+
+    Returns ``(counts, seconds)``.  On any error the whole import is rolled
+    back.
+    """
+    start = time.perf_counter()
+    with relaxed_durability(db):
+        db.execute('BEGIN')
+        try:
+            with deferred_version_triggers(db, IMPORT_TABLES):
+                loader = BulkLoader(db, batch_size)
+                if teams:
+                    loader.load_teams(read_records(teams))
+                if players:
+                    loader.load_players(read_records(players))
+                if stats:
+                    loader.load_stats(read_records(stats))
+                if games:
+                    loader.load_games(read_records(games))
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
+    return loader.counts, time.perf_counter() - start
+
+
+@click.command('import-data')
+@click.option('--teams', type=click.Path(exists=True, dir_okay=False), help='NHL teams (.csv or .jsonl).')
+@click.option('--players', type=click.Path(exists=True, dir_okay=False), help='Players (.csv or .jsonl).')
+@click.option('--stats', type=click.Path(exists=True, dir_okay=False), help='Season stat lines (.csv or .jsonl).')
+@click.option('--games', type=click.Path(exists=True, dir_okay=False), help='Per-game stat lines (.csv or .jsonl).')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='Rows per executemany batch (default: BULK_BATCH_SIZE).')
+def import_data_command(teams, players, stats, games, batch_size):
+    """Bulk-import teams, players, stats and games from CSV/JSONL files."""
+    if not (teams or players or stats or games):
+        raise click.UsageError('Pass at least one of --teams, --players, --stats or --games.')
+
+    batch_size = batch_size or current_app.config['BULK_BATCH_SIZE']
+    try:
+        counts, seconds = import_files(get_db(), teams, players, stats, games, batch_size)
+    except (BulkImportError, KeyError, ValueError, sqlite3.IntegrityError) as e:
+        raise click.ClickException(f'Import failed, nothing was written: {e}')
+
+    invalidate(*IMPORT_TABLES)
+
+    total = sum(counts.values())
+    for table, count in counts.items():
+        click.echo(f'  {table}: {count} rows')
+    rate = total / seconds if seconds else float(total)
+    click.echo(f'Imported {total} rows in {seconds:.2f}s ({rate:,.0f} rows/sec).')
+
+
+def init_app(app):
+    app.cli.add_command(import_data_command)
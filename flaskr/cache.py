@@ -0,0 +1,171 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context, jsonify
+
+
+def _sizeof(value, _seen=None):
+    """Approximate deep size in bytes of plain cached data."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, _seen) + _sizeof(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item, _seen) for item in value)
+    return size
+
+
+class Cache:
+    """In-process read-through cache with TTL expiry and LRU eviction.
+
+    Entries are keyed on the caller's key plus, for every table the value
+    was read from, the ``versions`` the caller passes in (the
+    ``table_versions`` counters, which triggers bump on every write from
+    any process) and this process's generation.  Writers call
+    ``invalidate`` with the tables they touched, which bumps those
+    generations: entries built from the old data can no longer be looked
+    up and age out of the LRU.
+    """
+
+    def __init__(self, max_entries=2048, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _full_key(self, tables, key, versions):
+        generations = tuple(self._generations.get(t, 0) for t in tables)
+        return (key, self._epoch, generations, versions)
+
+    def _evict(self, full_key):
+        _, _, size = self._entries.pop(full_key)
+        self._bytes -= size
+
+    def get_or_load(self, tables, key, loader, versions=()):
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        ``tables`` names every table ``loader`` reads, so a write to any of
+        them invalidates the entry; ``versions`` must be read before
+        ``loader`` runs.  ``loader`` runs outside the lock.
+        """
+        now = self.clock()
+        with self._lock:
+            full_key = self._full_key(tables, key, versions)
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                expires, value, _ = entry
+                if expires > now:
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return value
+                self._evict(full_key)
+            self.misses += 1
+
+        value = loader()
+        size = _sizeof(value)
+
+        with self._lock:
+            # don't store a value that was loaded across an invalidation
+            if self._full_key(tables, key, versions) == full_key:
+                if full_key in self._entries:
+                    self._evict(full_key)
+                self._entries[full_key] = (now + self.ttl, value, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries:
+                    self._evict(next(iter(self._entries)))
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *tables):
+        """Bump the generation of each table so dependent entries miss."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the whole schema was rebuilt."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'generations': dict(self._generations),
+            }
+
+
+def get_cache(app=None):
+    app = app or current_app
+    return app.extensions['cache']
+
+
+def table_versions(tables):
+    """The ``table_versions`` counters of ``tables``, read once per request.
+
+    ``conditional`` records the counters it builds the ETag from here, so
+    a cached body is looked up under the same versions as its ETag.
+    """
+    from flaskr.db import get_db  # flaskr.db imports this module
+
+    known = g.setdefault('table_versions', {})
+    missing = [table for table in tables if table not in known]
+    if missing:
+        placeholders = ', '.join('?' for _ in missing)
+        rows = get_db().execute(
+            f'SELECT name, version FROM table_versions WHERE name IN ({placeholders})', tuple(missing)
+        )
+        known.update({table: None for table in missing})
+        known.update((row['name'], row['version']) for row in rows)
+    return tuple(known[table] for table in tables)
+
+
+def cached(tables, key, loader):
+    """Read-through lookup on the current app's cache."""
+    return get_cache().get_or_load(tables, key, loader, table_versions(tables))
+
+
+def invalidate(*tables):
+    """Mark ``tables`` as written; call from every write path."""
+    get_cache().invalidate(*tables)
+    if has_app_context():
+        # this request's counters are out of date now
+        for table in tables:
+            g.get('table_versions', {}).pop(table, None)
+
+
+def cache_stats():
+    """Cache hit ratio, entry count and approximate memory footprint."""
+    return jsonify(get_cache().stats())
+
+
+def init_app(app):
+    app.extensions['cache'] = Cache(
+        max_entries=app.config['CACHE_MAX_ENTRIES'],
+        ttl=app.config['CACHE_TTL'],
+    )
+    if app.config['STATS_ENDPOINTS']:
+        app.add_url_rule('/_cache', 'cache_stats', cache_stats)
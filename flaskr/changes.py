@@ -0,0 +1,96 @@
+# Long-poll change notifications for dashboards. A client names the tables it
+# shows and passes the token from its previous response; the request returns
+# as soon as one of those tables' table_versions counters moves, or after
+# ``timeout`` seconds with the token unchanged. Polling reads only
+# table_versions and holds a pooled connection just for that read. Under the
+# threaded server every waiting client holds a thread and polls on its own;
+# the ASGI adapter (flaskr.asgi) serves this endpoint natively, with one
+# shared poll per interval and no thread per waiting client.
+
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+from flaskr.db import get_pool
+
+bp = Blueprint('changes', __name__)
+
+
+def parse_args(args, config):
+    """Read ``tables``, ``since`` and ``timeout`` from a query string mapping.
+
+    Raises ``ValueError`` for a missing table list or a bad timeout.
+    ``timeout`` defaults to CHANGES_TIMEOUT and is capped at
+    CHANGES_MAX_TIMEOUT.
+    """
+    tables = sorted({name.strip() for name in args.get('tables', '').split(',') if name.strip()})
+    if not tables:
+        raise ValueError('tables is required')
+    try:
+        timeout = float(args.get('timeout', config['CHANGES_TIMEOUT']))
+    except ValueError:
+        raise ValueError('timeout must be a number')
+    if timeout < 0:
+        raise ValueError('timeout must not be negative')
+    return tables, args.get('since'), min(timeout, config['CHANGES_MAX_TIMEOUT'])
+
+
+def read_versions(app, tables=None):
+    """``{name: version}`` from ``table_versions``, for ``tables`` or every table."""
+    pool = get_pool(app)
+    db = pool.acquire()
+    try:
+        if tables is None:
+            rows = db.execute('SELECT name, version FROM table_versions')
+        else:
+            placeholders = ', '.join('?' for _ in tables)
+            rows = db.execute(
+                f'SELECT name, version FROM table_versions WHERE name IN ({placeholders})', tuple(tables)
+            )
+        return dict(rows.fetchall())
+    finally:
+        pool.release(db)
+
+
+def token(versions, tables):
+    """``(token, versions)`` of ``tables`` out of a ``read_versions`` result.
+
+    Raises ``ValueError`` if a table has no change counter.
+    """
+    unknown = [name for name in tables if name not in versions]
+    if unknown:
+        raise ValueError(f'unknown tables: {", ".join(unknown)}')
+    return ';'.join(f'{name}:{versions[name]}' for name in tables), {name: versions[name] for name in tables}
+
+
+def poll(app, tables):
+    """Current ``(token, versions)`` of ``tables``."""
+    return token(read_versions(app, tables), tables)
+
+
+def payload(since, token, versions):
+    return {'changed': token != since, 'token': token, 'versions': versions}
+
+
+def wait(app, tables, since, timeout):
+    """Block until ``tables`` move away from ``since`` or ``timeout`` passes."""
+    deadline = time.monotonic() + timeout
+    interval = app.config['CHANGES_POLL_INTERVAL']
+    while True:
+        token, versions = poll(app, tables)
+        remaining = deadline - time.monotonic()
+        if token != since or remaining <= 0:
+            return payload(since, token, versions)
+        time.sleep(min(interval, remaining))
+
+
+@bp.route('/changes')
+def changes():
+    """Long-poll for writes to ``tables`` since ``since``."""
+    app = current_app._get_current_object()
+    try:
+        tables, since, timeout = parse_args(request.args, app.config)
+        return jsonify(wait(app, tables, since, timeout))
+    except ValueError as e:
+        # same body as the ASGI adapter's native handler
+        return jsonify({'error': str(e)}), 400
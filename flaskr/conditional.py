@@ -0,0 +1,72 @@
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, g, make_response, request
+from flaskr.db import get_db
+
+
+def resource_version(tables):
+    """Return ``(etag, last_modified)`` for a resource built from ``tables``.
+
+    Both come from the per-table change counters in ``table_versions``
+    (bumped by triggers on every write), so computing them never touches
+    the tables themselves.  Returns ``(None, None)`` if a table has no
+    counter, e.g. on a database that has not been migrated yet.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    rows = get_db().execute(
+        'SELECT name, version, CAST(strftime(\'%s\', updated_at) AS INTEGER) AS updated'
+        f' FROM table_versions WHERE name IN ({placeholders})',
+        tuple(tables)
+    ).fetchall()
+    if len(rows) != len(set(tables)):
+        return None, None
+    # the cache keys this request's bodies on the same counters
+    g.setdefault('table_versions', {}).update((row['name'], row['version']) for row in rows)
+
+    token = ';'.join(f'{row["name"]}:{row["version"]}' for row in sorted(rows, key=lambda r: r['name']))
+    etag = hashlib.blake2b(f'{request.full_path}|{token}'.encode('utf8'), digest_size=12).hexdigest()
+    last_modified = datetime.fromtimestamp(max(row['updated'] for row in rows), timezone.utc)
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(*tables):
+    """Answer conditional GETs for a view with ``304 Not Modified``.
+
+    The resource's version token is checked before the view runs, so a
+    client that already has the current representation is answered
+    without any of the view's queries.  Successful responses carry the
+    ``ETag`` and ``Last-Modified`` headers, plus ``Cache-Control: no-cache``
+    so clients revalidate instead of guessing freshness.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            etag, last_modified = resource_version(tables)
+            if etag is None:
+                return view(*args, **kwargs)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapped
+    return decorator
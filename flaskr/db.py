@@ -1,17 +1,144 @@
+import os
+import re
 import sqlite3
+import threading
+import queue
 from datetime import datetime
 
 import click
-from flask import current_app, g
+from flask import current_app, g, jsonify
+
+from flaskr.cache import get_cache
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection became free within the timeout."""
+
+
+def connect(database, cache_size=-16000, mmap_size=268435456):
+    """Open a connection with the per-connection PRAGMAs applied."""
+    conn = sqlite3.connect(
+        database,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = {int(cache_size)}')
+    conn.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+class ConnectionPool:
+    """Thread-safe pool of warm SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed back out in
+    LIFO order so the most recently used (and most cache-warm) connection
+    is reused first.  Every connection has the per-connection PRAGMAs
+    applied once, when it is opened.
+    """
+
+    def __init__(self, database, size=8, timeout=5.0, cache_size=-16000,
+                 mmap_size=268435456):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def _connect(self):
+        return connect(self.database, self.cache_size, self.mmap_size)
+
+    def acquire(self):
+        """Return a connection, opening a new one or waiting if needed."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            with self._lock:
+                self.hits += 1
+            return conn
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(
+                f'no database connection available after {self.timeout}s'
+            )
+
+    def release(self, conn):
+        """Hand a connection back, discarding any unfinished transaction."""
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._opened,
+                'idle': self._idle.qsize(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+            }
+
+
+def get_pool(app=None):
+    app = app or current_app
+    return app.extensions['db_pool']
 
 
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        db = get_pool().acquire()
+        profiler = current_app.extensions.get('profiler')
+        g.db = profiler.wrap(db) if profiler is not None else db
 
     return g.db
 
@@ -20,15 +147,82 @@ def close_db(e=None):
     db = g.pop('db', None)
 
     if db is not None:
-        db.close()
+        profiler = current_app.extensions.get('profiler')
+        if profiler is not None:
+            db = profiler.unwrap(db)
+        get_pool().release(db)
+
+
+def _drop_all(db):
+    """Drop every table and view, including ones added by migrations."""
+    objects = db.execute(
+        "SELECT type, name FROM sqlite_master"
+        " WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        " ORDER BY sql LIKE 'CREATE VIRTUAL%' DESC"
+    ).fetchall()
+    for obj in objects:
+        db.execute(f'DROP {obj["type"].upper()} IF EXISTS "{obj["name"]}"')
+    db.commit()
 
 
 def init_db():
     db = get_db()
+    _drop_all(db)
 
     with current_app.open_resource('schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
 
+    db.execute('PRAGMA user_version = 0')
+    migrate_db()
+    get_cache().clear()
+
+
+def get_migrations():
+    """Return the bundled migrations as a sorted list of (version, filename)."""
+    migrations_dir = os.path.join(current_app.root_path, 'migrations')
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = re.match(r'^(\d+)_\w+\.sql$', filename)
+        if match:
+            migrations.append((int(match.group(1)), filename))
+    return sorted(migrations)
+
+
+def schema_version(db=None):
+    db = db or get_db()
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate_db():
+    """Apply every migration newer than PRAGMA user_version, in order.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed migration leaves the database at the
+    previous version.  Returns the list of versions applied.
+    """
+    db = get_db()
+    current = schema_version(db)
+    applied = []
+
+    for version, filename in get_migrations():
+        if version <= current:
+            continue
+        with current_app.open_resource(os.path.join('migrations', filename)) as f:
+            sql = f.read().decode('utf8')
+        try:
+            db.executescript(
+                f'BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;'
+            )
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.rollback()
+            raise
+        applied.append(version)
+
+    if applied:
+        get_cache().clear()
+    return applied
+
 
 @click.command('init-db')
 def init_db_command():
@@ -37,6 +231,45 @@ def init_db_command():
     click.echo('Initialized the database.')
 
 
+@click.command('migrate-db')
+def migrate_db_command():
+    """Apply pending schema migrations without touching existing data."""
+    before = schema_version()
+    try:
+        applied = migrate_db()
+    except sqlite3.Error as e:
+        raise click.ClickException(f'Migration failed; the database is at version {schema_version()}. {e}')
+    if applied:
+        click.echo(f'Migrated database from version {before} to {applied[-1]}.')
+    else:
+        click.echo(f'Database is up to date (version {before}).')
+
+
+def pool_stats():
+    """Connection pool counters, for sizing DATABASE_POOL_SIZE."""
+    return jsonify(get_pool().stats())
+
+
+def reset_pool(app):
+    """Give ``app`` a fresh, empty connection pool.
+
+    Called in a forked worker: SQLite connections must not be carried
+    across ``fork()``, so the parent closes its pool before forking and
+    each child opens its own connections from here on.
+    """
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE'],
+        size=app.config['DATABASE_POOL_SIZE'],
+        timeout=app.config['DATABASE_POOL_TIMEOUT'],
+        cache_size=app.config['DATABASE_CACHE_SIZE'],
+        mmap_size=app.config['DATABASE_MMAP_SIZE'],
+    )
+
+
 def init_app(app):
+    reset_pool(app)
     app.teardown_appcontext(close_db)
-    app.cli.add_command(init_db_command)
\ No newline at end of file
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
+    if app.config['STATS_ENDPOINTS']:
+        app.add_url_rule('/_pool', 'pool_stats', pool_stats)
@@ -0,0 +1,120 @@
+# Season leaderboards. The top LEADERS_SIZE players of every season for each
+# stat in LEADER_STATS are materialized in player_leaders, which triggers on
+# player_stats keep current (migration 008), so a leaderboard is an index
+# range read of at most LEADERS_SIZE rows. The functions here read it and
+# rebuild or check it against player_stats.
+
+import click
+
+from flaskr.cache import invalidate
+from flaskr.db import get_db
+
+# keep in sync with migrations/008_player_leaders.sql
+LEADER_STATS = ('goals', 'assists', 'points', 'wins', 'save_percentage')
+
+LEADERS_SIZE = 50
+
+
+def _top_sql(stat):
+    return (
+        f"SELECT season, '{stat}' as stat, player_id, {stat} as value FROM ("
+        f' SELECT season, player_id, {stat},'
+        f' ROW_NUMBER() OVER (PARTITION BY season ORDER BY {stat} DESC, player_id) as position'
+        f' FROM player_stats WHERE {stat} IS NOT NULL'
+        f') WHERE position <= {LEADERS_SIZE}'
+    )
+
+
+def latest_season(db):
+    """The most recent season with leaders, or None."""
+    return db.execute('SELECT max(season) FROM player_leaders').fetchone()[0]
+
+
+def leaders(db, season, stat, limit=10):
+    """The top ``limit`` players of ``season`` by ``stat``, as dicts with ``rank``.
+
+    ``stat`` must be one of ``LEADER_STATS`` and ``limit`` at most
+    ``LEADERS_SIZE``.  Tied players share a rank.
+    """
+    if stat not in LEADER_STATS:
+        raise ValueError(f'no leaderboard for {stat!r}')
+    rows = [dict(row) for row in db.execute(
+        'SELECT p.id, p.name, p.position, t.abbreviation, l.value'
+        ' FROM player_leaders l'
+        ' JOIN players p ON p.id = l.player_id'
+        ' LEFT JOIN nhl_teams t ON t.id = p.team_id'
+        ' WHERE l.season = ? AND l.stat = ?'
+        ' ORDER BY l.value DESC, l.player_id LIMIT ?',
+        (season, stat, min(limit, LEADERS_SIZE))
+    )]
+    for position, row in enumerate(rows):
+        if position == 0 or row['value'] != rows[position - 1]['value']:
+            rank = position + 1
+        row['rank'] = rank
+    return rows
+
+
+def rebuild_leaders(db):
+    """Recreate ``player_leaders`` from ``player_stats``; the caller commits.
+
+    Returns the number of rows written.
+    """
+    db.execute('DELETE FROM player_leaders')
+    seasons = [row[0] for row in db.execute('SELECT DISTINCT season FROM player_stats')]
+    # one list at a time: a LIMIT read of the (season, stat) index instead
+    # of sorting every season's lines in a window
+    return sum(
+        db.execute(
+            'INSERT INTO player_leaders (season, stat, player_id, value)'
+            f" SELECT season, '{stat}', player_id, {stat} FROM player_stats"
+            f' WHERE season = ? AND {stat} IS NOT NULL'
+            f' ORDER BY {stat} DESC, player_id LIMIT {LEADERS_SIZE}',
+            (season,)
+        ).rowcount
+        for stat in LEADER_STATS for season in seasons
+    )
+
+
+def check_leaders(db):
+    """Compare ``player_leaders`` with a full recompute.
+
+    Returns the ``(season, stat)`` lists that differ, sorted; an empty list
+    means the table is consistent.
+    """
+    def lists(rows):
+        result = {}
+        for season, stat, player_id, value in rows:
+            result.setdefault((season, stat), set()).add((player_id, value))
+        return result
+
+    stored = lists(db.execute('SELECT season, stat, player_id, value FROM player_leaders'))
+    expected = lists(db.execute(' UNION ALL '.join(_top_sql(stat) for stat in LEADER_STATS)))
+    return sorted(key for key in stored.keys() | expected.keys() if stored.get(key) != expected.get(key))
+
+
+@click.command('rebuild-leaders')
+def rebuild_leaders_command():
+    """Recompute every season's leaderboards into player_leaders."""
+    db = get_db()
+    count = rebuild_leaders(db)
+    db.commit()
+    invalidate('player_leaders')
+    click.echo(f'Rebuilt {count} leaderboard rows.')
+
+
+@click.command('check-leaders')
+def check_leaders_command():
+    """Compare player_leaders with a full recompute."""
+    mismatches = check_leaders(get_db())
+    for season, stat in mismatches:
+        click.echo(f'  {season} {stat}')
+    if mismatches:
+        raise click.ClickException(
+            f'{len(mismatches)} leaderboards out of date; run `flask rebuild-leaders`.'
+        )
+    click.echo('Leaderboards are consistent.')
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_leaders_command)
+    app.cli.add_command(check_leaders_command)
@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, abort, current_app, jsonify, request, stream_template
+from flaskr import queries, rosters
+from flaskr.cache import invalidate
+from flaskr.conditional import conditional
 from flaskr.db import get_db
+from flaskr.streaming import json_array_response
+from flaskr.writes import WriteBusy, write
 
 bp = Blueprint('leagues', __name__, url_prefix='/leagues')
 
 
 @bp.route('/')
+@conditional('fantasy_leagues', 'users')
 def index():
     """Show all fantasy leagues."""
     db = get_db()
@@ -13,129 +19,35 @@ def index():
         ' FROM fantasy_leagues fl'
         ' JOIN users u ON fl.commissioner_id = u.id'
         ' ORDER BY fl.created_at DESC'
-    ).fetchall()
+    )
 
-    html = '<h1>Fantasy Leagues</h1>'
-
-    if leagues:
-        html += '<ul>'
-        for league in leagues:
-            html += f'<li><a href="/leagues/{league["id"]}">{league["name"]} (Commissioner: {league["commissioner_name"]})</a></li>'
-        html += '</ul>'
-    else:
-        html += '<p>No fantasy leagues found</p>'
-
-    html += '<a href="/">Back to Home</a>'
-    return html
+    return stream_template('leagues.html', leagues=leagues)
 
 
 @bp.route('/<int:id>')
+@conditional('fantasy_leagues', 'users', 'fantasy_teams', 'fantasy_standings')
 def detail(id):
     """Show details for a specific fantasy league."""
-    db = get_db()
-    league = db.execute(
-        'SELECT fl.*, u.username as commissioner_name'
-        ' FROM fantasy_leagues fl'
-        ' JOIN users u ON fl.commissioner_id = u.id'
-        ' WHERE fl.id = ?',
-        (id,)
-    ).fetchone()
-
+    league = queries.league_detail(get_db(), id)
     if league is None:
         return "League not found", 404
 
-    # Get teams in this league
-    teams = db.execute(
-        'SELECT ft.*, u.username as owner_name'
-        ' FROM fantasy_teams ft'
-        ' JOIN users u ON ft.owner_id = u.id'
-        ' WHERE ft.league_id = ?'
-        ' ORDER BY ft.name',
-        (id,)
-    ).fetchall()
-
-    html = f'''
-    <h1>{league["name"]}</h1>
-    <p><strong>Commissioner:</strong> {league["commissioner_name"]}</p>
-    <p><strong>Max Teams:</strong> {league["max_teams"]}</p>
-    <p><strong>Scoring System:</strong> {league["scoring_system"]}</p>
-    <p><strong>Season:</strong> {league["season"]}</p>
-    <p><strong>Created:</strong> {league["created_at"]}</p>
-
-    <h2>Teams ({len(teams)}/{league["max_teams"]})</h2>
-    '''
-
-    if teams:
-        html += '<ul>'
-        for team in teams:
-            html += f'<li><a href="/leagues/{id}/teams/{team["id"]}">{team["name"]} (Owner: {team["owner_name"]})</a></li>'
-        html += '</ul>'
-    else:
-        html += '<p>No teams in this league yet</p>'
-
-    html += '<br><a href="/leagues">Back to Leagues</a> | <a href="/">Home</a>'
-    return html
+    return stream_template('league_detail.html', league=league, teams=league['teams'])
 
 
 @bp.route('/<int:league_id>/teams/<int:team_id>')
+@conditional('fantasy_teams', 'users', 'fantasy_leagues', 'fantasy_team_players', 'players', 'nhl_teams')
 def team_detail(league_id, team_id):
     """Show details for a specific fantasy team."""
-    db = get_db()
-
-    # Get team info
-    team = db.execute(
-        'SELECT ft.*, u.username as owner_name, fl.name as league_name'
-        ' FROM fantasy_teams ft'
-        ' JOIN users u ON ft.owner_id = u.id'
-        ' JOIN fantasy_leagues fl ON ft.league_id = fl.id'
-        ' WHERE ft.id = ? AND ft.league_id = ?',
-        (team_id, league_id)
-    ).fetchone()
-
+    team = queries.fantasy_team_detail(get_db(), league_id, team_id)
     if team is None:
         return "Team not found", 404
 
-    # Get team roster
-    roster = db.execute(
-        'SELECT ftp.position_type, p.name, p.position, t.abbreviation as team_abbr'
-        ' FROM fantasy_team_players ftp'
-        ' JOIN players p ON ftp.player_id = p.id'
-        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
-        ' WHERE ftp.fantasy_team_id = ?'
-        ' ORDER BY ftp.position_type, p.position, p.name',
-        (team_id,)
-    ).fetchall()
-
-    html = f'''
-    <h1>{team["name"]}</h1>
-    <p><strong>Owner:</strong> {team["owner_name"]}</p>
-    <p><strong>League:</strong> <a href="/leagues/{league_id}">{team["league_name"]}</a></p>
-
-    <h2>Roster</h2>
-    '''
-
-    if roster:
-        # Group by position type
-        position_types = {}
-        for player in roster:
-            pos_type = player['position_type']
-            if pos_type not in position_types:
-                position_types[pos_type] = []
-            position_types[pos_type].append(player)
-
-        for pos_type, players in position_types.items():
-            html += f'<h3>{pos_type.title()}</h3><ul>'
-            for player in players:
-                html += f'<li>{player["name"]} ({player["position"]}) - {player["team_abbr"] or "FA"}</li>'
-            html += '</ul>'
-    else:
-        html += '<p>No players on roster</p>'
-
-    html += f'<br><a href="/leagues/{league_id}">Back to League</a> | <a href="/leagues">Back to Leagues</a> | <a href="/">Home</a>'
-    return html
+    return stream_template('team_detail.html', team=team, roster=team['roster'])
 
 
 @bp.route('/api')
+@conditional('fantasy_leagues', 'users')
 def api():
     """API endpoint for leagues data."""
     db = get_db()
@@ -144,6 +56,74 @@ def api():
         ' FROM fantasy_leagues fl'
         ' JOIN users u ON fl.commissioner_id = u.id'
         ' ORDER BY fl.created_at DESC'
-    ).fetchall()
+    )
+
+    return json_array_response(leagues)
+
+
+# -- roster writes (flaskr.rosters) -------------------------------------------
+
+ROSTER_TABLES = ('fantasy_teams', 'fantasy_team_players', 'fantasy_standings')
 
-    return jsonify([dict(league) for league in leagues])
+LEAGUE_TABLES = ('fantasy_leagues',)
+
+
+@bp.errorhandler(rosters.RosterError)
+def roster_error(e):
+    return jsonify({'error': str(e), **e.details}), e.status
+
+
+@bp.errorhandler(WriteBusy)
+def write_busy(e):
+    return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+
+
+def _json_object():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise rosters.RosterError('expected a JSON object')
+    return data
+
+
+@bp.route('/', methods=['POST'])
+def create_league():
+    """Create a league: ``{"name", "commissioner_id", "season"}``, optionally ``max_teams``."""
+    data = _json_object()
+    league = write(lambda db: rosters.create_league(
+        db, data.get('name'), data.get('commissioner_id'), data.get('season'),
+        max_teams=data.get('max_teams', 12), scoring_system=data.get('scoring_system', 'standard'),
+    ))
+    invalidate(*LEAGUE_TABLES)
+    return jsonify(league), 201
+
+
+@bp.route('/<int:league_id>/teams', methods=['POST'])
+def create_team(league_id):
+    """Add a team to a league: ``{"name": ..., "owner_id": ...}``."""
+    data = _json_object()
+    team = write(lambda db: rosters.create_team(db, league_id, data.get('name'), data.get('owner_id')))
+    invalidate(*ROSTER_TABLES)
+    return jsonify(team), 201
+
+
+@bp.route('/<int:league_id>/teams/<int:team_id>/roster')
+@conditional('fantasy_teams', 'fantasy_team_players')
+def roster(league_id, team_id):
+    """A team's roster and the roster_version to send with moves."""
+    team = rosters.team_roster(get_db(), league_id, team_id)
+    if team is None:
+        abort(404)
+    return jsonify(team)
+
+
+@bp.route('/<int:league_id>/teams/<int:team_id>/roster', methods=['POST'])
+def roster_moves(league_id, team_id):
+    """Add, drop and move players in one transaction (see ``rosters.parse_moves``)."""
+    version, add, drop, move = rosters.parse_moves(request.get_json(silent=True))
+    roster_size = current_app.config['ROSTER_SIZE']
+    max_starters = current_app.config['ROSTER_STARTERS']
+    team = write(lambda db: rosters.apply_moves(
+        db, league_id, team_id, version, add, drop, move, roster_size=roster_size, max_starters=max_starters,
+    ))
+    invalidate(*ROSTER_TABLES)
+    return jsonify(team)
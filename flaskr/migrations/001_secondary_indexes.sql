@@ -0,0 +1,25 @@
+-- Secondary indexes for the hot lookups in the players, teams and leagues
+-- blueprints. Each one is ordered so the query's WHERE and ORDER BY are both
+-- served by the index (no temp B-tree for sorting).
+
+-- players.index / players.api: ORDER BY name
+CREATE INDEX IF NOT EXISTS idx_players_name ON players (name, id);
+
+-- teams.detail roster: WHERE team_id = ? ORDER BY position, name
+CREATE INDEX IF NOT EXISTS idx_players_team ON players (team_id, position, name);
+
+-- players.detail stats: WHERE player_id = ? ORDER BY season DESC
+CREATE INDEX IF NOT EXISTS idx_player_stats_player ON player_stats (player_id, season);
+
+-- leagues.detail teams: WHERE league_id = ? ORDER BY name
+CREATE INDEX IF NOT EXISTS idx_fantasy_teams_league ON fantasy_teams (league_id, name);
+
+-- owner lookups (owner_name joins, "my teams")
+CREATE INDEX IF NOT EXISTS idx_fantasy_teams_owner ON fantasy_teams (owner_id);
+
+-- which fantasy teams roster a player (the UNIQUE(fantasy_team_id, player_id)
+-- index already covers lookups by fantasy_team_id)
+CREATE INDEX IF NOT EXISTS idx_fantasy_team_players_player ON fantasy_team_players (player_id, fantasy_team_id);
+
+-- leagues.index / leagues.api: ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_fantasy_leagues_created ON fantasy_leagues (created_at);
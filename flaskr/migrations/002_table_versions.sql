@@ -0,0 +1,116 @@
+-- Per-table change counters. Every insert, update or delete bumps the
+-- table's version and updated_at, giving HTTP conditional GETs (ETag /
+-- Last-Modified) a version token that costs one primary key lookup per table.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_versions (name) VALUES
+    ('nhl_teams'),
+    ('players'),
+    ('player_stats'),
+    ('users'),
+    ('fantasy_leagues'),
+    ('fantasy_teams'),
+    ('fantasy_team_players');
+
+-- nhl_teams
+CREATE TRIGGER IF NOT EXISTS nhl_teams_version_insert AFTER INSERT ON nhl_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'nhl_teams';
+END;
+CREATE TRIGGER IF NOT EXISTS nhl_teams_version_update AFTER UPDATE ON nhl_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'nhl_teams';
+END;
+CREATE TRIGGER IF NOT EXISTS nhl_teams_version_delete AFTER DELETE ON nhl_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'nhl_teams';
+END;
+
+-- players
+CREATE TRIGGER IF NOT EXISTS players_version_insert AFTER INSERT ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'players';
+END;
+CREATE TRIGGER IF NOT EXISTS players_version_update AFTER UPDATE ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'players';
+END;
+CREATE TRIGGER IF NOT EXISTS players_version_delete AFTER DELETE ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'players';
+END;
+
+-- player_stats
+CREATE TRIGGER IF NOT EXISTS player_stats_version_insert AFTER INSERT ON player_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_stats';
+END;
+CREATE TRIGGER IF NOT EXISTS player_stats_version_update AFTER UPDATE ON player_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_stats';
+END;
+CREATE TRIGGER IF NOT EXISTS player_stats_version_delete AFTER DELETE ON player_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_stats';
+END;
+
+-- users
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'users';
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'users';
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'users';
+END;
+
+-- fantasy_leagues
+CREATE TRIGGER IF NOT EXISTS fantasy_leagues_version_insert AFTER INSERT ON fantasy_leagues
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_leagues';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_leagues_version_update AFTER UPDATE ON fantasy_leagues
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_leagues';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_leagues_version_delete AFTER DELETE ON fantasy_leagues
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_leagues';
+END;
+
+-- fantasy_teams
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_version_insert AFTER INSERT ON fantasy_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_teams';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_version_update AFTER UPDATE ON fantasy_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_teams';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_version_delete AFTER DELETE ON fantasy_teams
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_teams';
+END;
+
+-- fantasy_team_players
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_version_insert AFTER INSERT ON fantasy_team_players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_team_players';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_version_update AFTER UPDATE ON fantasy_team_players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_team_players';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_version_delete AFTER DELETE ON fantasy_team_players
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_team_players';
+END;
@@ -0,0 +1,170 @@
+-- Per-game stat lines. Season totals in player_stats are maintained
+-- incrementally from them by the triggers below, so player pages keep
+-- reading one row per season no matter how many games were played.
+--
+-- A season should be loaded either as games or as a season total row, not
+-- both: game lines are added on top of whatever player_stats already holds.
+
+-- goalie totals needed to derive save_percentage and goals_against_average
+ALTER TABLE player_stats ADD COLUMN goals_against INTEGER DEFAULT 0;
+ALTER TABLE player_stats ADD COLUMN minutes REAL DEFAULT 0.0;
+
+-- one season row per player; the upserts below conflict on it. Older
+-- databases could hold several rows for a player and season (a traded
+-- player entered once per team, say). They cannot be merged safely here
+-- (rate stats don't add up), so the migration stops and names them.
+CREATE TEMP TABLE player_stats_duplicates (rows INTEGER);
+CREATE TEMP TRIGGER player_stats_duplicates_check BEFORE INSERT ON player_stats_duplicates
+WHEN NEW.rows > 0
+BEGIN
+    SELECT RAISE(ABORT, 'player_stats has several rows for the same (player_id, season); merge or delete them, then run flask migrate-db again');
+END;
+INSERT INTO player_stats_duplicates
+SELECT count(*) FROM (SELECT 1 FROM player_stats GROUP BY player_id, season HAVING count(*) > 1);
+DROP TABLE player_stats_duplicates;
+
+DROP INDEX IF EXISTS idx_player_stats_player;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_player_stats_season ON player_stats (player_id, season);
+
+CREATE TABLE IF NOT EXISTS player_game_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id INTEGER NOT NULL,
+    season TEXT NOT NULL,
+    game_date DATE NOT NULL,
+    goals INTEGER DEFAULT 0,
+    assists INTEGER DEFAULT 0,
+    plus_minus INTEGER DEFAULT 0,
+    penalty_minutes INTEGER DEFAULT 0,
+    -- Goalie specific stats
+    decision TEXT CHECK (decision IN ('W', 'L', 'OTL')),
+    saves INTEGER DEFAULT 0,
+    goals_against INTEGER DEFAULT 0,
+    minutes REAL DEFAULT 0.0,
+    shutout INTEGER DEFAULT 0,
+    FOREIGN KEY (player_id) REFERENCES players (id),
+    UNIQUE(player_id, game_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_player_game_stats_season ON player_game_stats (season, player_id);
+
+-- Add a game line to its season row (creating the row if needed) ...
+CREATE TRIGGER IF NOT EXISTS player_game_stats_aggregate_insert AFTER INSERT ON player_game_stats
+BEGIN
+    INSERT INTO player_stats
+        (player_id, season, games_played, goals, assists, points, plus_minus, penalty_minutes,
+         wins, losses, saves, goals_against, minutes, shutouts)
+    VALUES
+        (NEW.player_id, NEW.season, 1, NEW.goals, NEW.assists, NEW.goals + NEW.assists,
+         NEW.plus_minus, NEW.penalty_minutes, NEW.decision IS 'W', NEW.decision IS 'L',
+         NEW.saves, NEW.goals_against, NEW.minutes, NEW.shutout)
+    ON CONFLICT (player_id, season) DO UPDATE SET
+        games_played = games_played + 1,
+        goals = goals + excluded.goals,
+        assists = assists + excluded.assists,
+        points = points + excluded.points,
+        plus_minus = plus_minus + excluded.plus_minus,
+        penalty_minutes = penalty_minutes + excluded.penalty_minutes,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        saves = saves + excluded.saves,
+        goals_against = goals_against + excluded.goals_against,
+        minutes = minutes + excluded.minutes,
+        shutouts = shutouts + excluded.shutouts;
+
+    UPDATE player_stats SET
+        save_percentage = CASE WHEN saves + goals_against > 0
+                               THEN CAST(saves AS REAL) / (saves + goals_against) ELSE 0.0 END,
+        goals_against_average = CASE WHEN minutes > 0
+                                     THEN goals_against * 60.0 / minutes ELSE 0.0 END
+    WHERE player_id = NEW.player_id AND season = NEW.season;
+END;
+
+-- ... take it back out when the line is deleted ...
+CREATE TRIGGER IF NOT EXISTS player_game_stats_aggregate_delete AFTER DELETE ON player_game_stats
+BEGIN
+    UPDATE player_stats SET
+        games_played = games_played - 1,
+        goals = goals - OLD.goals,
+        assists = assists - OLD.assists,
+        points = points - (OLD.goals + OLD.assists),
+        plus_minus = plus_minus - OLD.plus_minus,
+        penalty_minutes = penalty_minutes - OLD.penalty_minutes,
+        wins = wins - (OLD.decision IS 'W'),
+        losses = losses - (OLD.decision IS 'L'),
+        saves = saves - OLD.saves,
+        goals_against = goals_against - OLD.goals_against,
+        minutes = minutes - OLD.minutes,
+        shutouts = shutouts - OLD.shutout
+    WHERE player_id = OLD.player_id AND season = OLD.season;
+
+    UPDATE player_stats SET
+        save_percentage = CASE WHEN saves + goals_against > 0
+                               THEN CAST(saves AS REAL) / (saves + goals_against) ELSE 0.0 END,
+        goals_against_average = CASE WHEN minutes > 0
+                                     THEN goals_against * 60.0 / minutes ELSE 0.0 END
+    WHERE player_id = OLD.player_id AND season = OLD.season;
+END;
+
+-- ... and apply corrections as the difference between the old and new line.
+CREATE TRIGGER IF NOT EXISTS player_game_stats_aggregate_update AFTER UPDATE ON player_game_stats
+BEGIN
+    UPDATE player_stats SET
+        games_played = games_played - 1,
+        goals = goals - OLD.goals,
+        assists = assists - OLD.assists,
+        points = points - (OLD.goals + OLD.assists),
+        plus_minus = plus_minus - OLD.plus_minus,
+        penalty_minutes = penalty_minutes - OLD.penalty_minutes,
+        wins = wins - (OLD.decision IS 'W'),
+        losses = losses - (OLD.decision IS 'L'),
+        saves = saves - OLD.saves,
+        goals_against = goals_against - OLD.goals_against,
+        minutes = minutes - OLD.minutes,
+        shutouts = shutouts - OLD.shutout
+    WHERE player_id = OLD.player_id AND season = OLD.season;
+
+    INSERT INTO player_stats
+        (player_id, season, games_played, goals, assists, points, plus_minus, penalty_minutes,
+         wins, losses, saves, goals_against, minutes, shutouts)
+    VALUES
+        (NEW.player_id, NEW.season, 1, NEW.goals, NEW.assists, NEW.goals + NEW.assists,
+         NEW.plus_minus, NEW.penalty_minutes, NEW.decision IS 'W', NEW.decision IS 'L',
+         NEW.saves, NEW.goals_against, NEW.minutes, NEW.shutout)
+    ON CONFLICT (player_id, season) DO UPDATE SET
+        games_played = games_played + 1,
+        goals = goals + excluded.goals,
+        assists = assists + excluded.assists,
+        points = points + excluded.points,
+        plus_minus = plus_minus + excluded.plus_minus,
+        penalty_minutes = penalty_minutes + excluded.penalty_minutes,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        saves = saves + excluded.saves,
+        goals_against = goals_against + excluded.goals_against,
+        minutes = minutes + excluded.minutes,
+        shutouts = shutouts + excluded.shutouts;
+
+    UPDATE player_stats SET
+        save_percentage = CASE WHEN saves + goals_against > 0
+                               THEN CAST(saves AS REAL) / (saves + goals_against) ELSE 0.0 END,
+        goals_against_average = CASE WHEN minutes > 0
+                                     THEN goals_against * 60.0 / minutes ELSE 0.0 END
+    WHERE (player_id = OLD.player_id AND season = OLD.season)
+       OR (player_id = NEW.player_id AND season = NEW.season);
+END;
+
+-- change counter for conditional GETs (see 002_table_versions.sql)
+INSERT OR IGNORE INTO table_versions (name) VALUES ('player_game_stats');
+
+CREATE TRIGGER IF NOT EXISTS player_game_stats_version_insert AFTER INSERT ON player_game_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_game_stats';
+END;
+CREATE TRIGGER IF NOT EXISTS player_game_stats_version_update AFTER UPDATE ON player_game_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_game_stats';
+END;
+CREATE TRIGGER IF NOT EXISTS player_game_stats_version_delete AFTER DELETE ON player_game_stats
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_game_stats';
+END;
@@ -0,0 +1,38 @@
+-- Fantasy scoring systems: one row of per-stat weights per system, looked up
+-- through fantasy_leagues.scoring_system. A rostered starter's fantasy points
+-- are the weighted sum of their season totals in player_stats.
+
+CREATE TABLE IF NOT EXISTS scoring_systems (
+    name TEXT PRIMARY KEY,
+    goals REAL NOT NULL DEFAULT 0,
+    assists REAL NOT NULL DEFAULT 0,
+    plus_minus REAL NOT NULL DEFAULT 0,
+    penalty_minutes REAL NOT NULL DEFAULT 0,
+    wins REAL NOT NULL DEFAULT 0,
+    losses REAL NOT NULL DEFAULT 0,
+    saves REAL NOT NULL DEFAULT 0,
+    goals_against REAL NOT NULL DEFAULT 0,
+    shutouts REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO scoring_systems
+    (name, goals, assists, plus_minus, penalty_minutes, wins, losses, saves, goals_against, shutouts)
+VALUES
+    ('standard', 2, 1, 0.5, 0.25, 3, -1, 0.1, -1, 2),
+    ('points', 1, 1, 0, 0, 0, 0, 0, 0, 0);
+
+-- change counter for conditional GETs (see 002_table_versions.sql)
+INSERT OR IGNORE INTO table_versions (name) VALUES ('scoring_systems');
+
+CREATE TRIGGER IF NOT EXISTS scoring_systems_version_insert AFTER INSERT ON scoring_systems
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'scoring_systems';
+END;
+CREATE TRIGGER IF NOT EXISTS scoring_systems_version_update AFTER UPDATE ON scoring_systems
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'scoring_systems';
+END;
+CREATE TRIGGER IF NOT EXISTS scoring_systems_version_delete AFTER DELETE ON scoring_systems
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'scoring_systems';
+END;
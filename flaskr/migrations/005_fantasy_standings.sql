@@ -0,0 +1,404 @@
+-- Materialized league standings: one row per fantasy team holding its
+-- fantasy points (see flaskr/scoring.py), so league pages read a dozen rows
+-- instead of scoring every rostered player. The triggers below keep points
+-- current by applying deltas as season stats change and rosters move, and
+-- recompute the affected teams when a league's season or scoring system, or
+-- the weights themselves, change. Only starters score; keep 'starter' in sync
+-- with flaskr.scoring.SCORING_POSITIONS.
+--
+-- Ranks are not stored: ranking a league's rows in (league_id, points) order
+-- is cheap, while a stored rank would have to be rewritten across the whole
+-- league on every delta. `flask check-standings` compares this table with a
+-- full recompute and `flask rebuild-standings` recreates it.
+
+CREATE TABLE IF NOT EXISTS fantasy_standings (
+    league_id INTEGER NOT NULL,
+    fantasy_team_id INTEGER NOT NULL UNIQUE,
+    points REAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (league_id, fantasy_team_id),
+    FOREIGN KEY (league_id) REFERENCES fantasy_leagues (id),
+    FOREIGN KEY (fantasy_team_id) REFERENCES fantasy_teams (id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_fantasy_standings_points ON fantasy_standings (league_id, points DESC);
+
+INSERT OR IGNORE INTO fantasy_standings (league_id, fantasy_team_id) SELECT league_id, id FROM fantasy_teams;
+
+UPDATE fantasy_standings SET
+    points = (
+        SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                   + COALESCE(s.assists * w.assists, 0)
+                   + COALESCE(s.plus_minus * w.plus_minus, 0)
+                   + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                   + COALESCE(s.wins * w.wins, 0)
+                   + COALESCE(s.losses * w.losses, 0)
+                   + COALESCE(s.saves * w.saves, 0)
+                   + COALESCE(s.goals_against * w.goals_against, 0)
+                   + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+        FROM fantasy_team_players ftp
+        JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+        LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+        LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+        WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+    ),
+    updated_at = CURRENT_TIMESTAMP;
+
+-- season stat lines of rostered starters
+CREATE TRIGGER IF NOT EXISTS player_stats_standings_insert AFTER INSERT ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT (COALESCE(NEW.goals * w.goals, 0)
+                    + COALESCE(NEW.assists * w.assists, 0)
+                    + COALESCE(NEW.plus_minus * w.plus_minus, 0)
+                    + COALESCE(NEW.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(NEW.wins * w.wins, 0)
+                    + COALESCE(NEW.losses * w.losses, 0)
+                    + COALESCE(NEW.saves * w.saves, 0)
+                    + COALESCE(NEW.goals_against * w.goals_against, 0)
+                    + COALESCE(NEW.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = NEW.player_id AND ftp.position_type = 'starter' AND fl.season = NEW.season
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_standings_update AFTER UPDATE OF player_id, season, goals, assists, plus_minus, penalty_minutes, wins, losses, saves, goals_against, shutouts ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT (COALESCE(OLD.goals * w.goals, 0)
+                    + COALESCE(OLD.assists * w.assists, 0)
+                    + COALESCE(OLD.plus_minus * w.plus_minus, 0)
+                    + COALESCE(OLD.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(OLD.wins * w.wins, 0)
+                    + COALESCE(OLD.losses * w.losses, 0)
+                    + COALESCE(OLD.saves * w.saves, 0)
+                    + COALESCE(OLD.goals_against * w.goals_against, 0)
+                    + COALESCE(OLD.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = OLD.player_id AND ftp.position_type = 'starter' AND fl.season = OLD.season
+    );
+
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT (COALESCE(NEW.goals * w.goals, 0)
+                    + COALESCE(NEW.assists * w.assists, 0)
+                    + COALESCE(NEW.plus_minus * w.plus_minus, 0)
+                    + COALESCE(NEW.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(NEW.wins * w.wins, 0)
+                    + COALESCE(NEW.losses * w.losses, 0)
+                    + COALESCE(NEW.saves * w.saves, 0)
+                    + COALESCE(NEW.goals_against * w.goals_against, 0)
+                    + COALESCE(NEW.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = NEW.player_id AND ftp.position_type = 'starter' AND fl.season = NEW.season
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_standings_delete AFTER DELETE ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT (COALESCE(OLD.goals * w.goals, 0)
+                    + COALESCE(OLD.assists * w.assists, 0)
+                    + COALESCE(OLD.plus_minus * w.plus_minus, 0)
+                    + COALESCE(OLD.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(OLD.wins * w.wins, 0)
+                    + COALESCE(OLD.losses * w.losses, 0)
+                    + COALESCE(OLD.saves * w.saves, 0)
+                    + COALESCE(OLD.goals_against * w.goals_against, 0)
+                    + COALESCE(OLD.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = OLD.player_id AND ftp.position_type = 'starter' AND fl.season = OLD.season
+    );
+END;
+
+-- roster moves: adds, drops, and starter/bench changes
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_standings_insert AFTER INSERT ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT (COALESCE(s.goals * w.goals, 0)
+                    + COALESCE(s.assists * w.assists, 0)
+                    + COALESCE(s.plus_minus * w.plus_minus, 0)
+                    + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(s.wins * w.wins, 0)
+                    + COALESCE(s.losses * w.losses, 0)
+                    + COALESCE(s.saves * w.saves, 0)
+                    + COALESCE(s.goals_against * w.goals_against, 0)
+                    + COALESCE(s.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            JOIN player_stats s ON s.player_id = NEW.player_id AND s.season = fl.season
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.fantasy_team_id AND NEW.position_type = 'starter';
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_standings_update AFTER UPDATE OF fantasy_team_id, player_id, position_type ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT (COALESCE(s.goals * w.goals, 0)
+                    + COALESCE(s.assists * w.assists, 0)
+                    + COALESCE(s.plus_minus * w.plus_minus, 0)
+                    + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(s.wins * w.wins, 0)
+                    + COALESCE(s.losses * w.losses, 0)
+                    + COALESCE(s.saves * w.saves, 0)
+                    + COALESCE(s.goals_against * w.goals_against, 0)
+                    + COALESCE(s.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            JOIN player_stats s ON s.player_id = OLD.player_id AND s.season = fl.season
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = OLD.fantasy_team_id AND OLD.position_type = 'starter';
+
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT (COALESCE(s.goals * w.goals, 0)
+                    + COALESCE(s.assists * w.assists, 0)
+                    + COALESCE(s.plus_minus * w.plus_minus, 0)
+                    + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(s.wins * w.wins, 0)
+                    + COALESCE(s.losses * w.losses, 0)
+                    + COALESCE(s.saves * w.saves, 0)
+                    + COALESCE(s.goals_against * w.goals_against, 0)
+                    + COALESCE(s.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            JOIN player_stats s ON s.player_id = NEW.player_id AND s.season = fl.season
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.fantasy_team_id AND NEW.position_type = 'starter';
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_standings_delete AFTER DELETE ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT (COALESCE(s.goals * w.goals, 0)
+                    + COALESCE(s.assists * w.assists, 0)
+                    + COALESCE(s.plus_minus * w.plus_minus, 0)
+                    + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                    + COALESCE(s.wins * w.wins, 0)
+                    + COALESCE(s.losses * w.losses, 0)
+                    + COALESCE(s.saves * w.saves, 0)
+                    + COALESCE(s.goals_against * w.goals_against, 0)
+                    + COALESCE(s.shutouts * w.shutouts, 0))
+            FROM fantasy_leagues fl
+            JOIN scoring_systems w ON w.name = fl.scoring_system
+            JOIN player_stats s ON s.player_id = OLD.player_id AND s.season = fl.season
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = OLD.fantasy_team_id AND OLD.position_type = 'starter';
+END;
+
+-- teams joining, moving between or leaving leagues
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_standings_insert AFTER INSERT ON fantasy_teams
+BEGIN
+    INSERT OR IGNORE INTO fantasy_standings (league_id, fantasy_team_id) VALUES (NEW.league_id, NEW.id);
+
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_standings_update AFTER UPDATE OF id, league_id ON fantasy_teams
+BEGIN
+    DELETE FROM fantasy_standings WHERE fantasy_team_id = OLD.id;
+    INSERT INTO fantasy_standings (league_id, fantasy_team_id) VALUES (NEW.league_id, NEW.id);
+
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_teams_standings_delete AFTER DELETE ON fantasy_teams
+BEGIN
+    DELETE FROM fantasy_standings WHERE fantasy_team_id = OLD.id;
+END;
+
+-- a league changing season or scoring system
+CREATE TRIGGER IF NOT EXISTS fantasy_leagues_standings_update AFTER UPDATE OF season, scoring_system ON fantasy_leagues
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id = NEW.id;
+END;
+
+-- scoring weights being defined, changed or removed
+CREATE TRIGGER IF NOT EXISTS scoring_systems_standings_insert AFTER INSERT ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system = NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS scoring_systems_standings_update AFTER UPDATE ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system IN (OLD.name, NEW.name));
+END;
+
+CREATE TRIGGER IF NOT EXISTS scoring_systems_standings_delete AFTER DELETE ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM((COALESCE(s.goals * w.goals, 0)
+                       + COALESCE(s.assists * w.assists, 0)
+                       + COALESCE(s.plus_minus * w.plus_minus, 0)
+                       + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+                       + COALESCE(s.wins * w.wins, 0)
+                       + COALESCE(s.losses * w.losses, 0)
+                       + COALESCE(s.saves * w.saves, 0)
+                       + COALESCE(s.goals_against * w.goals_against, 0)
+                       + COALESCE(s.shutouts * w.shutouts, 0))), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            LEFT JOIN scoring_systems w ON w.name = fl.scoring_system
+            LEFT JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = fl.season
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system = OLD.name);
+END;
+
+-- change counter for conditional GETs (see 002_table_versions.sql)
+INSERT OR IGNORE INTO table_versions (name) VALUES ('fantasy_standings');
+
+CREATE TRIGGER IF NOT EXISTS fantasy_standings_version_insert AFTER INSERT ON fantasy_standings
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_standings';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_standings_version_update AFTER UPDATE ON fantasy_standings
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_standings';
+END;
+CREATE TRIGGER IF NOT EXISTS fantasy_standings_version_delete AFTER DELETE ON fantasy_standings
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'fantasy_standings';
+END;
@@ -0,0 +1,56 @@
+-- Full-text index over players for /players/search. Each row's rowid is the
+-- player's id; `team` holds the team's city, name and abbreviation so that
+-- "edm" or "oilers" finds Edmonton's players. prefix='1 2 3' keeps short
+-- type-ahead prefixes (the common case) as index lookups instead of scans
+-- over every term. The triggers below keep it in sync with players and
+-- nhl_teams.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS players_fts USING fts5(
+    name, team, position,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '1 2 3'
+);
+
+INSERT INTO players_fts (rowid, name, team, position)
+SELECT p.id, p.name, COALESCE(t.city || ' ' || t.name || ' ' || t.abbreviation, ''), p.position
+FROM players p
+LEFT JOIN nhl_teams t ON p.team_id = t.id
+WHERE p.id NOT IN (SELECT rowid FROM players_fts);
+
+CREATE TRIGGER IF NOT EXISTS players_fts_insert AFTER INSERT ON players
+BEGIN
+    INSERT INTO players_fts (rowid, name, team, position)
+    VALUES (
+        NEW.id, NEW.name,
+        COALESCE((SELECT city || ' ' || name || ' ' || abbreviation FROM nhl_teams WHERE id = NEW.team_id), ''),
+        NEW.position
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS players_fts_update AFTER UPDATE OF id, name, position, team_id ON players
+BEGIN
+    DELETE FROM players_fts WHERE rowid = OLD.id;
+    INSERT INTO players_fts (rowid, name, team, position)
+    VALUES (
+        NEW.id, NEW.name,
+        COALESCE((SELECT city || ' ' || name || ' ' || abbreviation FROM nhl_teams WHERE id = NEW.team_id), ''),
+        NEW.position
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS players_fts_delete AFTER DELETE ON players
+BEGIN
+    DELETE FROM players_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS nhl_teams_players_fts_update AFTER UPDATE OF city, name, abbreviation ON nhl_teams
+BEGIN
+    UPDATE players_fts SET team = NEW.city || ' ' || NEW.name || ' ' || NEW.abbreviation
+    WHERE rowid IN (SELECT id FROM players WHERE team_id = NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS nhl_teams_players_fts_delete AFTER DELETE ON nhl_teams
+BEGIN
+    UPDATE players_fts SET team = ''
+    WHERE rowid IN (SELECT id FROM players WHERE team_id = OLD.id);
+END;
@@ -0,0 +1,12 @@
+-- Indexes behind the filters and sorts of /players/api (see
+-- flaskr/player_query.py). Season stat filters and sorts start from
+-- player_stats: (season, stat) serves both `stat >= ?` thresholds and
+-- ORDER BY stat within a season.
+
+CREATE INDEX IF NOT EXISTS idx_players_position ON players (position, name);
+
+CREATE INDEX IF NOT EXISTS idx_player_stats_goals ON player_stats (season, goals);
+CREATE INDEX IF NOT EXISTS idx_player_stats_assists ON player_stats (season, assists);
+CREATE INDEX IF NOT EXISTS idx_player_stats_points ON player_stats (season, points);
+CREATE INDEX IF NOT EXISTS idx_player_stats_wins ON player_stats (season, wins);
+CREATE INDEX IF NOT EXISTS idx_player_stats_save_percentage ON player_stats (season, save_percentage);
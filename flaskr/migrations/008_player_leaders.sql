@@ -0,0 +1,344 @@
+-- Materialized leaderboards: the top 50 players of every season for each
+-- leader stat (see flaskr/leaders.py), so /players/leaders reads at most 50
+-- rows from an index however many players and seasons exist. Keep the stat
+-- list and the size in sync with flaskr.leaders.LEADER_STATS and LEADERS_SIZE.
+--
+-- Lists are ordered by value, then player id. The triggers below maintain
+-- them incrementally: a stat line that could make a list is inserted and
+-- the list trimmed back to 50, and when a listed player's value drops or
+-- leaves the list, the best player not on it is pulled in before trimming.
+-- Stat lines below a full list's lowest value cost one indexed probe per
+-- stat, and a rising leader costs one row rewrite, so ingesting game lines
+-- stays cheap. `flask check-leaders` compares the table with a full
+-- recompute and `flask rebuild-leaders` recreates it.
+
+CREATE TABLE IF NOT EXISTS player_leaders (
+    season TEXT NOT NULL,
+    stat TEXT NOT NULL,
+    player_id INTEGER NOT NULL,
+    value NUMERIC NOT NULL,
+    PRIMARY KEY (season, stat, player_id),
+    FOREIGN KEY (player_id) REFERENCES players (id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_player_leaders_value ON player_leaders (season, stat, value DESC, player_id);
+
+INSERT INTO player_leaders (season, stat, player_id, value)
+SELECT season, 'goals', player_id, value FROM (
+    SELECT season, player_id, goals as value,
+           ROW_NUMBER() OVER (PARTITION BY season ORDER BY goals DESC, player_id) as position
+    FROM player_stats WHERE goals IS NOT NULL
+) WHERE position <= 50
+ON CONFLICT DO NOTHING;
+
+INSERT INTO player_leaders (season, stat, player_id, value)
+SELECT season, 'assists', player_id, value FROM (
+    SELECT season, player_id, assists as value,
+           ROW_NUMBER() OVER (PARTITION BY season ORDER BY assists DESC, player_id) as position
+    FROM player_stats WHERE assists IS NOT NULL
+) WHERE position <= 50
+ON CONFLICT DO NOTHING;
+
+INSERT INTO player_leaders (season, stat, player_id, value)
+SELECT season, 'points', player_id, value FROM (
+    SELECT season, player_id, points as value,
+           ROW_NUMBER() OVER (PARTITION BY season ORDER BY points DESC, player_id) as position
+    FROM player_stats WHERE points IS NOT NULL
+) WHERE position <= 50
+ON CONFLICT DO NOTHING;
+
+INSERT INTO player_leaders (season, stat, player_id, value)
+SELECT season, 'wins', player_id, value FROM (
+    SELECT season, player_id, wins as value,
+           ROW_NUMBER() OVER (PARTITION BY season ORDER BY wins DESC, player_id) as position
+    FROM player_stats WHERE wins IS NOT NULL
+) WHERE position <= 50
+ON CONFLICT DO NOTHING;
+
+INSERT INTO player_leaders (season, stat, player_id, value)
+SELECT season, 'save_percentage', player_id, value FROM (
+    SELECT season, player_id, save_percentage as value,
+           ROW_NUMBER() OVER (PARTITION BY season ORDER BY save_percentage DESC, player_id) as position
+    FROM player_stats WHERE save_percentage IS NOT NULL
+) WHERE position <= 50
+ON CONFLICT DO NOTHING;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_goals_insert AFTER INSERT ON player_stats
+WHEN NEW.goals >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'goals'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.goals)
+BEGIN
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'goals', NEW.player_id, NEW.goals WHERE NEW.goals IS NOT NULL;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'goals' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'goals'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_goals_update AFTER UPDATE OF player_id, season, goals ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = OLD.player_id
+)
+OR NEW.goals >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'goals'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.goals)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'goals', NEW.player_id, NEW.goals WHERE NEW.goals IS NOT NULL;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'goals', player_id, goals FROM player_stats s
+    WHERE season = OLD.season AND goals IS NOT NULL AND (NEW.goals IS NULL OR NEW.goals < OLD.goals OR NEW.season IS NOT OLD.season OR NEW.player_id <> OLD.player_id)
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = s.player_id)
+    ORDER BY goals DESC, player_id
+    LIMIT 1;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'goals' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'goals'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND OLD.season IS NOT NEW.season AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = OLD.season AND stat = 'goals'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_goals_delete AFTER DELETE ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = OLD.player_id
+)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'goals', player_id, goals FROM player_stats s
+    WHERE season = OLD.season AND goals IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'goals' AND player_id = s.player_id)
+    ORDER BY goals DESC, player_id
+    LIMIT 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_assists_insert AFTER INSERT ON player_stats
+WHEN NEW.assists >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'assists'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.assists)
+BEGIN
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'assists', NEW.player_id, NEW.assists WHERE NEW.assists IS NOT NULL;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'assists' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'assists'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_assists_update AFTER UPDATE OF player_id, season, assists ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = OLD.player_id
+)
+OR NEW.assists >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'assists'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.assists)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'assists', NEW.player_id, NEW.assists WHERE NEW.assists IS NOT NULL;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'assists', player_id, assists FROM player_stats s
+    WHERE season = OLD.season AND assists IS NOT NULL AND (NEW.assists IS NULL OR NEW.assists < OLD.assists OR NEW.season IS NOT OLD.season OR NEW.player_id <> OLD.player_id)
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = s.player_id)
+    ORDER BY assists DESC, player_id
+    LIMIT 1;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'assists' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'assists'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND OLD.season IS NOT NEW.season AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = OLD.season AND stat = 'assists'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_assists_delete AFTER DELETE ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = OLD.player_id
+)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'assists', player_id, assists FROM player_stats s
+    WHERE season = OLD.season AND assists IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'assists' AND player_id = s.player_id)
+    ORDER BY assists DESC, player_id
+    LIMIT 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_points_insert AFTER INSERT ON player_stats
+WHEN NEW.points >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'points'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.points)
+BEGIN
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'points', NEW.player_id, NEW.points WHERE NEW.points IS NOT NULL;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'points' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'points'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_points_update AFTER UPDATE OF player_id, season, points ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = OLD.player_id
+)
+OR NEW.points >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'points'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.points)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'points', NEW.player_id, NEW.points WHERE NEW.points IS NOT NULL;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'points', player_id, points FROM player_stats s
+    WHERE season = OLD.season AND points IS NOT NULL AND (NEW.points IS NULL OR NEW.points < OLD.points OR NEW.season IS NOT OLD.season OR NEW.player_id <> OLD.player_id)
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = s.player_id)
+    ORDER BY points DESC, player_id
+    LIMIT 1;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'points' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'points'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND OLD.season IS NOT NEW.season AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = OLD.season AND stat = 'points'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_points_delete AFTER DELETE ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = OLD.player_id
+)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'points', player_id, points FROM player_stats s
+    WHERE season = OLD.season AND points IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'points' AND player_id = s.player_id)
+    ORDER BY points DESC, player_id
+    LIMIT 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_wins_insert AFTER INSERT ON player_stats
+WHEN NEW.wins >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'wins'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.wins)
+BEGIN
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'wins', NEW.player_id, NEW.wins WHERE NEW.wins IS NOT NULL;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'wins' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'wins'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_wins_update AFTER UPDATE OF player_id, season, wins ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = OLD.player_id
+)
+OR NEW.wins >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'wins'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.wins)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'wins', NEW.player_id, NEW.wins WHERE NEW.wins IS NOT NULL;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'wins', player_id, wins FROM player_stats s
+    WHERE season = OLD.season AND wins IS NOT NULL AND (NEW.wins IS NULL OR NEW.wins < OLD.wins OR NEW.season IS NOT OLD.season OR NEW.player_id <> OLD.player_id)
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = s.player_id)
+    ORDER BY wins DESC, player_id
+    LIMIT 1;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'wins' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'wins'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND OLD.season IS NOT NEW.season AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = OLD.season AND stat = 'wins'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_wins_delete AFTER DELETE ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = OLD.player_id
+)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'wins', player_id, wins FROM player_stats s
+    WHERE season = OLD.season AND wins IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'wins' AND player_id = s.player_id)
+    ORDER BY wins DESC, player_id
+    LIMIT 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_save_percentage_insert AFTER INSERT ON player_stats
+WHEN NEW.save_percentage >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.save_percentage)
+BEGIN
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'save_percentage', NEW.player_id, NEW.save_percentage WHERE NEW.save_percentage IS NOT NULL;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_save_percentage_update AFTER UPDATE OF player_id, season, save_percentage ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = OLD.player_id
+)
+OR NEW.save_percentage >= COALESCE((
+    SELECT value FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage'
+    ORDER BY value DESC, player_id LIMIT 1 OFFSET 49
+), NEW.save_percentage)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT NEW.season, 'save_percentage', NEW.player_id, NEW.save_percentage WHERE NEW.save_percentage IS NOT NULL;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'save_percentage', player_id, save_percentage FROM player_stats s
+    WHERE season = OLD.season AND save_percentage IS NOT NULL AND (NEW.save_percentage IS NULL OR NEW.save_percentage < OLD.save_percentage OR NEW.season IS NOT OLD.season OR NEW.player_id <> OLD.player_id)
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = s.player_id)
+    ORDER BY save_percentage DESC, player_id
+    LIMIT 1;
+    DELETE FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage' AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = NEW.season AND stat = 'save_percentage'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND OLD.season IS NOT NEW.season AND player_id IN (
+        SELECT player_id FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage'
+        ORDER BY value DESC, player_id LIMIT -1 OFFSET 50
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS player_stats_leaders_save_percentage_delete AFTER DELETE ON player_stats
+WHEN EXISTS (
+    SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = OLD.player_id
+)
+BEGIN
+    DELETE FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = OLD.player_id;
+    INSERT INTO player_leaders (season, stat, player_id, value)
+    SELECT season, 'save_percentage', player_id, save_percentage FROM player_stats s
+    WHERE season = OLD.season AND save_percentage IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM player_leaders WHERE season = OLD.season AND stat = 'save_percentage' AND player_id = s.player_id)
+    ORDER BY save_percentage DESC, player_id
+    LIMIT 1;
+END;
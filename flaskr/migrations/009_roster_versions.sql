@@ -0,0 +1,25 @@
+-- Per-team roster versions for optimistic concurrency on roster writes (see
+-- flaskr/rosters.py). Every insert, update or delete on a team's
+-- fantasy_team_players rows bumps its fantasy_teams.roster_version, so a
+-- roster move made against an older version is rejected instead of
+-- silently overwriting a concurrent one. The triggers also cover writes
+-- that bypass the API (imports, the shell).
+
+ALTER TABLE fantasy_teams ADD COLUMN roster_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_roster_insert AFTER INSERT ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_teams SET roster_version = roster_version + 1 WHERE id = NEW.fantasy_team_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_roster_update
+AFTER UPDATE OF fantasy_team_id, player_id, position_type ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_teams SET roster_version = roster_version + 1
+    WHERE id IN (OLD.fantasy_team_id, NEW.fantasy_team_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fantasy_team_players_roster_delete AFTER DELETE ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_teams SET roster_version = roster_version + 1 WHERE id = OLD.fantasy_team_id;
+END;
@@ -0,0 +1,38 @@
+-- Change log for the autocomplete index (see flaskr/autocomplete.py). Every
+-- insert, update or delete on players stamps the player's id with the next
+-- sequence number, so a refresh reads only the players changed since the
+-- last sequence it saw instead of the whole table. One row per player id:
+-- the log never grows past the number of players ever stored. A player_id
+-- of 0 means "reload everything" and is logged after loads that suspend
+-- these triggers (flaskr/synthetic.py).
+
+CREATE TABLE IF NOT EXISTS player_changes (
+    player_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_player_changes_seq ON player_changes (seq);
+
+CREATE TRIGGER IF NOT EXISTS players_changes_insert AFTER INSERT ON players
+BEGIN
+    INSERT INTO player_changes (player_id, seq)
+    VALUES (NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM player_changes))
+    ON CONFLICT (player_id) DO UPDATE SET seq = excluded.seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS players_changes_update AFTER UPDATE OF id, name, position ON players
+BEGIN
+    INSERT INTO player_changes (player_id, seq)
+    VALUES (OLD.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM player_changes))
+    ON CONFLICT (player_id) DO UPDATE SET seq = excluded.seq;
+    INSERT INTO player_changes (player_id, seq)
+    VALUES (NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM player_changes))
+    ON CONFLICT (player_id) DO UPDATE SET seq = excluded.seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS players_changes_delete AFTER DELETE ON players
+BEGIN
+    INSERT INTO player_changes (player_id, seq)
+    VALUES (OLD.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM player_changes))
+    ON CONFLICT (player_id) DO UPDATE SET seq = excluded.seq;
+END;
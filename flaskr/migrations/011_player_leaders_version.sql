@@ -0,0 +1,18 @@
+-- Change counter for player_leaders (see 002_table_versions.sql), so
+-- /players/leaders revalidates and re-reads after `flask rebuild-leaders`
+-- as well as after the stat changes its triggers apply.
+
+INSERT OR IGNORE INTO table_versions (name) VALUES ('player_leaders');
+
+CREATE TRIGGER IF NOT EXISTS player_leaders_version_insert AFTER INSERT ON player_leaders
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_leaders';
+END;
+CREATE TRIGGER IF NOT EXISTS player_leaders_version_update AFTER UPDATE ON player_leaders
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_leaders';
+END;
+CREATE TRIGGER IF NOT EXISTS player_leaders_version_delete AFTER DELETE ON player_leaders
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'player_leaders';
+END;
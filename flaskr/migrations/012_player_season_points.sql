@@ -0,0 +1,269 @@
+-- One definition of fantasy points. Migration 005 pasted the scoring
+-- formula into every standings trigger; player_season_points holds it once,
+-- as the points of each player_stats row under each scoring system, and the
+-- triggers below (replacing 005's) and flaskr/scoring.py all read it. Keep
+-- the stat list in sync with flaskr.scoring.SCORING_STATS; changing how
+-- points are scored is a migration that recreates this view.
+--
+-- A view cannot see OLD values, so the triggers that take a stat line's old
+-- points off run BEFORE the update or delete, while the row still holds
+-- them, and the ones that add the new points run AFTER.
+
+CREATE VIEW IF NOT EXISTS player_season_points AS
+SELECT s.player_id, s.season, w.name AS scoring_system,
+       (COALESCE(s.goals * w.goals, 0)
+        + COALESCE(s.assists * w.assists, 0)
+        + COALESCE(s.plus_minus * w.plus_minus, 0)
+        + COALESCE(s.penalty_minutes * w.penalty_minutes, 0)
+        + COALESCE(s.wins * w.wins, 0)
+        + COALESCE(s.losses * w.losses, 0)
+        + COALESCE(s.saves * w.saves, 0)
+        + COALESCE(s.goals_against * w.goals_against, 0)
+        + COALESCE(s.shutouts * w.shutouts, 0)) AS points
+FROM player_stats s, scoring_systems w;
+
+DROP TRIGGER IF EXISTS player_stats_standings_insert;
+DROP TRIGGER IF EXISTS player_stats_standings_update;
+DROP TRIGGER IF EXISTS player_stats_standings_delete;
+DROP TRIGGER IF EXISTS fantasy_team_players_standings_insert;
+DROP TRIGGER IF EXISTS fantasy_team_players_standings_update;
+DROP TRIGGER IF EXISTS fantasy_team_players_standings_delete;
+DROP TRIGGER IF EXISTS fantasy_teams_standings_insert;
+DROP TRIGGER IF EXISTS fantasy_teams_standings_update;
+DROP TRIGGER IF EXISTS fantasy_leagues_standings_update;
+DROP TRIGGER IF EXISTS scoring_systems_standings_insert;
+DROP TRIGGER IF EXISTS scoring_systems_standings_update;
+DROP TRIGGER IF EXISTS scoring_systems_standings_delete;
+
+-- season stat lines of rostered starters
+CREATE TRIGGER player_stats_standings_insert AFTER INSERT ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = NEW.player_id AND p.season = NEW.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = NEW.player_id AND ftp.position_type = 'starter' AND fl.season = NEW.season
+    );
+END;
+
+CREATE TRIGGER player_stats_standings_unapply BEFORE UPDATE OF player_id, season, goals, assists, plus_minus, penalty_minutes, wins, losses, saves, goals_against, shutouts ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = OLD.player_id AND p.season = OLD.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = OLD.player_id AND ftp.position_type = 'starter' AND fl.season = OLD.season
+    );
+END;
+
+CREATE TRIGGER player_stats_standings_update AFTER UPDATE OF player_id, season, goals, assists, plus_minus, penalty_minutes, wins, losses, saves, goals_against, shutouts ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = NEW.player_id AND p.season = NEW.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = NEW.player_id AND ftp.position_type = 'starter' AND fl.season = NEW.season
+    );
+END;
+
+CREATE TRIGGER player_stats_standings_delete BEFORE DELETE ON player_stats
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = OLD.player_id AND p.season = OLD.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id IN (
+        SELECT ftp.fantasy_team_id
+        FROM fantasy_team_players ftp
+        JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id
+        JOIN fantasy_leagues fl ON fl.id = ft.league_id
+        WHERE ftp.player_id = OLD.player_id AND ftp.position_type = 'starter' AND fl.season = OLD.season
+    );
+END;
+
+-- roster moves: adds, drops, and starter/bench changes
+CREATE TRIGGER fantasy_team_players_standings_insert AFTER INSERT ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = NEW.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.fantasy_team_id AND NEW.position_type = 'starter';
+END;
+
+CREATE TRIGGER fantasy_team_players_standings_update AFTER UPDATE OF fantasy_team_id, player_id, position_type ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = OLD.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = OLD.fantasy_team_id AND OLD.position_type = 'starter';
+
+    UPDATE fantasy_standings SET
+        points = points + COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = NEW.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.fantasy_team_id AND NEW.position_type = 'starter';
+END;
+
+CREATE TRIGGER fantasy_team_players_standings_delete AFTER DELETE ON fantasy_team_players
+BEGIN
+    UPDATE fantasy_standings SET
+        points = points - COALESCE((
+            SELECT p.points
+            FROM fantasy_leagues fl
+            JOIN player_season_points p
+              ON p.player_id = OLD.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE fl.id = fantasy_standings.league_id
+        ), 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = OLD.fantasy_team_id AND OLD.position_type = 'starter';
+END;
+
+-- teams joining or moving between leagues
+CREATE TRIGGER fantasy_teams_standings_insert AFTER INSERT ON fantasy_teams
+BEGIN
+    INSERT OR IGNORE INTO fantasy_standings (league_id, fantasy_team_id) VALUES (NEW.league_id, NEW.id);
+
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.id;
+END;
+
+CREATE TRIGGER fantasy_teams_standings_update AFTER UPDATE OF id, league_id ON fantasy_teams
+BEGIN
+    DELETE FROM fantasy_standings WHERE fantasy_team_id = OLD.id;
+    INSERT INTO fantasy_standings (league_id, fantasy_team_id) VALUES (NEW.league_id, NEW.id);
+
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE fantasy_team_id = NEW.id;
+END;
+
+-- a league changing season or scoring system
+CREATE TRIGGER fantasy_leagues_standings_update AFTER UPDATE OF season, scoring_system ON fantasy_leagues
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id = NEW.id;
+END;
+
+-- scoring weights being defined, changed or removed
+CREATE TRIGGER scoring_systems_standings_insert AFTER INSERT ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system = NEW.name);
+END;
+
+CREATE TRIGGER scoring_systems_standings_update AFTER UPDATE ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system IN (OLD.name, NEW.name));
+END;
+
+CREATE TRIGGER scoring_systems_standings_delete AFTER DELETE ON scoring_systems
+BEGIN
+    UPDATE fantasy_standings SET
+        points = (
+            SELECT COALESCE(SUM(p.points), 0)
+            FROM fantasy_team_players ftp
+            JOIN fantasy_leagues fl ON fl.id = fantasy_standings.league_id
+            JOIN player_season_points p
+              ON p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system
+            WHERE ftp.fantasy_team_id = fantasy_standings.fantasy_team_id AND ftp.position_type = 'starter'
+        ),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE league_id IN (SELECT id FROM fantasy_leagues WHERE scoring_system = OLD.name);
+END;
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+
+from flask import abort, current_app, request
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque token."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Decode a cursor token, aborting with 400 if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        abort(400, 'Invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        abort(400, 'Invalid cursor')
+    # only scalars can be bound as SQL parameters (and hashed into cache keys)
+    for value in values:
+        if isinstance(value, bool) or not (value is None or isinstance(value, (str, int, float))):
+            abort(400, 'Invalid cursor')
+    return values
+
+
+def limit_arg(default=None):
+    """Read ``limit`` from the query string, defaulting to ``default`` (or
+    PAGE_SIZE) and capped at MAX_PAGE_SIZE."""
+    limit = request.args.get('limit', default or current_app.config['PAGE_SIZE'], type=int)
+    if limit < 1:
+        abort(400, 'limit must be a positive integer')
+    return min(limit, current_app.config['MAX_PAGE_SIZE'])
+
+
+def page_args(key_length):
+    """Read ``limit`` and ``after`` from the query string.
+
+    Returns ``(limit, after)`` where ``after`` is the decoded sort key of
+    the last row already seen, or ``None`` for the first page.  ``limit``
+    defaults to PAGE_SIZE and is capped at MAX_PAGE_SIZE.
+    """
+    limit = limit_arg()
+
+    after = request.args.get('after')
+    if after is not None:
+        after = decode_cursor(after, key_length)
+
+    return limit, after
+
+
+def next_cursor(db, key_sql, body_sql, params, limit):
+    """Return the cursor for the page after this one, or ``None``.
+
+    Runs ``SELECT <key_sql> <body_sql> LIMIT 2 OFFSET limit - 1``: the first
+    row is the last one on the current page and a second row means another
+    page exists.  Selecting only the sort key keeps this an index-only
+    probe, so the page itself can be streamed straight from its cursor
+    once the headers are known.
+    """
+    rows = db.execute(
+        f'SELECT {key_sql} {body_sql} LIMIT 2 OFFSET ?',
+        [*params, limit - 1]
+    ).fetchall()
+    if len(rows) == 2:
+        return encode_cursor(tuple(rows[0]))
+    return None
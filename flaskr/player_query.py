@@ -0,0 +1,182 @@
+from flask import abort
+
+from flaskr.pagination import decode_cursor, limit_arg, next_cursor
+
+# Server-side filtering, sorting and field selection for players.api. Every
+# column, sort key and filter comes from the whitelists below; user input only
+# ever reaches SQL as a bound parameter.
+
+PLAYER_FIELDS = {
+    'id': 'p.id',
+    'name': 'p.name',
+    'position': 'p.position',
+    'team_id': 'p.team_id',
+    'jersey_number': 'p.jersey_number',
+    'age': 'p.age',
+    'height': 'p.height',
+    'weight': 'p.weight',
+}
+
+TEAM_FIELDS = {
+    'team_name': 't.name',
+    'abbreviation': 't.abbreviation',
+}
+
+STAT_FIELDS = {
+    column: f's.{column}' for column in (
+        'season', 'games_played', 'goals', 'assists', 'points', 'plus_minus', 'penalty_minutes',
+        'wins', 'losses', 'saves', 'save_percentage', 'goals_against_average', 'shutouts',
+    )
+}
+
+FIELDS = {**PLAYER_FIELDS, **TEAM_FIELDS, **STAT_FIELDS}
+
+DEFAULT_FIELDS = ('id', 'name', 'position', 'jersey_number', 'age', 'team_name', 'abbreviation')
+
+# sort keys; stat sorts are served by the (season, stat) indexes
+SORTS = {
+    'name': 'p.name',
+    'goals': 's.goals',
+    'assists': 's.assists',
+    'points': 's.points',
+    'wins': 's.wins',
+    'save_percentage': 's.save_percentage',
+}
+
+# min_<stat> filters: stat >= value
+THRESHOLDS = {
+    'goals': int,
+    'points': int,
+    'save_percentage': float,
+}
+
+_BOOLEANS = {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class PlayerQuery:
+    """A players.api request parsed into SQL.
+
+    ``args`` is the request's query string.  Malformed or unknown values
+    abort with 400, like bad pagination arguments.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.limit = limit_arg()
+        self.where = []
+        self.params = []
+
+        self.season = args.get('season') or None
+
+        self.fields = _split(args.get('fields', '')) or list(DEFAULT_FIELDS)
+        unknown = [field for field in self.fields if field not in FIELDS]
+        if unknown:
+            abort(400, f'unknown fields: {", ".join(unknown)}')
+
+        sort = args.get('sort', 'name')
+        self.descending = sort.startswith('-')
+        self.sort = sort.lstrip('-')
+        if self.sort not in SORTS:
+            abort(400, f'cannot sort by {self.sort!r}; use one of {", ".join(SORTS)}')
+
+        self._filters()
+
+        needs_season = (
+            any(field in STAT_FIELDS for field in self.fields)
+            or SORTS[self.sort].startswith('s.')
+            or any(f'min_{stat}' in args for stat in THRESHOLDS)
+        )
+        if needs_season and self.season is None:
+            abort(400, 'season is required for stat fields, sorts and filters')
+
+        after = args.get('after')
+        self.after = decode_cursor(after, 2) if after is not None else None
+
+    def _filters(self):
+        args = self.args
+
+        positions = _split(args.get('position', ''))
+        if positions:
+            self.where.append(f'p.position IN ({", ".join("?" for _ in positions)})')
+            self.params.extend(positions)
+
+        if 'team_id' in args:
+            team_id = args.get('team_id', type=int)
+            if team_id is None:
+                abort(400, 'team_id must be an integer')
+            self.where.append('p.team_id = ?')
+            self.params.append(team_id)
+
+        if 'team' in args:
+            # resolved to an id so the filter searches idx_players_team
+            self.where.append('p.team_id = (SELECT id FROM nhl_teams WHERE abbreviation = ?)')
+            self.params.append(args['team'].upper())
+
+        if 'free_agent' in args:
+            free_agent = _BOOLEANS.get(args['free_agent'].lower())
+            if free_agent is None:
+                abort(400, 'free_agent must be true or false')
+            self.where.append('p.team_id IS NULL' if free_agent else 'p.team_id IS NOT NULL')
+
+        if self.season is not None:
+            self.where.append('s.season = ?')
+            self.params.append(self.season)
+
+        for stat, convert in THRESHOLDS.items():
+            value = args.get(f'min_{stat}')
+            if value is None:
+                continue
+            try:
+                value = convert(value)
+            except ValueError:
+                abort(400, f'min_{stat} must be a number')
+            self.where.append(f's.{stat} >= ?')
+            self.params.append(value)
+
+    @property
+    def key_sql(self):
+        return f'{SORTS[self.sort]}, p.id'
+
+    def _body(self, after):
+        if self.season is not None:
+            # CROSS JOIN keeps player_stats as the outer loop, so a season's
+            # rows are found through its (season, stat) indexes
+            sql = 'FROM player_stats s CROSS JOIN players p'
+            where = ['p.id = s.player_id']
+        else:
+            sql = 'FROM players p'
+            where = []
+        if any(field in TEAM_FIELDS for field in self.fields):
+            sql += ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
+
+        where.extend(self.where)
+        params = list(self.params)
+        if after is not None:
+            where.append(f'({self.key_sql}) {"<" if self.descending else ">"} (?, ?)')
+            params.extend(after)
+
+        direction = ' DESC' if self.descending else ''
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {SORTS[self.sort]}{direction}, p.id{direction}'
+        return sql, params
+
+    def next_cursor(self, db):
+        """Cursor for the page after this one, or None."""
+        body, params = self._body(self.after)
+        return next_cursor(db, self.key_sql, body, params, self.limit)
+
+    def execute(self, db):
+        """Run the page query, fetching only the requested columns."""
+        body, params = self._body(self.after)
+        columns = ', '.join(f'{FIELDS[field]} as {field}' for field in self.fields)
+        return db.execute(f'SELECT {columns} {body} LIMIT ?', [*params, self.limit])
+
+    def cache_key(self):
+        return ('players_query', self.season, tuple(self.fields), self.sort, self.descending,
+                tuple(self.where), tuple(self.params),
+                tuple(self.after) if self.after else None, self.limit)
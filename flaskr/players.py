@@ -1,90 +1,175 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, abort, current_app, jsonify, request, stream_template, url_for
+from flaskr import autocomplete as player_autocomplete, leaders as player_leaders, queries, search as player_search
+from flaskr.bulk import GAME_TABLES, BulkImportError, insert_games
+from flaskr.cache import cached, invalidate
+from flaskr.conditional import conditional
 from flaskr.db import get_db
+from flaskr.pagination import limit_arg, next_cursor, page_args
+from flaskr.player_query import PlayerQuery
+from flaskr.streaming import json_array_response
+from flaskr.writes import WriteBusy, write
 
 bp = Blueprint('players', __name__, url_prefix='/players')
 
 
+def _players_page():
+    """Fetch one keyset page of players ordered by (name, id).
+
+    Seeking past the last seen (name, id) keeps every page an index range
+    scan on idx_players_name, however deep the client pages.  Pages are
+    cached per (after, limit) until players or nhl_teams are written.
+    Returns the page's rows, the page size and the next-page cursor.
+    """
+    limit, after = page_args(2)
+
+    def load():
+        db = get_db()
+        where = ''
+        params = []
+        if after is not None:
+            where = ' WHERE (p.name, p.id) > (?, ?)'
+            params.extend(after)
+        order = ' ORDER BY p.name, p.id'
+
+        cursor = next_cursor(db, 'p.name, p.id', 'FROM players p' + where + order, params, limit)
+        players = [dict(player) for player in db.execute(
+            'SELECT p.id, p.name, p.position, p.jersey_number, p.age, t.name as team_name, t.abbreviation'
+            ' FROM players p'
+            ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
+            + where + order + ' LIMIT ?',
+            [*params, limit]
+        )]
+        return players, cursor
+
+    key = ('players_page', tuple(after) if after else None, limit)
+    players, cursor = cached(('players', 'nhl_teams'), key, load)
+    return players, limit, cursor
+
+
 @bp.route('/')
+@conditional('players', 'nhl_teams')
 def index():
-    """Show all players."""
-    db = get_db()
-    players = db.execute(
-        'SELECT p.id, p.name, p.position, p.jersey_number, p.age, t.name as team_name, t.abbreviation'
-        ' FROM players p'
-        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
-        ' ORDER BY p.name'
-    ).fetchall()
-
-    # Simple HTML response for now
-    html = '<h1>Players</h1><ul>'
-    for player in players:
-        html += f'<li><a href="/players/{player["id"]}">{player["name"]} - {player["position"]} - {player["team_name"] or "Free Agent"}</a></li>'
-    html += '</ul><a href="/">Back to Home</a>'
-    return html
+    """Show one page of players."""
+    players, limit, cursor = _players_page()
+    return stream_template('players.html', players=players, limit=limit, next_cursor=cursor)
+
+
+def _search_results():
+    """Run the ``q`` search, cached per (q, limit) until players or nhl_teams change."""
+    q = request.args.get('q', '').strip()
+    limit = limit_arg()
+    results = cached(('players', 'nhl_teams'), ('player_search', q, limit),
+                     lambda: player_search.search_players(get_db(), q, limit))
+    return q, results
+
+
+@bp.route('/search')
+@conditional('players', 'nhl_teams')
+def search():
+    """Search players by name, team or position."""
+    q, results = _search_results()
+    return stream_template('players_search.html', q=q, players=results)
+
+
+@bp.route('/search/api')
+@conditional('players', 'nhl_teams')
+def search_api():
+    """API endpoint for player search; matches every word as a prefix."""
+    _, results = _search_results()
+    return json_array_response(results)
+
+
+@bp.route('/autocomplete')
+def autocomplete():
+    """Player names with a word starting with ``q``, served from memory.
+
+    No conditional GET here: that would cost a query per keystroke.
+    """
+    limit = limit_arg(current_app.config['AUTOCOMPLETE_LIMIT'])
+    players = player_autocomplete.get_index().lookup(request.args.get('q', ''), limit)
+    return jsonify([
+        {'id': player_id, 'name': name, 'position': position}
+        for player_id, name, position in players
+    ])
+
+
+@bp.route('/leaders')
+@conditional('players', 'nhl_teams', 'player_leaders')
+def leaders():
+    """Season leaders for one stat, read from the materialized top lists.
+
+    ``stat`` defaults to points and ``season`` to the latest season;
+    ``limit`` is capped at ``LEADERS_SIZE``.
+    """
+    stat = request.args.get('stat', 'points')
+    if stat not in player_leaders.LEADER_STATS:
+        abort(400, f'no leaderboard for {stat!r}; use one of {", ".join(player_leaders.LEADER_STATS)}')
+    limit = min(limit_arg(10), player_leaders.LEADERS_SIZE)
+
+    def load():
+        db = get_db()
+        season = request.args.get('season') or player_leaders.latest_season(db)
+        return player_leaders.leaders(db, season, stat, limit)
+
+    key = ('player_leaders', request.args.get('season'), stat, limit)
+    return json_array_response(cached(('players', 'nhl_teams', 'player_leaders'), key, load))
 
 
 @bp.route('/<int:id>')
+@conditional('players', 'nhl_teams', 'player_stats')
 def detail(id):
     """Show details for a specific player."""
-    db = get_db()
-    player = db.execute(
-        'SELECT p.*, t.name as team_name, t.abbreviation'
-        ' FROM players p'
-        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
-        ' WHERE p.id = ?',
-        (id,)
-    ).fetchone()
-
+    player = cached(('players', 'nhl_teams', 'player_stats'), ('player', id),
+                    lambda: queries.player_detail(get_db(), id))
     if player is None:
         return "Player not found", 404
 
-    # Get player stats
-    stats = db.execute(
-        'SELECT * FROM player_stats WHERE player_id = ? ORDER BY season DESC',
-        (id,)
-    ).fetchall()
-
-    html = f'''
-    <h1>{player["name"]}</h1>
-    <p><strong>Position:</strong> {player["position"]}</p>
-    <p><strong>Team:</strong> {player["team_name"] or "Free Agent"}</p>
-    <p><strong>Jersey:</strong> #{player["jersey_number"] or "N/A"}</p>
-    <p><strong>Age:</strong> {player["age"] or "N/A"}</p>
-    <p><strong>Height:</strong> {player["height"] or "N/A"}</p>
-    <p><strong>Weight:</strong> {player["weight"] or "N/A"} lbs</p>
-
-    <h2>Stats</h2>
-    '''
-
-    if stats:
-        html += '<table border="1"><tr><th>Season</th><th>GP</th><th>G</th><th>A</th><th>P</th><th>+/-</th><th>PIM</th></tr>'
-        for stat in stats:
-            html += f'''<tr>
-                <td>{stat["season"]}</td>
-                <td>{stat["games_played"]}</td>
-                <td>{stat["goals"]}</td>
-                <td>{stat["assists"]}</td>
-                <td>{stat["points"]}</td>
-                <td>{stat["plus_minus"]}</td>
-                <td>{stat["penalty_minutes"]}</td>
-            </tr>'''
-        html += '</table>'
-    else:
-        html += '<p>No stats available</p>'
-
-    html += '<br><a href="/players">Back to Players</a> | <a href="/">Home</a>'
-    return html
+    return stream_template('player_detail.html', player=player, stats=player['stats'])
 
 
 @bp.route('/api')
+@conditional('players', 'nhl_teams', 'player_stats')
 def api():
-    """API endpoint for players data."""
-    db = get_db()
-    players = db.execute(
-        'SELECT p.id, p.name, p.position, p.jersey_number, p.age, t.name as team_name, t.abbreviation'
-        ' FROM players p'
-        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
-        ' ORDER BY p.name'
-    ).fetchall()
-
-    return jsonify([dict(player) for player in players])
+    """API endpoint for players data, one page at a time.
+
+    Supports filtering, whitelisted sorts and ``fields=`` selection (see
+    ``flaskr.player_query``).  The next page is advertised in a
+    ``Link: <...>; rel="next"`` header so the body stays a plain JSON array.
+    """
+    query = PlayerQuery(request.args)
+
+    def load():
+        db = get_db()
+        return [dict(player) for player in query.execute(db)], query.next_cursor(db)
+
+    players, cursor = cached(('players', 'nhl_teams', 'player_stats'), query.cache_key(), load)
+
+    response = json_array_response(players)
+    if cursor:
+        args = {**request.args.to_dict(), 'limit': query.limit, 'after': cursor}
+        next_url = url_for('players.api', **args, _external=True)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+
+@bp.route('/games', methods=['POST'])
+def add_games():
+    """Record per-game stat lines, all written or none.
+
+    The body is a JSON list of ``{"player_id", "season", "game_date",
+    "goals", ...}`` objects (see ``bulk.insert_games``).
+    """
+    records = request.get_json(silent=True)
+    count = write(lambda db: insert_games(db, records))
+    invalidate(*GAME_TABLES)
+    return jsonify({'games': count}), 201
+
+
+@bp.errorhandler(BulkImportError)
+def game_error(e):
+    return jsonify({'error': str(e)}), 400
+
+
+@bp.errorhandler(WriteBusy)
+def write_busy(e):
+    return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
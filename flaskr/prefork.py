@@ -0,0 +1,239 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing.sharedctypes import RawArray
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+from flaskr.autocomplete import get_index
+from flaskr.db import get_pool, reset_pool
+from flaskr.writes import get_write_queue
+
+log = logging.getLogger(__name__)
+
+
+class RequestCounter:
+    """WSGI middleware counting requests into a slot of shared memory.
+
+    Also tracks requests in flight, so a stopping worker can wait for them.
+    """
+
+    def __init__(self, app, counts, slot):
+        self.app = app
+        self.counts = counts
+        self.slot = slot
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.counts[self.slot] += 1
+            self.in_flight += 1
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._done()
+            raise
+        return ClosingIterator(result, self._done)
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._idle.notify_all()
+
+    def wait_idle(self, timeout):
+        """Wait until no request is in flight; returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self.in_flight == 0, timeout)
+
+
+class PreforkServer:
+    """Pre-forking HTTP server for ``dev_server.py --production``.
+
+    The master binds the socket, warms the app (templates, the autocomplete
+    index and the read-through cache for PREFORK_WARM_PATHS) and then forks
+    ``workers`` processes that share those pages copy-on-write.  Nothing
+    else is shared: each worker opens its own SQLite connections and serves
+    requests on the inherited socket with a threaded Werkzeug server.
+
+    Signals to the master:
+
+    - ``SIGHUP`` replaces the workers one at a time; each finishes its
+      in-flight requests (up to PREFORK_GRACEFUL_TIMEOUT) before exiting
+    - ``SIGTERM`` / ``SIGINT`` stop every worker gracefully and exit
+    - ``SIGUSR1`` logs per-worker request counts
+
+    Workers that die are replaced.  Request counts live in shared memory and
+    are served at ``/_workers`` by every worker.  Per-request access logs
+    are off unless ``access_log`` is set.
+    """
+
+    def __init__(self, app, host='127.0.0.1', port=5000, workers=None, access_log=False):
+        self.app = app
+        self.access_log = access_log
+        self.host = host
+        self.port = port
+        self.workers = workers or app.config['PREFORK_WORKERS'] or os.cpu_count() or 1
+        self.graceful_timeout = app.config['PREFORK_GRACEFUL_TIMEOUT']
+        self.socket = None
+        self.pids = [0] * self.workers
+        self.counts = RawArray('Q', self.workers)
+        self.worker_pids = RawArray('i', self.workers)
+        self._stopping = False
+        self._reload = False
+        self._report = False
+        if app.config['STATS_ENDPOINTS']:
+            app.add_url_rule('/_workers', 'prefork_workers', self._workers_view)
+
+    # -- master ------------------------------------------------------------------
+
+    def bind(self):
+        """Open the listening socket; returns its ``(host, port)``."""
+        if self.socket is None:
+            self.socket = socket.create_server((self.host, self.port), backlog=1024)
+            self.socket.set_inheritable(True)
+        return self.socket.getsockname()[:2]
+
+    def preload(self):
+        """Warm the app in the master so workers inherit it."""
+        client = self.app.test_client()
+        for path in self.app.config['PREFORK_WARM_PATHS']:
+            try:
+                status = client.get(path).status_code
+            except Exception:
+                log.exception('warming %s failed', path)
+            else:
+                log.debug('warmed %s (%s)', path, status)
+        if self.app.config['AUTOCOMPLETE_PRELOAD']:
+            try:
+                get_index(self.app)
+            except Exception:
+                log.exception('autocomplete index not preloaded')
+        # no threads or open SQLite connections may cross fork()
+        self.app.extensions['autocomplete'].stop()
+        get_write_queue(self.app).stop()
+        get_pool(self.app).close()
+
+    def run(self):
+        """Serve until SIGTERM or SIGINT."""
+        self.bind()
+        self.preload()
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, '_reload', True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, '_stopping', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, '_stopping', True))
+        signal.signal(signal.SIGUSR1, lambda *_: setattr(self, '_report', True))
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        log.info('serving on %s:%s with %d workers', *self.bind(), self.workers)
+
+        while not self._stopping:
+            self._reap()
+            if self._reload:
+                self._reload = False
+                self._restart()
+            if self._report:
+                self._report = False
+                self._log_counts()
+            time.sleep(0.1)
+
+        for slot in range(self.workers):
+            self._stop_worker(slot)
+        self._log_counts()
+        self.socket.close()
+
+    def _spawn(self, slot):
+        self.counts[slot] = 0
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                self._worker(slot)
+            except BaseException:
+                log.exception('worker %d failed', slot)
+                status = 1
+            finally:
+                os._exit(status)
+        self.pids[slot] = pid
+        self.worker_pids[slot] = pid
+
+    def _reap(self):
+        """Replace workers that exited on their own."""
+        for slot, pid in enumerate(self.pids):
+            if pid and os.waitpid(pid, os.WNOHANG)[0] == pid:
+                log.warning('worker %d (pid %d) exited; restarting', slot, pid)
+                self._spawn(slot)
+
+    def _stop_worker(self, slot):
+        pid = self.pids[slot]
+        if not pid:
+            return
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while os.waitpid(pid, os.WNOHANG)[0] != pid:
+            if time.monotonic() > deadline:
+                log.warning('worker %d (pid %d) did not stop; killing it', slot, pid)
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                break
+            time.sleep(0.05)
+        self.pids[slot] = 0
+
+    def _restart(self):
+        """Replace workers one at a time so the others keep serving."""
+        self._log_counts()
+        for slot in range(self.workers):
+            self._stop_worker(slot)
+            self._spawn(slot)
+        log.info('restarted %d workers', self.workers)
+
+    def counts_by_worker(self):
+        return [
+            {'worker': slot, 'pid': self.worker_pids[slot], 'requests': self.counts[slot]}
+            for slot in range(self.workers)
+        ]
+
+    def _log_counts(self):
+        for worker in self.counts_by_worker():
+            log.info('worker %(worker)d (pid %(pid)d): %(requests)d requests', worker)
+
+    def _workers_view(self):
+        return {'workers': self.counts_by_worker()}
+
+    # -- worker ------------------------------------------------------------------
+
+    def _worker(self, slot):
+        for signum in (signal.SIGHUP, signal.SIGINT, signal.SIGUSR1):
+            # the master owns these; Ctrl-C reaches the whole process group
+            signal.signal(signum, signal.SIG_IGN)
+        if not self.access_log:
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        reset_pool(self.app)
+        self.app.extensions['autocomplete'].after_fork()
+        get_write_queue(self.app).after_fork()
+
+        counter = RequestCounter(self.app.wsgi_app, self.counts, slot)
+        self.app.wsgi_app = counter
+        host, port = self.bind()
+        server = make_server(host, port, self.app, threaded=True, fd=self.socket.fileno())
+
+        def stop(*_):
+            # shutdown() blocks until serve_forever() returns, so not from here
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            server.serve_forever()
+        finally:
+            if not counter.wait_idle(self.graceful_timeout):
+                log.warning('worker %d stopped with requests still in flight', slot)
+            get_write_queue(self.app).stop()
+            get_pool(self.app).close()
@@ -0,0 +1,343 @@
+# Opt-in request profiling (PROFILING = True). Every request records its wall
+# time and, for the connection handed out by get_db, the SQL statements run
+# (sqlite3 trace callback, trigger programs included), the time spent in
+# execute and fetch calls, the rows fetched and the SQLite VM instructions
+# executed (progress handler, in PROFILING_VM_STEP units). The numbers go out
+# as a Server-Timing header and are aggregated per endpoint at /_metrics.
+# The same connection proxy times each statement for the slow-query log
+# (flaskr.slowlog), which can be enabled on its own.
+
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, jsonify, request
+
+from flaskr.cache import get_cache
+from flaskr.db import get_pool
+from flaskr.slowlog import SlowQueryLog
+
+
+class RequestProfile:
+    """Counters for one request."""
+
+    __slots__ = ('start', 'statements', 'sql_time', 'rows', 'vm_steps')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.vm_steps = 0
+
+
+class ProfiledCursor:
+    """Cursor proxy timing fetches and counting the rows they return.
+
+    A statement's time is its execute call plus every fetch; it is handed
+    to the slow-query log once the cursor is exhausted or the connection
+    is detached.
+    """
+
+    def __init__(self, cursor, conn, sql, params, many, elapsed):
+        self._cursor = cursor
+        self._conn = conn
+        self._profile = conn._profile
+        self._statement = (sql, params, many)
+        self.elapsed = elapsed
+
+    def _timed(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._profile.sql_time += elapsed
+            self.elapsed += elapsed
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is None:
+            self._conn._finished(self)
+        else:
+            self._profile.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self._cursor.arraysize if size is None else size
+        rows = self._timed(self._cursor.fetchmany, size)
+        self._profile.rows += len(rows)
+        if len(rows) < size:
+            self._conn._finished(self)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._profile.rows += len(rows)
+        self._conn._finished(self)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            row = self._timed(next, self._cursor)
+        except StopIteration:
+            self._conn._finished(self)
+            raise
+        self._profile.rows += 1
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """Connection proxy that attributes SQL work to the current request.
+
+    With a ``profile`` the trace and progress callbacks are installed when
+    the connection is wrapped; ``detach`` removes them before it goes back
+    to the pool.  Without one (profiling off, or outside a request) only
+    the per-statement timing for ``slow_log`` is kept.
+    """
+
+    def __init__(self, conn, profile, vm_step, slow_log=None):
+        self._conn = conn
+        self._vm_step = vm_step
+        self._slow_log = slow_log
+        self._open = []
+        self._explaining = False
+        if profile is None:
+            self._profile = RequestProfile()
+            self._traced = False
+        else:
+            self._profile = profile
+            self._traced = True
+            conn.set_trace_callback(self._trace)
+            conn.set_progress_handler(self._progress, vm_step)
+
+    def _trace(self, statement):
+        if not self._explaining:
+            self._profile.statements += 1
+
+    def _progress(self):
+        self._profile.vm_steps += self._vm_step
+        return 0
+
+    def _run(self, call, sql, params, many=None):
+        start = time.perf_counter()
+        try:
+            cursor = call()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._profile.sql_time += elapsed
+        cursor = ProfiledCursor(cursor, self, sql, params, many, elapsed)
+        if self._slow_log is not None:
+            if cursor.description is None:
+                # nothing to fetch: the statement is complete
+                self._finished(cursor)
+            else:
+                self._open.append(cursor)
+        return cursor
+
+    def _finished(self, cursor):
+        """Log ``cursor``'s statement if it was slow; called once per cursor."""
+        if self._slow_log is None or cursor._statement is None:
+            return
+        sql, params, many = cursor._statement
+        cursor._statement = None
+        if cursor in self._open:
+            self._open.remove(cursor)
+        if cursor.elapsed >= self._slow_log.threshold:
+            self._explaining = True
+            try:
+                self._slow_log.record(self._conn, sql, params, cursor.elapsed, many)
+            finally:
+                self._explaining = False
+
+    def execute(self, sql, params=()):
+        return self._run(lambda: self._conn.execute(sql, params), sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        # an iterator is consumed by the statement, so it is logged without parameters
+        sized = isinstance(seq_of_params, (list, tuple))
+        first = seq_of_params[0] if sized and seq_of_params else None
+        return self._run(lambda: self._conn.executemany(sql, seq_of_params), sql, first,
+                         len(seq_of_params) if sized else None)
+
+    def executescript(self, sql):
+        return self._run(lambda: self._conn.executescript(sql), sql, None)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            self._profile.sql_time += time.perf_counter() - start
+
+    def detach(self):
+        """Flush open statements, remove the callbacks and return the plain connection."""
+        for cursor in list(self._open):
+            self._finished(cursor)
+        if self._traced:
+            self._conn.set_trace_callback(None)
+            self._conn.set_progress_handler(None, 0)
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _percentiles(values, scale=1000):
+    """p50/p95/p99 and max of ``values`` (nearest rank), seconds to ms by default."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        'p50': round(ordered[round(last * 0.50)] * scale, 3),
+        'p95': round(ordered[round(last * 0.95)] * scale, 3),
+        'p99': round(ordered[round(last * 0.99)] * scale, 3),
+        'max': round(ordered[last] * scale, 3),
+    }
+
+
+class EndpointStats:
+    """Totals and a window of recent samples for one endpoint."""
+
+    def __init__(self, rule, samples):
+        self.rule = rule
+        self.requests = 0
+        self.errors = 0
+        self.statements = 0
+        self.rows = 0
+        self.vm_steps = 0
+        self.wall = deque(maxlen=samples)
+        self.sql = deque(maxlen=samples)
+
+    def add(self, profile, wall, status):
+        self.requests += 1
+        if status >= 500:
+            self.errors += 1
+        self.statements += profile.statements
+        self.rows += profile.rows
+        self.vm_steps += profile.vm_steps
+        self.wall.append(wall)
+        self.sql.append(profile.sql_time)
+
+    def summary(self):
+        return {
+            'rule': self.rule,
+            'requests': self.requests,
+            'errors': self.errors,
+            'wall_ms': _percentiles(self.wall),
+            'sql_ms': _percentiles(self.sql),
+            'statements_per_request': round(self.statements / self.requests, 2),
+            'rows_per_request': round(self.rows / self.requests, 2),
+            'vm_steps_per_request': round(self.vm_steps / self.requests),
+        }
+
+
+class Profiler:
+    """Per-endpoint request metrics and the slow-query log.
+
+    Percentiles are computed over the last ``samples`` requests of each
+    endpoint; counts and means cover every request since startup.
+    """
+
+    def __init__(self, samples=1000, vm_step=1000, slow_log=None):
+        self.samples = samples
+        self.vm_step = vm_step
+        self.slow_log = slow_log
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, conn):
+        """Profile ``conn`` for the current request."""
+        profile = g.get('_profile')
+        if profile is None and self.slow_log is None:
+            # outside a request (CLI commands, app-context code)
+            return conn
+        return ProfiledConnection(conn, profile, self.vm_step, self.slow_log)
+
+    def unwrap(self, conn):
+        return conn.detach() if isinstance(conn, ProfiledConnection) else conn
+
+    def record(self, endpoint, rule, profile, wall, status):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(rule, self.samples)
+            stats.add(profile, wall, status)
+
+    def summary(self):
+        with self._lock:
+            return {endpoint: stats.summary() for endpoint, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+def server_timing(profile, wall):
+    """``Server-Timing`` value for the work done so far."""
+    return (
+        f'sql;dur={profile.sql_time * 1000:.2f};desc="{profile.statements} statements, {profile.rows} rows", '
+        f'app;dur={wall * 1000:.2f}'
+    )
+
+
+def _start():
+    g._profile = RequestProfile()
+
+
+def _add_header(response):
+    profile = g.get('_profile')
+    if profile is not None:
+        # streamed bodies are fetched after this point; /_metrics has the totals
+        response.headers['Server-Timing'] = server_timing(profile, time.perf_counter() - profile.start)
+        g._profile_status = response.status_code
+    return response
+
+
+def _finish(exc=None):
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return
+    wall = time.perf_counter() - profile.start
+    # GeneratorExit here is a client that stopped reading a streamed body
+    status = 500 if isinstance(exc, Exception) else g.pop('_profile_status', 200)
+    rule = request.url_rule.rule if request.url_rule else None
+    current_app.extensions['profiler'].record(request.endpoint or '<unmatched>', rule, profile, wall, status)
+
+
+def metrics():
+    """Per-endpoint timings plus connection pool and cache counters."""
+    return jsonify({
+        'endpoints': current_app.extensions['profiler'].summary(),
+        'pool': get_pool().stats(),
+        'cache': get_cache().stats(),
+    })
+
+
+def init_app(app):
+    slow_log = None
+    if app.config['SLOW_QUERY_MS'] is not None:
+        slow_log = SlowQueryLog(
+            app.config['SLOW_QUERY_LOG'],
+            app.config['SLOW_QUERY_MS'] / 1000,
+            max_bytes=app.config['SLOW_QUERY_LOG_BYTES'],
+            backups=app.config['SLOW_QUERY_LOG_BACKUPS'],
+            scan_tables=app.config['SLOW_QUERY_SCAN_TABLES'],
+        )
+    if not app.config['PROFILING']:
+        if slow_log is not None:
+            app.extensions['profiler'] = Profiler(slow_log=slow_log)
+        return
+    app.extensions['profiler'] = Profiler(app.config['PROFILING_SAMPLES'], app.config['PROFILING_VM_STEP'], slow_log)
+    app.before_request(_start)
+    app.after_request(_add_header)
+    app.teardown_request(_finish)
+    if app.config['STATS_ENDPOINTS']:
+        app.add_url_rule('/_metrics', 'metrics', metrics)
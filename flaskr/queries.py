@@ -0,0 +1,100 @@
+# Data access for the detail pages: each function loads a page's whole
+# payload (the entity plus its child rows) in one SQL statement. Child rows
+# are aggregated in SQLite with json_group_array(json_object(...)) in a
+# correlated subquery and decoded here.
+
+import json
+
+
+def _load(row, *children):
+    """Turn a payload row into a dict, decoding each JSON child column."""
+    if row is None:
+        return None
+    payload = dict(row)
+    for column in children:
+        payload[column] = json.loads(payload[column])
+    return payload
+
+
+def player_detail(db, player_id):
+    """A player with team name and per-season stats, newest season first."""
+    row = db.execute(
+        'SELECT p.*, t.name as team_name, t.abbreviation,'
+        ' (SELECT json_group_array(json_object('
+        "    'season', s.season, 'games_played', s.games_played,"
+        "    'goals', s.goals, 'assists', s.assists, 'points', s.points,"
+        "    'plus_minus', s.plus_minus, 'penalty_minutes', s.penalty_minutes,"
+        "    'wins', s.wins, 'losses', s.losses, 'saves', s.saves,"
+        "    'save_percentage', s.save_percentage,"
+        "    'goals_against_average', s.goals_against_average,"
+        "    'shutouts', s.shutouts))"
+        '  FROM (SELECT * FROM player_stats WHERE player_id = p.id ORDER BY season DESC) s'
+        ' ) as stats'
+        ' FROM players p'
+        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
+        ' WHERE p.id = ?',
+        (player_id,)
+    ).fetchone()
+    return _load(row, 'stats')
+
+
+def nhl_team_detail(db, team_id):
+    """An NHL team with its roster ordered by position and name."""
+    row = db.execute(
+        'SELECT t.*,'
+        ' (SELECT json_group_array(json_object('
+        "    'id', p.id, 'name', p.name, 'position', p.position,"
+        "    'jersey_number', p.jersey_number))"
+        '  FROM (SELECT * FROM players WHERE team_id = t.id ORDER BY position, name) p'
+        ' ) as players'
+        ' FROM nhl_teams t'
+        ' WHERE t.id = ?',
+        (team_id,)
+    ).fetchone()
+    return _load(row, 'players')
+
+
+def league_detail(db, league_id):
+    """A fantasy league with its commissioner and teams in standings order."""
+    row = db.execute(
+        'SELECT fl.*, u.username as commissioner_name,'
+        ' (SELECT json_group_array(json_object('
+        "    'id', ft.id, 'name', ft.name, 'owner_id', ft.owner_id,"
+        "    'owner_name', ft.owner_name, 'points', ft.points, 'rank', ft.rank))"
+        '  FROM (SELECT ft.*, o.username as owner_name, fs.points,'
+        '               RANK() OVER (ORDER BY fs.points DESC) as rank'
+        '        FROM fantasy_standings fs'
+        '        JOIN fantasy_teams ft ON fs.fantasy_team_id = ft.id'
+        '        JOIN users o ON ft.owner_id = o.id'
+        '        WHERE fs.league_id = fl.id'
+        '        ORDER BY fs.points DESC, ft.name) ft'
+        ' ) as teams'
+        ' FROM fantasy_leagues fl'
+        ' JOIN users u ON fl.commissioner_id = u.id'
+        ' WHERE fl.id = ?',
+        (league_id,)
+    ).fetchone()
+    return _load(row, 'teams')
+
+
+def fantasy_team_detail(db, league_id, team_id):
+    """A fantasy team with owner, league name and roster."""
+    row = db.execute(
+        'SELECT ft.*, u.username as owner_name, fl.name as league_name,'
+        ' (SELECT json_group_array(json_object('
+        "    'position_type', r.position_type, 'name', r.name,"
+        "    'position', r.position, 'team_abbr', r.team_abbr))"
+        '  FROM (SELECT ftp.position_type, p.name, p.position, t.abbreviation as team_abbr'
+        '        FROM fantasy_team_players ftp'
+        '        JOIN players p ON ftp.player_id = p.id'
+        '        LEFT JOIN nhl_teams t ON p.team_id = t.id'
+        '        WHERE ftp.fantasy_team_id = ft.id'
+        '        ORDER BY ftp.position_type, p.position, p.name) r'
+        ' ) as roster'
+        ' FROM fantasy_teams ft'
+        ' JOIN users u ON ft.owner_id = u.id'
+        ' JOIN fantasy_leagues fl ON ft.league_id = fl.id'
+        ' WHERE ft.id = ? AND ft.league_id = ?',
+        (team_id, league_id)
+    ).fetchone()
+    return _load(row, 'roster')
@@ -0,0 +1,237 @@
+# Roster writes: creating fantasy leagues and teams and add/drop/move
+# requests on fantasy_team_players. Each request runs as one write (see
+# flaskr.writes.write: a savepoint in a group commit of the writer thread,
+# or a short transaction of its own) in which every rule is checked against
+# the rows as they are at that moment: the league's max_teams, one team per
+# owner and one team per player in a league, and ROSTER_SIZE and
+# ROSTER_STARTERS. Roster moves also name the roster_version they were
+# made against (migration 009); if the roster has changed since, the move
+# is rejected with 409 and the client retries from the current roster.
+
+POSITION_TYPES = ('starter', 'bench', 'ir')
+
+
+class RosterError(ValueError):
+    """A roster write that breaks a rule; ``status`` is the HTTP status."""
+
+    status = 400
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+
+class RosterNotFound(RosterError):
+    status = 404
+
+
+class RosterConflict(RosterError):
+    """The write conflicts with the current state of the league or roster."""
+
+    status = 409
+
+
+def _player_id(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise RosterError(f'player_id must be a positive integer, not {value!r}')
+    return value
+
+
+def _position_type(value):
+    if value not in POSITION_TYPES:
+        raise RosterError(f'position_type must be one of {", ".join(POSITION_TYPES)}, not {value!r}')
+    return value
+
+
+def parse_moves(data):
+    """Validate a moves request body.
+
+    ``{"version": 3, "add": [{"player_id": 8, "position_type": "bench"}],
+    "drop": [5], "move": [{"player_id": 2, "position_type": "starter"}]}``
+    becomes ``(3, [(8, 'bench')], [5], [(2, 'starter')])``.  A player may
+    appear only once per request.
+    """
+    if not isinstance(data, dict):
+        raise RosterError('expected a JSON object')
+    version = data.get('version')
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise RosterError('version is required: the roster_version the moves were made against')
+
+    def entries(key):
+        value = data.get(key, [])
+        if not isinstance(value, list):
+            raise RosterError(f'{key} must be a list')
+        return value
+
+    try:
+        add = [(_player_id(entry['player_id']), _position_type(entry.get('position_type', 'bench')))
+               for entry in entries('add')]
+        drop = [_player_id(player_id) for player_id in entries('drop')]
+        move = [(_player_id(entry['player_id']), _position_type(entry['position_type']))
+                for entry in entries('move')]
+    except (KeyError, TypeError, AttributeError):
+        raise RosterError('add and move entries need player_id (and move a position_type)')
+
+    players = [player_id for player_id, _ in add] + drop + [player_id for player_id, _ in move]
+    if not players:
+        raise RosterError('nothing to do: pass add, drop or move')
+    if len(set(players)) != len(players):
+        raise RosterError('a player may appear only once per request')
+    return version, add, drop, move
+
+
+def team_roster(db, league_id, team_id):
+    """``{'id', 'league_id', 'version', 'roster'}`` for a team, or None."""
+    team = db.execute(
+        'SELECT id, league_id, roster_version FROM fantasy_teams WHERE id = ? AND league_id = ?',
+        (team_id, league_id)
+    ).fetchone()
+    if team is None:
+        return None
+    roster = db.execute(
+        'SELECT player_id, position_type FROM fantasy_team_players WHERE fantasy_team_id = ? ORDER BY player_id',
+        (team_id,)
+    )
+    return {
+        'id': team['id'],
+        'league_id': team['league_id'],
+        'version': team['roster_version'],
+        'roster': [{'player_id': row[0], 'position_type': row[1]} for row in roster],
+    }
+
+
+def _name(value):
+    if not isinstance(value, str) or not value.strip() or len(value) > 100:
+        raise RosterError('name must be 1 to 100 characters')
+    return value.strip()
+
+
+def create_league(db, name, commissioner_id, season, max_teams=12, scoring_system='standard'):
+    """Create a league with no teams yet; run inside a write transaction.
+
+    Returns the new league's row as a dict.
+    """
+    name = _name(name)
+    if isinstance(commissioner_id, bool) or not isinstance(commissioner_id, int):
+        raise RosterError('commissioner_id must be an integer')
+    if not isinstance(season, str) or not season.strip():
+        raise RosterError('season is required, e.g. "2024-2025"')
+    if isinstance(max_teams, bool) or not isinstance(max_teams, int) or not 2 <= max_teams <= 32:
+        raise RosterError('max_teams must be an integer from 2 to 32')
+
+    if db.execute('SELECT 1 FROM users WHERE id = ?', (commissioner_id,)).fetchone() is None:
+        raise RosterError(f'no user {commissioner_id}')
+    if db.execute('SELECT 1 FROM scoring_systems WHERE name = ?', (scoring_system,)).fetchone() is None:
+        raise RosterError(f'no scoring system {scoring_system!r}')
+
+    league_id = db.execute(
+        'INSERT INTO fantasy_leagues (name, commissioner_id, max_teams, scoring_system, season)'
+        ' VALUES (?, ?, ?, ?, ?)',
+        (name, commissioner_id, max_teams, scoring_system, season.strip())
+    ).lastrowid
+    league = db.execute(
+        'SELECT id, name, commissioner_id, max_teams, scoring_system, season FROM fantasy_leagues WHERE id = ?',
+        (league_id,)
+    ).fetchone()
+    return dict(league)
+
+
+def create_team(db, league_id, name, owner_id):
+    """Add a team to a league; run inside a write transaction.
+
+    Returns the new team as ``team_roster`` does, plus its name and owner.
+    """
+    name = _name(name)
+    if isinstance(owner_id, bool) or not isinstance(owner_id, int):
+        raise RosterError('owner_id must be an integer')
+
+    league = db.execute(
+        'SELECT max_teams, (SELECT count(*) FROM fantasy_teams WHERE league_id = fl.id) AS teams'
+        ' FROM fantasy_leagues fl WHERE id = ?',
+        (league_id,)
+    ).fetchone()
+    if league is None:
+        raise RosterNotFound(f'no league {league_id}')
+    if db.execute('SELECT 1 FROM users WHERE id = ?', (owner_id,)).fetchone() is None:
+        raise RosterError(f'no user {owner_id}')
+    if league['max_teams'] is not None and league['teams'] >= league['max_teams']:
+        raise RosterConflict(f'league {league_id} is full', max_teams=league['max_teams'])
+    if db.execute(
+        'SELECT 1 FROM fantasy_teams WHERE league_id = ? AND owner_id = ?', (league_id, owner_id)
+    ).fetchone():
+        raise RosterConflict(f'user {owner_id} already has a team in league {league_id}')
+
+    team_id = db.execute(
+        'INSERT INTO fantasy_teams (name, owner_id, league_id) VALUES (?, ?, ?)',
+        (name, owner_id, league_id)
+    ).lastrowid
+    return {'name': name, 'owner_id': owner_id, **team_roster(db, league_id, team_id)}
+
+
+def apply_moves(db, league_id, team_id, version, add=(), drop=(), move=(), roster_size=20, max_starters=16):
+    """Apply one ``parse_moves`` request; run inside a write transaction.
+
+    Every check happens before the first write.  Returns the roster after
+    the moves, with its new version.
+    """
+    team = db.execute(
+        'SELECT roster_version FROM fantasy_teams WHERE id = ? AND league_id = ?', (team_id, league_id)
+    ).fetchone()
+    if team is None:
+        raise RosterNotFound(f'no team {team_id} in league {league_id}')
+    if team['roster_version'] != version:
+        raise RosterConflict(
+            f'roster changed since version {version}', version=team['roster_version']
+        )
+
+    roster = dict(db.execute(
+        'SELECT player_id, position_type FROM fantasy_team_players WHERE fantasy_team_id = ?', (team_id,)
+    ).fetchall())
+    for player_id in [*drop, *(player_id for player_id, _ in move)]:
+        if player_id not in roster:
+            raise RosterError(f'player {player_id} is not on the roster')
+
+    if add:
+        added = [player_id for player_id, _ in add]
+        placeholders = ', '.join('?' for _ in added)
+        known = {row[0] for row in db.execute(f'SELECT id FROM players WHERE id IN ({placeholders})', added)}
+        for player_id in added:
+            if player_id not in known:
+                raise RosterNotFound(f'no player {player_id}')
+        taken = db.execute(
+            'SELECT ftp.player_id, ftp.fantasy_team_id FROM fantasy_team_players ftp'
+            ' JOIN fantasy_teams ft ON ft.id = ftp.fantasy_team_id'
+            f' WHERE ftp.player_id IN ({placeholders}) AND ft.league_id = ?',
+            (*added, league_id)
+        ).fetchone()
+        if taken is not None:
+            raise RosterConflict(
+                f'player {taken[0]} is already on team {taken[1]} in this league',
+                player_id=taken[0], fantasy_team_id=taken[1]
+            )
+
+    for player_id in drop:
+        del roster[player_id]
+    roster.update(move)
+    roster.update(add)
+    if len(roster) > roster_size:
+        raise RosterConflict(f'rosters are limited to {roster_size} players', roster_size=roster_size)
+    if sum(1 for position_type in roster.values() if position_type == 'starter') > max_starters:
+        raise RosterConflict(f'rosters are limited to {max_starters} starters', max_starters=max_starters)
+
+    if drop:
+        db.executemany(
+            'DELETE FROM fantasy_team_players WHERE fantasy_team_id = ? AND player_id = ?',
+            [(team_id, player_id) for player_id in drop]
+        )
+    if move:
+        db.executemany(
+            'UPDATE fantasy_team_players SET position_type = ? WHERE fantasy_team_id = ? AND player_id = ?',
+            [(position_type, team_id, player_id) for player_id, position_type in move]
+        )
+    if add:
+        db.executemany(
+            'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)',
+            [(team_id, player_id, position_type) for player_id, position_type in add]
+        )
+    return team_roster(db, league_id, team_id)
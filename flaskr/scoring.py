@@ -0,0 +1,189 @@
+# Fantasy scoring. A scoring system is a row of per-stat weights in
+# scoring_systems; a player's fantasy points for a league are the weighted sum
+# of their season totals for the league's season. That sum is defined once,
+# in the player_season_points view (migration 012), which the queries here
+# and the standings triggers both read. Points for every team of every
+# requested league are computed in one grouped SQL pass over
+# fantasy_team_players, never a query per player. Only starters score.
+# Points per team are also materialized in fantasy_standings, which triggers
+# keep current (migrations 005 and 012); the functions here are the full
+# recompute that table is checked against.
+
+import click
+
+from flaskr.cache import invalidate
+from flaskr.db import get_db
+
+# keep in sync with the player_season_points view (migrations/012_player_season_points.sql)
+SCORING_STATS = (
+    'goals', 'assists', 'plus_minus', 'penalty_minutes',
+    'wins', 'losses', 'saves', 'goals_against', 'shutouts',
+)
+
+SCORING_POSITIONS = ('starter',)
+
+
+class ScoringError(ValueError):
+    """Raised for scoring system definitions that cannot be used."""
+
+
+def define_system(db, name, weights):
+    """Create or replace scoring system ``name`` from a ``{stat: weight}`` dict.
+
+    Stats left out are weighted zero.  The caller commits.
+    """
+    unknown = set(weights) - set(SCORING_STATS)
+    if unknown:
+        raise ScoringError(f'unknown scoring stats: {", ".join(sorted(unknown))}')
+    try:
+        values = [float(weights.get(column, 0)) for column in SCORING_STATS]
+    except (TypeError, ValueError):
+        raise ScoringError(f'weights for {name!r} must be numbers')
+
+    db.execute(
+        f'INSERT OR REPLACE INTO scoring_systems (name, {", ".join(SCORING_STATS)})'
+        f' VALUES (?, {", ".join("?" for _ in SCORING_STATS)})',
+        (name, *values)
+    )
+
+
+def get_weights(db, name):
+    """The ``{stat: weight}`` dict of scoring system ``name``, or None."""
+    row = db.execute(
+        f'SELECT {", ".join(SCORING_STATS)} FROM scoring_systems WHERE name = ?', (name,)
+    ).fetchone()
+    return dict(zip(SCORING_STATS, row)) if row is not None else None
+
+
+def _league_filter(column, league_ids):
+    if league_ids is None:
+        return '', ()
+    league_ids = tuple(league_ids)
+    return f' WHERE {column} IN ({", ".join("?" for _ in league_ids)})', league_ids
+
+
+def team_points_sql(where=''):
+    """The grouped scoring query behind ``team_points``.
+
+    Takes the ``SCORING_POSITIONS`` parameters first, then any in ``where``.
+    """
+    positions = ', '.join('?' for _ in SCORING_POSITIONS)
+    return (
+        'SELECT ft.league_id, ft.id as fantasy_team_id, COALESCE(SUM(('
+        '   SELECT p.points FROM player_season_points p'
+        '   WHERE p.player_id = ftp.player_id AND p.season = fl.season AND p.scoring_system = fl.scoring_system'
+        ' )), 0) as points'
+        ' FROM fantasy_teams ft'
+        ' JOIN fantasy_leagues fl ON ft.league_id = fl.id'
+        ' LEFT JOIN fantasy_team_players ftp'
+        f'   ON ftp.fantasy_team_id = ft.id AND ftp.position_type IN ({positions})'
+        f'{where}'
+        ' GROUP BY ft.id'
+    )
+
+
+def team_points(db, league_ids=None):
+    """Fantasy points of every team in ``league_ids`` (default: all leagues).
+
+    Returns a cursor of ``(league_id, fantasy_team_id, points)`` rows.  Teams
+    without scoring starters, and leagues whose scoring system is not
+    defined, score zero.
+    """
+    where, params = _league_filter('ft.league_id', league_ids)
+    return db.execute(team_points_sql(where), (*SCORING_POSITIONS, *params))
+
+
+def player_points(db, league_id):
+    """Fantasy points of every rostered player in a league, best first."""
+    return db.execute(
+        'SELECT ft.id as fantasy_team_id, p.id as player_id, p.name, ftp.position_type, COALESCE(('
+        '   SELECT sp.points FROM player_season_points sp'
+        '   WHERE sp.player_id = p.id AND sp.season = fl.season AND sp.scoring_system = fl.scoring_system'
+        ' ), 0) as points'
+        ' FROM fantasy_teams ft'
+        ' JOIN fantasy_leagues fl ON ft.league_id = fl.id'
+        ' JOIN fantasy_team_players ftp ON ftp.fantasy_team_id = ft.id'
+        ' JOIN players p ON ftp.player_id = p.id'
+        ' WHERE ft.league_id = ?'
+        ' ORDER BY points DESC, p.name',
+        (league_id,)
+    ).fetchall()
+
+
+def standings(db, league_id):
+    """Teams of a league ranked by materialized points, as dicts with ``rank``.
+
+    Tied teams share a rank.
+    """
+    return [dict(row) for row in db.execute(
+        'SELECT fantasy_team_id, points, RANK() OVER (ORDER BY points DESC) as rank'
+        ' FROM fantasy_standings'
+        ' WHERE league_id = ?'
+        ' ORDER BY points DESC, fantasy_team_id',
+        (league_id,)
+    )]
+
+
+def rebuild_standings(db):
+    """Recreate ``fantasy_standings`` from a full recompute; the caller commits.
+
+    Returns the number of teams written.
+    """
+    db.execute('DELETE FROM fantasy_standings')
+    return db.execute(
+        'INSERT INTO fantasy_standings (league_id, fantasy_team_id, points)'
+        ' SELECT league_id, fantasy_team_id, points FROM ('
+        + team_points_sql() +
+        ')',
+        SCORING_POSITIONS
+    ).rowcount
+
+
+def check_standings(db, tolerance=1e-6):
+    """Compare ``fantasy_standings`` with a full recompute.
+
+    Returns ``(league_id, fantasy_team_id, stored, expected)`` for every team
+    whose stored points are off by more than ``tolerance`` (incremental
+    updates accumulate floating point rounding) or that is missing from
+    either side.  An empty list means the table is consistent.
+    """
+    stored = {
+        row['fantasy_team_id']: (row['league_id'], row['points'])
+        for row in db.execute('SELECT league_id, fantasy_team_id, points FROM fantasy_standings')
+    }
+    mismatches = []
+    for row in team_points(db):
+        league_id, points = stored.pop(row['fantasy_team_id'], (row['league_id'], None))
+        if points is None or league_id != row['league_id'] or abs(points - row['points']) > tolerance:
+            mismatches.append((row['league_id'], row['fantasy_team_id'], points, row['points']))
+    for team_id, (league_id, points) in stored.items():
+        mismatches.append((league_id, team_id, points, None))
+    return sorted(mismatches)
+
+
+@click.command('rebuild-standings')
+def rebuild_standings_command():
+    """Recompute every team's fantasy points into fantasy_standings."""
+    db = get_db()
+    count = rebuild_standings(db)
+    db.commit()
+    invalidate('fantasy_standings')
+    click.echo(f'Rebuilt standings for {count} teams.')
+
+
+@click.command('check-standings')
+def check_standings_command():
+    """Compare fantasy_standings with a full recompute."""
+    mismatches = check_standings(get_db())
+    for league_id, team_id, stored, expected in mismatches:
+        click.echo(f'  league {league_id} team {team_id}: stored {stored}, expected {expected}')
+    if mismatches:
+        raise click.ClickException(
+            f'{len(mismatches)} teams out of date; run `flask rebuild-standings`.'
+        )
+    click.echo('Standings are consistent.')
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_standings_command)
+    app.cli.add_command(check_standings_command)
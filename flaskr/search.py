@@ -0,0 +1,96 @@
+import re
+
+# name matches outrank team matches, which outrank position matches
+BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Ranking costs a bm25 evaluation per matching row, so queries matching more
+# players than this (short prefixes, whole teams) are not ranked: they return
+# the first name matches found, then other matches, and the user keeps typing.
+RANK_MAX_MATCHES = 1000
+
+_TOKEN = re.compile(r'\w+')
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query, or None if it has no terms.
+
+    Every word must match as a prefix, so "con mcd" finds Connor McDavid
+    while the user is still typing.  Words are quoted, which keeps FTS5
+    operators and punctuation in user input from being interpreted.
+    """
+    terms = _TOKEN.findall(text or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _ranked(db, query, limit):
+    """Up to ``limit`` ``(rowid, rank)`` rows matching ``query``, best first."""
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    return db.execute(
+        'SELECT rowid, rank FROM players_fts'
+        f" WHERE players_fts MATCH ? AND rank MATCH 'bm25({weights})'"
+        ' ORDER BY rank LIMIT ?',
+        (query, limit)
+    ).fetchall()
+
+
+def _unranked(db, query, limit):
+    """Up to ``limit`` ``(rowid, rank)`` rows matching ``query``, name matches first.
+
+    Both lookups stop after ``limit`` rows, whatever the number of matches.
+    """
+    rows = db.execute(
+        'SELECT rowid, 0 FROM players_fts WHERE players_fts MATCH ? LIMIT ?',
+        (f'{{name}} : ({query})', limit)
+    ).fetchall()
+    if len(rows) < limit:
+        seen = [row[0] for row in rows]
+        rows += db.execute(
+            'SELECT rowid, 1 FROM players_fts WHERE players_fts MATCH ?'
+            f' AND rowid NOT IN ({", ".join("?" for _ in seen)}) LIMIT ?',
+            (query, *seen, limit - len(rows))
+        ).fetchall()
+    return rows
+
+
+def search_players(db, text, limit):
+    """Players matching ``text`` on name, team or position, best first."""
+    query = fts_query(text)
+    if query is None:
+        return []
+
+    broad = db.execute(
+        'SELECT 1 FROM players_fts WHERE players_fts MATCH ? LIMIT 1 OFFSET ?',
+        (query, RANK_MAX_MATCHES)
+    ).fetchone() is not None
+    matches = _unranked(db, query, limit) if broad else _ranked(db, query, limit)
+    if not matches:
+        return []
+
+    # only the top rows are joined to players
+    ranks = {row[0]: row[1] for row in matches}
+    players = [dict(row) for row in db.execute(
+        'SELECT p.id, p.name, p.position, p.jersey_number, t.name as team_name, t.abbreviation'
+        ' FROM players p'
+        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
+        f' WHERE p.id IN ({", ".join("?" for _ in ranks)})',
+        tuple(ranks)
+    )]
+    players.sort(key=lambda player: (ranks[player['id']], player['name']))
+    return players
+
+
+def rebuild_search(db):
+    """Recreate ``players_fts`` from ``players``; the caller commits.
+
+    For bulk loads that ran with the sync triggers suspended.  Returns the
+    number of players indexed.
+    """
+    db.execute('DELETE FROM players_fts')
+    return db.execute(
+        'INSERT INTO players_fts (rowid, name, team, position)'
+        " SELECT p.id, p.name, COALESCE(t.city || ' ' || t.name || ' ' || t.abbreviation, ''), p.position"
+        ' FROM players p'
+        ' LEFT JOIN nhl_teams t ON p.team_id = t.id'
+    ).rowcount
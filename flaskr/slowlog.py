@@ -0,0 +1,126 @@
+# Slow-query log (SLOW_QUERY_MS). Statements run through get_db() that take
+# longer than the threshold, counting both execute and fetch time, are written
+# as JSON lines to a rotating file together with their EXPLAIN QUERY PLAN.
+# Plans that SCAN one of SLOW_QUERY_SCAN_TABLES are flagged, since on those
+# tables a full scan usually means a missing index.
+
+import json
+import logging
+import re
+import sqlite3
+import time
+from logging.handlers import RotatingFileHandler
+
+log = logging.getLogger(__name__)
+
+_SOURCE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_NOT_ALIAS = {
+    'where', 'join', 'left', 'right', 'full', 'inner', 'outer', 'cross', 'natural', 'on',
+    'using', 'order', 'group', 'having', 'limit', 'union', 'intersect', 'except', 'window',
+    'indexed', 'not', 'set', 'values', 'returning',
+}
+
+
+def redact(value):
+    """Numbers and NULL as they are; text and blobs as their type and length."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        return f'<str:{len(value)}>'
+    if isinstance(value, bytes):
+        return f'<bytes:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact_params(params):
+    if isinstance(params, dict):
+        return {name: redact(value) for name, value in params.items()}
+    return [redact(value) for value in params]
+
+
+def table_aliases(sql):
+    """``{alias or name: table}`` for the tables a statement reads."""
+    aliases = {}
+    for table, alias in _SOURCE.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def format_plan(rows):
+    """EXPLAIN QUERY PLAN rows as indented lines, as the sqlite3 shell shows them."""
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def scanned_tables(plan, sql, tables):
+    """``{'table', 'detail'}`` for each ``SCAN`` of one of ``tables`` in the plan.
+
+    ``detail`` is the plan line: ``SCAN p`` reads the whole table, while
+    ``SCAN p USING INDEX ...`` walks an index in order, which is cheap
+    only when a LIMIT stops it early.
+    """
+    aliases = table_aliases(sql)
+    scanned = []
+    for line in plan:
+        match = re.match(r'SCAN (\w+)', line.strip())
+        if match:
+            table = aliases.get(match.group(1).lower(), match.group(1).lower())
+            if table in tables:
+                scanned.append({'table': table, 'detail': line.strip()})
+    return scanned
+
+
+class SlowQueryLog:
+    """Writes statements slower than ``threshold`` seconds to ``path``."""
+
+    def __init__(self, path, threshold, max_bytes=10 * 1024 * 1024, backups=5,
+                 scan_tables=('players', 'player_stats', 'fantasy_team_players')):
+        self.path = path
+        self.threshold = threshold
+        self.scan_tables = set(scan_tables)
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                           encoding='utf8', delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.entries = 0
+
+    def explain(self, conn, sql, params):
+        """The statement's query plan, or None if it cannot be explained."""
+        if params is None:
+            return None
+        try:
+            return format_plan(conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall())
+        except sqlite3.Error:
+            return None
+
+    def record(self, conn, sql, params, duration, many=None):
+        """Log one slow statement.
+
+        ``params`` is None when they are unknown (a script, or executemany
+        over an iterator), and then no plan is captured.  ``many`` is the
+        number of executemany parameter sets.
+        """
+        plan = self.explain(conn, sql, params)
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'duration_ms': round(duration * 1000, 3),
+            'sql': ' '.join(sql.split()),
+            'params': redact_params(params) if params is not None else None,
+            'plan': plan,
+            'scans': scanned_tables(plan or (), sql, self.scan_tables),
+        }
+        if many is not None:
+            entry['executemany_rows'] = many
+        self.handler.handle(logging.makeLogRecord({'msg': json.dumps(entry), 'levelno': logging.WARNING}))
+        self.entries += 1
+        if entry['scans']:
+            log.warning('slow query (%.1f ms) %s: %s', entry['duration_ms'],
+                        '; '.join(scan['detail'] for scan in entry['scans']), entry['sql'][:200])
+
+    def close(self):
+        self.handler.close()
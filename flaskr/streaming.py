@@ -0,0 +1,46 @@
+from itertools import islice
+
+from flask import current_app, stream_with_context
+
+
+def iter_chunks(rows, chunk_size):
+    """Yield lists of at most ``chunk_size`` rows.
+
+    Cursors are drained with ``fetchmany`` so only one chunk of rows is
+    materialized at a time; any other iterable is sliced the same way.
+    """
+    if hasattr(rows, 'fetchmany'):
+        while True:
+            chunk = rows.fetchmany(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def json_array_response(rows, chunk_size=None):
+    """Stream ``rows`` (a cursor or iterable of mappings) as a JSON array.
+
+    The array is written one chunk at a time, so peak memory is bounded by
+    API_CHUNK_SIZE rather than by the size of the result set, and the first
+    bytes go out as soon as the first chunk has been fetched.
+    """
+    chunk_size = chunk_size or current_app.config['API_CHUNK_SIZE']
+    dumps = current_app.json.dumps
+
+    @stream_with_context
+    def generate():
+        yield '['
+        separator = ''
+        for chunk in iter_chunks(rows, chunk_size):
+            yield separator + ','.join(dumps(dict(row)) for row in chunk)
+            separator = ','
+        yield ']'
+
+    return current_app.response_class(generate(), mimetype='application/json')
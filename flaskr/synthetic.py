@@ -0,0 +1,377 @@
+# Seeded synthetic data for benchmarks and load tests (`flask generate-data`).
+# The same arguments and seed always produce the same rows. Datasets look
+# like the real thing at any size: 32 NHL teams with full 23-man rosters,
+# the remaining players as unsigned free agents, season stat histories sized
+# by age and talent, and fantasy leagues filled to max_teams whose rosters
+# are drafted from the NHL pool without repeating a player in a league.
+#
+# Rows are generated lazily and inserted in executemany batches with every
+# trigger on the loaded tables suspended and their secondary indexes
+# dropped; the indexes are then built once, and standings, leaders and the
+# search index rebuilt in one pass each, instead of being updated row by
+# row.
+
+import random
+import time
+from itertools import islice
+
+import click
+from flask import current_app
+
+from flaskr.autocomplete import log_reload
+from flaskr.bulk import deferred_indexes, relaxed_durability, suspended_triggers
+from flaskr.cache import invalidate
+from flaskr.db import get_db, init_db
+from flaskr.leaders import rebuild_leaders
+from flaskr.scoring import rebuild_standings
+from flaskr.search import rebuild_search
+
+
+class SyntheticDataError(ValueError):
+    """Raised when synthetic data cannot be generated into the database."""
+
+
+NHL_TEAMS = (
+    ('Bruins', 'Boston', 'BOS', 'Eastern', 'Atlantic'),
+    ('Sabres', 'Buffalo', 'BUF', 'Eastern', 'Atlantic'),
+    ('Red Wings', 'Detroit', 'DET', 'Eastern', 'Atlantic'),
+    ('Panthers', 'Florida', 'FLA', 'Eastern', 'Atlantic'),
+    ('Canadiens', 'Montreal', 'MTL', 'Eastern', 'Atlantic'),
+    ('Senators', 'Ottawa', 'OTT', 'Eastern', 'Atlantic'),
+    ('Lightning', 'Tampa Bay', 'TBL', 'Eastern', 'Atlantic'),
+    ('Maple Leafs', 'Toronto', 'TOR', 'Eastern', 'Atlantic'),
+    ('Hurricanes', 'Carolina', 'CAR', 'Eastern', 'Metropolitan'),
+    ('Blue Jackets', 'Columbus', 'CBJ', 'Eastern', 'Metropolitan'),
+    ('Devils', 'New Jersey', 'NJD', 'Eastern', 'Metropolitan'),
+    ('Islanders', 'New York', 'NYI', 'Eastern', 'Metropolitan'),
+    ('Rangers', 'New York', 'NYR', 'Eastern', 'Metropolitan'),
+    ('Flyers', 'Philadelphia', 'PHI', 'Eastern', 'Metropolitan'),
+    ('Penguins', 'Pittsburgh', 'PIT', 'Eastern', 'Metropolitan'),
+    ('Capitals', 'Washington', 'WSH', 'Eastern', 'Metropolitan'),
+    ('Blackhawks', 'Chicago', 'CHI', 'Western', 'Central'),
+    ('Avalanche', 'Colorado', 'COL', 'Western', 'Central'),
+    ('Stars', 'Dallas', 'DAL', 'Western', 'Central'),
+    ('Wild', 'Minnesota', 'MIN', 'Western', 'Central'),
+    ('Predators', 'Nashville', 'NSH', 'Western', 'Central'),
+    ('Blues', 'St. Louis', 'STL', 'Western', 'Central'),
+    ('Jets', 'Winnipeg', 'WPG', 'Western', 'Central'),
+    ('Ducks', 'Anaheim', 'ANA', 'Western', 'Pacific'),
+    ('Coyotes', 'Arizona', 'ARI', 'Western', 'Pacific'),
+    ('Flames', 'Calgary', 'CGY', 'Western', 'Pacific'),
+    ('Oilers', 'Edmonton', 'EDM', 'Western', 'Pacific'),
+    ('Kings', 'Los Angeles', 'LAK', 'Western', 'Pacific'),
+    ('Sharks', 'San Jose', 'SJS', 'Western', 'Pacific'),
+    ('Kraken', 'Seattle', 'SEA', 'Western', 'Pacific'),
+    ('Canucks', 'Vancouver', 'VAN', 'Western', 'Pacific'),
+    ('Golden Knights', 'Vegas', 'VGK', 'Western', 'Pacific'),
+)
+
+# an NHL roster: 12 forwards, 8 defensemen, 3 goalies
+ROSTER = ('C',) * 4 + ('LW',) * 4 + ('RW',) * 4 + ('D',) * 8 + ('G',) * 3
+NHL_PLAYERS = len(NHL_TEAMS) * len(ROSTER)
+
+# fantasy league max_teams, drawn uniformly
+LEAGUE_SIZES = (8, 10, 12, 12, 12, 14)
+
+FIRST_NAMES = (
+    'Aaron', 'Adam', 'Alex', 'Anders', 'Andrei', 'Anton', 'Artemi', 'Auston', 'Brady', 'Brad',
+    'Brock', 'Cale', 'Carter', 'Charlie', 'Cole', 'Connor', 'Dylan', 'Elias', 'Erik', 'Evan',
+    'Filip', 'Gabriel', 'Ilya', 'Jack', 'Jake', 'Jakob', 'Jason', 'Jesper', 'Joel', 'Jonas',
+    'Josh', 'Juuse', 'Kirill', 'Kyle', 'Leon', 'Logan', 'Lucas', 'Marc', 'Mathew', 'Matt',
+    'Mikael', 'Mikko', 'Mitch', 'Morgan', 'Nathan', 'Nick', 'Nico', 'Nikita', 'Noah', 'Oliver',
+    'Owen', 'Patrik', 'Quinn', 'Rasmus', 'Ryan', 'Samuel', 'Sebastian', 'Seth', 'Sidney', 'Steven',
+    'Teuvo', 'Thatcher', 'Tim', 'Tomas', 'Trevor', 'Troy', 'Tyler', 'Valeri', 'Victor', 'Viktor',
+    'William', 'Yegor', 'Zach',
+)
+
+# surnames are built from a start and an ending, a few with diacritics
+SURNAME_STARTS = (
+    'Mac', 'Mc', 'Ander', 'Berg', 'Black', 'Brod', 'Carl', 'Dahl', 'Eklu', 'Forsb', 'Gaud', 'Hed',
+    'Hell', 'Hisch', 'Jarn', 'Karl', 'Kuch', 'Lars', 'Lind', 'Marn', 'Nyl', 'Ovech', 'Pastr', 'Pett',
+    'Rant', 'Sand', 'Sved', 'Tkach', 'Werns', 'Zib', 'Stütz', 'Höglan', 'Čer', 'Kopi', 'Laf', 'Bouch',
+)
+SURNAME_ENDS = (
+    'son', 'sen', 'ström', 'berg', 'ov', 'ev', 'kin', 'ner', 'nak', 'anen', 'inen', 'ko',
+    'ley', 'ton', 'erson', 'ard', 'ier', 'ault', 'dahl', 'man', 'by', 'chuk', 'avid', 'ay',
+)
+
+LEAGUE_WORDS = (
+    'Frozen', 'Pond', 'Slapshot', 'Blue Line', 'Top Shelf', 'Five Hole', 'Power Play', 'Hat Trick',
+    'Overtime', 'Breakaway', 'Crease', 'Zamboni', 'Barn', 'Beer League', 'Dangle', 'Snipe',
+)
+
+TEAM_NOUNS = (
+    'Pucks', 'Sticks', 'Snipers', 'Grinders', 'Enforcers', 'Dekes', 'Mullets', 'Icers',
+    'Blades', 'Chirpers', 'Sauce', 'Bardown', 'Wheels', 'Biscuits', 'Flow', 'Celly',
+)
+
+CURRENT_SEASON = 2024  # the 2023-24 season
+
+LOAD_TABLES = (
+    'nhl_teams', 'players', 'player_stats', 'users', 'fantasy_leagues', 'fantasy_teams',
+    'fantasy_team_players', 'fantasy_standings', 'player_leaders',
+)
+
+
+def season_name(end_year):
+    """``2024`` -> ``'2023-24'``."""
+    return f'{end_year - 1}-{end_year % 100:02d}'
+
+
+class Generator:
+    """Row generators for one synthetic dataset.
+
+    Each ``*_rows`` method yields tuples in the column order of the
+    matching INSERT in ``TABLES``.  They must be consumed in that order,
+    since players determine stats and rosters.
+    """
+
+    def __init__(self, players=2000, leagues=100, users=None, seasons=5, roster_size=20, seed=0):
+        if players < NHL_PLAYERS:
+            raise SyntheticDataError(f'need at least {NHL_PLAYERS} players for full NHL rosters')
+        self.players = players
+        self.leagues = leagues
+        self.users = users if users is not None else max(leagues * 8, 1)
+        self.seasons = seasons
+        self.roster_size = roster_size
+        self.rng = random.Random(seed)
+        self._surnames = [start + end for start in SURNAME_STARTS for end in SURNAME_ENDS]
+        # per player, filled by player_rows(): position and talent in [0, 1)
+        self._position = [None]
+        self._talent = [0.0]
+        self._age = [0]
+        self._league_seasons = []
+
+    def team_rows(self):
+        for team_id, team in enumerate(NHL_TEAMS, 1):
+            yield (team_id, *team)
+
+    def _name(self):
+        rng = self.rng
+        return f'{rng.choice(FIRST_NAMES)} {rng.choice(self._surnames)}'
+
+    def _body(self):
+        inches = min(80, max(67, round(self.rng.gauss(73, 2))))
+        weight = round(200 + (inches - 73) * 6 + self.rng.gauss(0, 8))
+        return f'{inches // 12}-{inches % 12}', weight
+
+    def player_rows(self):
+        rng = self.rng
+        player_id = 0
+        for team_id in range(1, len(NHL_TEAMS) + 1):
+            numbers = rng.sample(range(1, 99), len(ROSTER))
+            for position, number in zip(ROSTER, numbers):
+                player_id += 1
+                age = round(rng.triangular(19, 40, 26))
+                talent = rng.betavariate(2, 4)
+                self._position.append(position)
+                self._talent.append(talent)
+                self._age.append(age)
+                yield (player_id, self._name(), position, team_id, number, age, *self._body())
+
+        # unsigned players: weaker, and more of them young
+        while player_id < self.players:
+            player_id += 1
+            position = ROSTER[rng.randrange(len(ROSTER))]
+            age = round(rng.triangular(18, 40, 21))
+            talent = rng.betavariate(2, 4) * 0.6
+            self._position.append(position)
+            self._talent.append(talent)
+            self._age.append(age)
+            yield (player_id, self._name(), position, None, None, age, *self._body())
+
+    def stat_rows(self):
+        """Season lines for the last ``seasons`` seasons a player was old enough for."""
+        rng = self.rng
+        depth = {}
+        for player_id in range(1, self.players + 1):
+            position = self._position[player_id]
+            talent = self._talent[player_id]
+            career = min(self.seasons, self._age[player_id] - 18)
+            signed = player_id <= NHL_PLAYERS
+            if signed and position == 'G':
+                # starter, backup, third goalie
+                team = (player_id - 1) // len(ROSTER)
+                depth[team] = depth.get(team, 0) + 1
+                workload = (0.7, 0.3, 0.08)[depth[team] - 1]
+            else:
+                workload = 1.0
+            for end_year in range(CURRENT_SEASON - career + 1, CURRENT_SEASON + 1):
+                if signed:
+                    games = round(82 * workload * min(1.0, rng.uniform(0.55, 1.1)))
+                elif rng.random() < 0.5:
+                    continue
+                else:
+                    games = rng.randint(1, 30)
+                if games == 0:
+                    continue
+                yield self._stat_line(player_id, season_name(end_year), position, talent, games)
+
+    def _stat_line(self, player_id, season, position, talent, games):
+        rng = self.rng
+        if position == 'G':
+            shots = games * rng.randint(25, 32)
+            save_percentage = min(0.94, max(0.86, 0.885 + talent * 0.05 + rng.gauss(0, 0.006)))
+            saves = round(shots * save_percentage)
+            goals_against = shots - saves
+            wins = min(games, round(games * (0.3 + talent * 0.4) * rng.uniform(0.8, 1.2)))
+            losses = games - wins - rng.randint(0, max(0, (games - wins) // 4))
+            shutouts = sum(1 for _ in range(games) if rng.random() < 0.02 + talent * 0.08)
+            minutes = round(games * rng.uniform(57, 60), 1)
+            return (player_id, season, games, 0, rng.randint(0, 3), 0, 0, rng.randint(0, 8),
+                    wins, losses, saves, round(saves / shots, 3), round(goals_against * 60 / minutes, 2),
+                    shutouts, goals_against, minutes)
+
+        scoring = 0.15 if position == 'D' else 0.55
+        goals = round(games * talent * scoring * rng.uniform(0.6, 1.4))
+        assists = round(games * talent * (0.6 if position == 'D' else 0.7) * rng.uniform(0.6, 1.4))
+        return (player_id, season, games, goals, assists, goals + assists,
+                round(rng.gauss((talent - 0.3) * 25, 8)), round(games * rng.uniform(0, 0.9)),
+                0, 0, 0, 0.0, 0.0, 0, 0, round(games * rng.uniform(12, 22), 1))
+
+    def user_rows(self):
+        for user_id in range(1, self.users + 1):
+            first = FIRST_NAMES[user_id % len(FIRST_NAMES)].lower()
+            username = f'{first}{user_id}'
+            yield (user_id, username, f'{username}@example.com', f'pbkdf2:sha256:{user_id:012x}')
+
+    def league_rows(self):
+        rng = self.rng
+        for league_id in range(1, self.leagues + 1):
+            # most leagues play the current season, the rest are last year's
+            season = CURRENT_SEASON if rng.random() < 0.9 else CURRENT_SEASON - 1
+            max_teams = rng.choice(LEAGUE_SIZES)
+            self._league_seasons.append((league_id, max_teams))
+            name = f'{rng.choice(LEAGUE_WORDS)} League {league_id}'
+            scoring = 'standard' if rng.random() < 0.8 else 'points'
+            yield (league_id, name, rng.randint(1, self.users), max_teams, scoring, season_name(season))
+
+    def fantasy_team_rows(self):
+        rng = self.rng
+        team_id = 0
+        for league_id, max_teams in self._league_seasons:
+            owners = rng.sample(range(1, self.users + 1), min(max_teams, self.users))
+            for owner in owners:
+                team_id += 1
+                name = f'{FIRST_NAMES[owner % len(FIRST_NAMES)]}\'s {rng.choice(TEAM_NOUNS)}'
+                yield (team_id, name, owner, league_id)
+
+    def roster_rows(self):
+        """Snake drafts from the NHL pool, best players (plus noise) first."""
+        rng = self.rng
+        # the NHL players, topped up with the best free agents for very large rosters
+        size = min(self.players, max(NHL_PLAYERS, max(LEAGUE_SIZES) * self.roster_size))
+        pool = sorted(range(1, self.players + 1), key=lambda p: (p > NHL_PLAYERS, -self._talent[p]))[:size]
+        first_team = 1
+        for league_id, max_teams in self._league_seasons:
+            teams = min(max_teams, self.users)
+            picks = teams * self.roster_size
+            # noisy draft order: players go within 60 picks of their rank
+            candidates = range(min(len(pool), picks + 60))
+            board = sorted(candidates, key=lambda rank: rank + rng.random() * 60)[:picks]
+            for pick, rank in enumerate(board):
+                draft_round, slot = divmod(pick, teams)
+                if draft_round % 2:
+                    slot = teams - 1 - slot
+                if draft_round < 16:
+                    position_type = 'starter'
+                else:
+                    position_type = 'ir' if rng.random() < 0.05 else 'bench'
+                yield (first_team + slot, pool[rank], position_type)
+            first_team += teams
+
+
+TABLES = (
+    ('nhl_teams', 'team_rows',
+     'INSERT INTO nhl_teams (id, name, city, abbreviation, conference, division) VALUES (?, ?, ?, ?, ?, ?)'),
+    ('players', 'player_rows',
+     'INSERT INTO players (id, name, position, team_id, jersey_number, age, height, weight)'
+     ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)'),
+    ('player_stats', 'stat_rows',
+     'INSERT INTO player_stats (player_id, season, games_played, goals, assists, points, plus_minus,'
+     ' penalty_minutes, wins, losses, saves, save_percentage, goals_against_average, shutouts,'
+     ' goals_against, minutes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'),
+    ('users', 'user_rows',
+     'INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)'),
+    ('fantasy_leagues', 'league_rows',
+     'INSERT INTO fantasy_leagues (id, name, commissioner_id, max_teams, scoring_system, season)'
+     ' VALUES (?, ?, ?, ?, ?, ?)'),
+    ('fantasy_teams', 'fantasy_team_rows',
+     'INSERT INTO fantasy_teams (id, name, owner_id, league_id) VALUES (?, ?, ?, ?)'),
+    ('fantasy_team_players', 'roster_rows',
+     'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)'),
+)
+
+
+def generate(db, batch_size=5000, **options):
+    """Generate a dataset into an empty database in one transaction.
+
+    ``options`` are ``Generator`` arguments.  Returns ``(counts, seconds)``;
+    on any error nothing is written.
+    """
+    if db.execute('SELECT EXISTS (SELECT 1 FROM players UNION ALL SELECT 1 FROM nhl_teams)').fetchone()[0]:
+        raise SyntheticDataError('the database already has teams or players')
+    generator = Generator(**options)
+    counts = {}
+    start = time.perf_counter()
+    with relaxed_durability(db):
+        db.execute('BEGIN')
+        try:
+            with suspended_triggers(db, LOAD_TABLES):
+                with deferred_indexes(db, LOAD_TABLES):
+                    for table, method, sql in TABLES:
+                        rows = getattr(generator, method)()
+                        counts[table] = 0
+                        while True:
+                            batch = list(islice(rows, batch_size))
+                            if not batch:
+                                break
+                            db.executemany(sql, batch)
+                            counts[table] += len(batch)
+                counts['players_fts'] = rebuild_search(db)
+                counts['fantasy_standings'] = rebuild_standings(db)
+                counts['player_leaders'] = rebuild_leaders(db)
+                log_reload(db)
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
+    return counts, time.perf_counter() - start
+
+
+@click.command('generate-data')
+@click.option('--players', type=click.IntRange(min=NHL_PLAYERS), default=2000,
+              show_default=True, help='Players, including 23 per NHL team.')
+@click.option('--leagues', type=click.IntRange(min=0), default=100, show_default=True, help='Fantasy leagues.')
+@click.option('--users', type=click.IntRange(min=1), default=None, help='Users (default: 8 per league).')
+@click.option('--seasons', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Seasons of stat history, ending with 2023-24.')
+@click.option('--roster-size', type=click.IntRange(min=1), default=20, show_default=True,
+              help='Players per fantasy team.')
+@click.option('--seed', type=int, default=0, show_default=True, help='Random seed.')
+@click.option('--reset', is_flag=True, help='Clear the database first (like init-db).')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='Rows per executemany batch (default: BULK_BATCH_SIZE).')
+def generate_data_command(players, leagues, users, seasons, roster_size, seed, reset, batch_size):
+    """Fill an empty database with a seeded synthetic dataset."""
+    if reset:
+        init_db()
+    try:
+        counts, seconds = generate(
+            get_db(), batch_size or current_app.config['BULK_BATCH_SIZE'], players=players, leagues=leagues,
+            users=users, seasons=seasons, roster_size=roster_size, seed=seed,
+        )
+    except SyntheticDataError as e:
+        raise click.ClickException(f'{e}; pass --reset to start from an empty database')
+
+    invalidate(*LOAD_TABLES)
+
+    total = sum(counts.values())
+    for table, count in counts.items():
+        click.echo(f'  {table}: {count} rows')
+    rate = total / seconds if seconds else float(total)
+    click.echo(f'Generated {total} rows in {seconds:.2f}s ({rate:,.0f} rows/sec).')
+
+
+def init_app(app):
+    app.cli.add_command(generate_data_command)
@@ -0,0 +1,345 @@
+# Writes that do not fail under contention. SQLite allows one writer at a
+# time; a transaction that starts with a plain BEGIN and upgrades to a write
+# lock later can fail with SQLITE_BUSY no matter how long it waits, so
+# writes here take the lock up front with BEGIN IMMEDIATE. Each attempt
+# waits at most WRITE_BUSY_TIMEOUT for the lock; when it is still held, the
+# attempt is retried after an exponential, jittered backoff (WRITE_BACKOFF
+# doubling up to WRITE_MAX_BACKOFF), WRITE_RETRIES times.
+#
+# With WRITE_QUEUE on, request threads do not write at all: ``write`` hands
+# the work to one writer thread per process (WriteQueue), which owns a
+# dedicated connection outside the pool. Request threads then never queue
+# on the lock against each other, and the writer runs everything waiting in
+# its queue, up to WRITE_QUEUE_BATCH writes, as one group commit. Reads
+# keep using the pool and stay parallel.
+
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from flask import current_app, jsonify
+
+from flaskr.db import connect, get_db
+from flaskr.profiling import _percentiles
+
+log = logging.getLogger(__name__)
+
+_BUSY_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED}
+
+
+class WriteBusy(Exception):
+    """Raised when the write lock could not be taken within the retries."""
+
+
+class WriteQueueFull(WriteBusy):
+    """Raised when the write queue stayed full for WRITE_QUEUE_TIMEOUT."""
+
+
+class WriterStopped(WriteBusy):
+    """Raised for writes in hand when the writer thread died."""
+
+
+def is_busy(exc):
+    """Whether ``exc`` means another connection holds the lock."""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    code = getattr(exc, 'sqlite_errorcode', None)
+    if code is not None:
+        # extended codes (SQLITE_BUSY_SNAPSHOT, ...) keep the primary code in the low byte
+        return code & 0xff in _BUSY_CODES
+    message = str(exc)
+    return 'locked' in message or 'busy' in message
+
+
+def backoff_delays(retries, backoff, max_backoff, rng=random):
+    """Sleep times before each retry: doubling from ``backoff``, capped, with full jitter."""
+    return [rng.uniform(0, min(max_backoff, backoff * 2 ** attempt)) for attempt in range(retries)]
+
+
+def begin_immediate(db, retries, backoff, max_backoff):
+    """``BEGIN IMMEDIATE``, retried with backoff while the database is busy.
+
+    Raises ``WriteBusy`` once the retries are used up.  Under WAL nothing
+    after this can be busy: the lock is held until commit or rollback.
+    """
+    delays = backoff_delays(retries, backoff, max_backoff)
+    for attempt in range(retries + 1):
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if not is_busy(e):
+                raise
+            if attempt == retries:
+                log.warning('write lock still busy after %d attempts', attempt + 1)
+                raise WriteBusy(f'database busy after {attempt + 1} attempts') from e
+            time.sleep(delays[attempt])
+
+
+def write_transaction(db, work, retries=None, backoff=None, max_backoff=None, busy_timeout=None):
+    """Run ``work(db)`` in a ``BEGIN IMMEDIATE`` transaction and commit.
+
+    Returns ``work``'s result.  Exceptions from ``work`` roll back and
+    propagate; a busy database is retried as described above and raises
+    ``WriteBusy`` once the retries are used up.  Omitted arguments come
+    from the WRITE_* config.
+    """
+    config = current_app.config
+    retries = config['WRITE_RETRIES'] if retries is None else retries
+    backoff = config['WRITE_BACKOFF'] if backoff is None else backoff
+    max_backoff = config['WRITE_MAX_BACKOFF'] if max_backoff is None else max_backoff
+    busy_timeout = config['WRITE_BUSY_TIMEOUT'] if busy_timeout is None else busy_timeout
+
+    previous_timeout = db.execute('PRAGMA busy_timeout').fetchone()[0]
+    db.execute(f'PRAGMA busy_timeout = {int(busy_timeout * 1000)}')
+    try:
+        begin_immediate(db, retries, backoff, max_backoff)
+        try:
+            result = work(db)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        return result
+    finally:
+        db.execute(f'PRAGMA busy_timeout = {int(previous_timeout)}')
+
+
+class _Write:
+    __slots__ = ('work', 'future', 'queued', 'started')
+
+    def __init__(self, work):
+        self.work = work
+        self.future = Future()
+        self.queued = time.perf_counter()
+        self.started = None
+
+
+class WriteQueue:
+    """A writer thread that runs queued writes as group commits.
+
+    ``submit`` puts ``work(db)`` on a bounded queue and returns a
+    ``Future``.  The writer takes everything waiting, up to
+    WRITE_QUEUE_BATCH writes, and runs it in one ``BEGIN IMMEDIATE`` transaction, each write
+    inside its own savepoint: a write that raises is rolled back alone and
+    its exception goes to its future, the rest commit together.  Futures
+    are resolved only after the commit, so a caller never sees a result
+    that could still be rolled back.  The thread and its connection are
+    started on first use; the WRITE_* settings are read from the app's
+    config for each batch, like ``write_transaction`` does per call.  If
+    the thread dies (a ``BaseException`` escaping a write), the writes it
+    held fail with ``WriterStopped`` and the next ``submit`` starts a new
+    one.
+
+    Batch sizes and latencies are kept for the last ``samples`` batches
+    and writes; the counters cover every write since startup.
+    """
+
+    def __init__(self, app, max_size=1000, samples=1000):
+        self.app = app
+        self._queue = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batch_sizes = deque(maxlen=samples)
+        self._commit_times = deque(maxlen=samples)
+        self._waits = deque(maxlen=samples)
+        self._latencies = deque(maxlen=samples)
+        self.writes = 0
+        self.errors = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected = 0
+        self.max_depth = 0
+
+    def submit(self, work):
+        """Queue ``work(db)`` and return a ``Future`` for its result.
+
+        ``work`` runs on the writer thread, inside a transaction it must not
+        commit or roll back itself.  Raises ``WriteQueueFull`` when no slot
+        frees up within WRITE_QUEUE_TIMEOUT seconds.
+        """
+        self.start()
+        write = _Write(work)
+        try:
+            self._queue.put(write, timeout=self.app.config['WRITE_QUEUE_TIMEOUT'])
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise WriteQueueFull(f'write queue full ({self._queue.maxsize} writes waiting)')
+        depth = self._queue.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+        return write.future
+
+    def run(self, work):
+        """``submit`` and wait for the result (or exception) of ``work``.
+
+        A write still queued after WRITE_QUEUE_RESULT_TIMEOUT seconds is
+        cancelled, never runs, and raises ``WriteBusy``.  One the writer
+        already started is waited on until it commits or fails: answering
+        busy then would invite a retry of a write that may yet commit.
+        """
+        future = self.submit(work)
+        timeout = self.app.config['WRITE_QUEUE_RESULT_TIMEOUT']
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteBusy(f'write not started within {timeout}s (cancelled)') from None
+            return future.result()
+
+    def start(self):
+        """Open the writer connection and start the thread, if not running."""
+        with self._lock:
+            if self._thread is None:
+                config = self.app.config
+                db = connect(config['DATABASE'], config['DATABASE_CACHE_SIZE'], config['DATABASE_MMAP_SIZE'])
+                self._thread = threading.Thread(target=self._run, args=(db,), name='db-writer', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Run the writes already queued, then stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def after_fork(self):
+        """Start over in a forked worker, which must open its own connection."""
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self, db):
+        config = self.app.config
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not None and len(batch) < config['WRITE_QUEUE_BATCH']:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = batch[-1] is None
+                if stopping:
+                    batch.pop()
+                # skip writes whose caller gave up waiting (``run``)
+                batch = [write for write in batch if write.future.set_running_or_notify_cancel()]
+                if batch:
+                    self._write_batch(db, batch)
+                if stopping:
+                    return
+        finally:
+            with self._lock:
+                # an exception ended the loop: let the next submit start over
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            db.close()
+
+    def _write_batch(self, db, batch):
+        config = self.app.config
+        began = time.perf_counter()
+        outcomes = []
+        failure = None
+        try:
+            db.execute(f'PRAGMA busy_timeout = {int(config["WRITE_BUSY_TIMEOUT"] * 1000)}')
+            begin_immediate(db, config['WRITE_RETRIES'], config['WRITE_BACKOFF'], config['WRITE_MAX_BACKOFF'])
+            try:
+                for write in batch:
+                    write.started = time.perf_counter()
+                    db.execute('SAVEPOINT write')
+                    try:
+                        outcomes.append((write.work(db), None))
+                    except Exception as e:
+                        db.execute('ROLLBACK TO write')
+                        outcomes.append((None, e))
+                    db.execute('RELEASE write')
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        except Exception as e:
+            if not isinstance(e, WriteBusy):
+                log.exception('group commit of %d writes failed', len(batch))
+            failure = e
+        except BaseException as e:
+            log.error('writer thread stopped by %r; %d writes rolled back', e, len(batch))
+            failure = WriterStopped(f'writer stopped by {type(e).__name__}; nothing was written')
+            raise
+        finally:
+            # every future is resolved, whatever ended the batch
+            if failure is not None:
+                outcomes = [(None, failure)] * len(batch)
+            self._finish_batch(batch, outcomes, began, failed=failure is not None)
+
+    def _finish_batch(self, batch, outcomes, began, failed):
+        done = time.perf_counter()
+        for write, (result, error) in zip(batch, outcomes):
+            if error is None:
+                write.future.set_result(result)
+            else:
+                write.future.set_exception(error)
+        with self._lock:
+            self.batches += 1
+            self.failed_batches += failed
+            self.writes += len(batch)
+            self.errors += sum(1 for _, error in outcomes if error is not None)
+            self._batch_sizes.append(len(batch))
+            self._commit_times.append(done - began)
+            for write in batch:
+                self._waits.append((write.started or began) - write.queued)
+                self._latencies.append(done - write.queued)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': self._thread is not None,
+                'depth': self._queue.qsize(),
+                'max_depth': self.max_depth,
+                'max_size': self._queue.maxsize,
+                'writes': self.writes,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'writes_per_batch': round(self.writes / self.batches, 2) if self.batches else None,
+                'batch_size': _percentiles(self._batch_sizes, scale=1),
+                'queue_wait_ms': _percentiles(self._waits),
+                'commit_ms': _percentiles(self._commit_times),
+                'latency_ms': _percentiles(self._latencies),
+            }
+
+
+def get_write_queue(app=None):
+    app = app or current_app
+    return app.extensions['write_queue']
+
+
+def write(work):
+    """Run ``work(db)`` as one committed write and return its result.
+
+    Goes through the app's write queue when WRITE_QUEUE is on, otherwise
+    runs as a ``write_transaction`` on this request's connection.
+    """
+    if current_app.config['WRITE_QUEUE']:
+        return get_write_queue().run(work)
+    return write_transaction(get_db(), work)
+
+
+def write_queue_stats():
+    """Writer thread counters: queue depth, batch sizes and latencies."""
+    return jsonify(get_write_queue().stats())
+
+
+def init_app(app):
+    app.extensions['write_queue'] = WriteQueue(
+        app, app.config['WRITE_QUEUE_SIZE'], app.config['PROFILING_SAMPLES']
+    )
+    if app.config['STATS_ENDPOINTS']:
+        app.add_url_rule('/_writes', 'write_queue_stats', write_queue_stats)
@@ -7,11 +7,14 @@ import sqlite3
 import os
 from datetime import datetime
 
+from flaskr.bulk import STAT_COLUMNS, BulkLoader
+
 def init_test_data():
     # Connect to the database
     db_path = 'instance/hockey.sqlite'
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    loader = BulkLoader(conn)
 
     print("Adding test data to database...")
 
@@ -58,82 +61,73 @@ def init_test_data():
         ('Golden Knights', 'Vegas', 'VGK', 'Western', 'Pacific'),
     ]
 
-    cursor.executemany(
-        'INSERT INTO nhl_teams (name, city, abbreviation, conference, division) VALUES (?, ?, ?, ?, ?)',
-        teams_data
+    loader.load_teams(
+        dict(zip(('name', 'city', 'abbreviation', 'conference', 'division'), team))
+        for team in teams_data
     )
 
     # Add some star players
     players_data = [
         # Boston Bruins
-        ('David Pastrnak', 'RW', 1, 88, 28, '6-0', 194),
-        ('Patrice Bergeron', 'C', 1, 37, 38, '6-1', 195),
-        ('Brad Marchand', 'LW', 1, 63, 35, '5-9', 181),
-        ('Charlie McAvoy', 'D', 1, 73, 26, '6-0', 208),
-        ('Jeremy Swayman', 'G', 1, 1, 25, '6-2', 192),
+        ('David Pastrnak', 'RW', 'BOS', 88, 28, '6-0', 194),
+        ('Patrice Bergeron', 'C', 'BOS', 37, 38, '6-1', 195),
+        ('Brad Marchand', 'LW', 'BOS', 63, 35, '5-9', 181),
+        ('Charlie McAvoy', 'D', 'BOS', 73, 26, '6-0', 208),
+        ('Jeremy Swayman', 'G', 'BOS', 1, 25, '6-2', 192),
 
         # Toronto Maple Leafs
-        ('Auston Matthews', 'C', 8, 34, 26, '6-3', 220),
-        ('Mitch Marner', 'RW', 8, 16, 26, '6-0', 175),
-        ('William Nylander', 'RW', 8, 88, 27, '6-0', 196),
-        ('Morgan Rielly', 'D', 8, 44, 29, '6-0', 218),
-        ('Joseph Woll', 'G', 8, 60, 25, '6-3', 203),
+        ('Auston Matthews', 'C', 'TOR', 34, 26, '6-3', 220),
+        ('Mitch Marner', 'RW', 'TOR', 16, 26, '6-0', 175),
+        ('William Nylander', 'RW', 'TOR', 88, 27, '6-0', 196),
+        ('Morgan Rielly', 'D', 'TOR', 44, 29, '6-0', 218),
+        ('Joseph Woll', 'G', 'TOR', 60, 25, '6-3', 203),
 
         # Tampa Bay Lightning
-        ('Steven Stamkos', 'C', 7, 91, 34, '6-1', 188),
-        ('Nikita Kucherov', 'RW', 7, 86, 30, '5-11', 178),
-        ('Victor Hedman', 'D', 7, 77, 33, '6-6', 223),
-        ('Andrei Vasilevskiy', 'G', 7, 88, 29, '6-3', 225),
+        ('Steven Stamkos', 'C', 'TBL', 91, 34, '6-1', 188),
+        ('Nikita Kucherov', 'RW', 'TBL', 86, 30, '5-11', 178),
+        ('Victor Hedman', 'D', 'TBL', 77, 33, '6-6', 223),
+        ('Andrei Vasilevskiy', 'G', 'TBL', 88, 29, '6-3', 225),
 
         # Edmonton Oilers
-        ('Connor McDavid', 'C', 26, 97, 27, '6-1', 193),
-        ('Leon Draisaitl', 'C', 26, 29, 28, '6-2', 208),
-        ('Ryan Nugent-Hopkins', 'C', 26, 93, 30, '6-0', 184),
-        ('Evan Bouchard', 'D', 26, 2, 24, '6-2', 193),
-        ('Stuart Skinner', 'G', 26, 74, 25, '6-4', 206),
+        ('Connor McDavid', 'C', 'EDM', 97, 27, '6-1', 193),
+        ('Leon Draisaitl', 'C', 'EDM', 29, 28, '6-2', 208),
+        ('Ryan Nugent-Hopkins', 'C', 'EDM', 93, 30, '6-0', 184),
+        ('Evan Bouchard', 'D', 'EDM', 2, 24, '6-2', 193),
+        ('Stuart Skinner', 'G', 'EDM', 74, 25, '6-4', 206),
 
         # Colorado Avalanche
-        ('Nathan MacKinnon', 'C', 22, 29, 28, '6-0', 200),
-        ('Mikko Rantanen', 'RW', 22, 96, 27, '6-4', 215),
-        ('Cale Makar', 'D', 22, 8, 25, '5-11', 187),
-        ('Alexandar Georgiev', 'G', 22, 40, 28, '6-1', 170),
+        ('Nathan MacKinnon', 'C', 'COL', 29, 28, '6-0', 200),
+        ('Mikko Rantanen', 'RW', 'COL', 96, 27, '6-4', 215),
+        ('Cale Makar', 'D', 'COL', 8, 25, '5-11', 187),
+        ('Alexandar Georgiev', 'G', 'COL', 40, 28, '6-1', 170),
 
         # Free agents / unsigned players
         ('Tyler Seguin', 'C', None, None, 32, '6-1', 200),
         ('Johnny Gaudreau', 'LW', None, None, 30, '5-9', 165),
     ]
 
-    cursor.executemany(
-        'INSERT INTO players (name, position, team_id, jersey_number, age, height, weight) VALUES (?, ?, ?, ?, ?, ?, ?)',
-        players_data
-    )
+    player_fields = ('name', 'position', 'team', 'jersey_number', 'age', 'height', 'weight')
+    loader.load_players(dict(zip(player_fields, player)) for player in players_data)
 
     # Add some player stats for 2023-24 season
-    # Get player IDs first
-    cursor.execute('SELECT id, name FROM players')
-    player_ids = {name: id for id, name in cursor.fetchall()}
+    # (the loader resolves player names to ids from its in-memory index)
 
     stats_data = [
         # David Pastrnak
-        (player_ids['David Pastrnak'], '2023-24', 82, 47, 63, 110, 8, 42, 0, 0, 0, 0.0, 0.0, 0),
+        ('David Pastrnak', '2023-24', 82, 47, 63, 110, 8, 42, 0, 0, 0, 0.0, 0.0, 0),
         # Auston Matthews
-        (player_ids['Auston Matthews'], '2023-24', 81, 69, 38, 107, 5, 55, 0, 0, 0, 0.0, 0.0, 0),
+        ('Auston Matthews', '2023-24', 81, 69, 38, 107, 5, 55, 0, 0, 0, 0.0, 0.0, 0),
         # Connor McDavid
-        (player_ids['Connor McDavid'], '2023-24', 76, 32, 100, 132, 21, 24, 0, 0, 0, 0.0, 0.0, 0),
+        ('Connor McDavid', '2023-24', 76, 32, 100, 132, 21, 24, 0, 0, 0, 0.0, 0.0, 0),
         # Nathan MacKinnon
-        (player_ids['Nathan MacKinnon'], '2023-24', 82, 51, 89, 140, 28, 94, 0, 0, 0, 0.0, 0.0, 0),
+        ('Nathan MacKinnon', '2023-24', 82, 51, 89, 140, 28, 94, 0, 0, 0, 0.0, 0.0, 0),
         # Jeremy Swayman (goalie stats)
-        (player_ids['Jeremy Swayman'], '2023-24', 44, 0, 0, 0, 0, 0, 25, 10, 1114, 0.916, 2.53, 3),
+        ('Jeremy Swayman', '2023-24', 44, 0, 0, 0, 0, 0, 25, 10, 1114, 0.916, 2.53, 3),
         # Andrei Vasilevskiy (goalie stats)
-        (player_ids['Andrei Vasilevskiy'], '2023-24', 53, 0, 0, 0, 0, 0, 28, 19, 1387, 0.900, 2.90, 4),
+        ('Andrei Vasilevskiy', '2023-24', 53, 0, 0, 0, 0, 0, 28, 19, 1387, 0.900, 2.90, 4),
     ]
 
-    cursor.executemany('''
-        INSERT INTO player_stats
-        (player_id, season, games_played, goals, assists, points, plus_minus, penalty_minutes,
-         wins, losses, saves, save_percentage, goals_against_average, shutouts)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', stats_data)
+    loader.load_stats(dict(zip(('player', 'season') + STAT_COLUMNS, stat)) for stat in stats_data)
 
     # Add some fantasy users
     users_data = [
@@ -169,6 +163,7 @@ def init_test_data():
     )
 
     # Add some players to fantasy rosters
+    player_ids = loader.player_ids
     fantasy_roster_data = [
         # Ice Breakers roster
         (1, player_ids['Connor McDavid'], 'starter'),
@@ -2,15 +2,41 @@
 """
 Test runner for the Fantasy Hockey Flask application.
 Runs all tests using Python's built-in unittest module.
+
+With ``--parallel`` the test modules are spread over worker processes.
+Every test gets its own copy of the template database (see
+``tests/test_base.py``), so workers never share a database file.
 """
 
+import argparse
+import io
+import os
 import sys
+import time
 import unittest
-import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+from tests.test_base import FIXTURE_STATS
+
+
+def report_fixtures(stats):
+    """Print how much CPU time database fixtures took and what the template saved."""
+    if not stats['copies']:
+        return
+    # without the template every test would build the schema and fixtures
+    # itself; the baseline is a warm build, timed once per template, so
+    # imports and cold caches (paid either way, once per process) are not
+    # counted as saved
+    per_build = stats['build_seconds'] / stats['templates']
+    saved = per_build * (stats['copies'] - stats['templates']) - stats['copy_seconds']
+    print(f"Fixtures (CPU time): {stats['templates']} template build(s) in {stats['template_seconds']:.2f}s,"
+          f" {stats['copies']} copies in {stats['copy_seconds']:.2f}s;"
+          f" a warm build takes {per_build * 1000:.0f} ms (~{saved:.1f}s saved vs. building per test)")
+
+
 def run_all_tests():
     """Discover and run all tests."""
     # Discover all tests in the tests directory
@@ -21,10 +47,12 @@ def run_all_tests():
     # Run the tests with detailed output
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
+    report_fixtures(FIXTURE_STATS)
 
     # Return appropriate exit code
     return 0 if result.wasSuccessful() else 1
 
+
 def run_specific_test(test_module):
     """Run a specific test module."""
     try:
@@ -32,16 +60,77 @@ def run_specific_test(test_module):
         suite = unittest.TestLoader().loadTestsFromName(f'tests.{test_module}')
         runner = unittest.TextTestRunner(verbosity=2)
         result = runner.run(suite)
+        report_fixtures(FIXTURE_STATS)
         return 0 if result.wasSuccessful() else 1
     except ImportError:
         print(f"Error: Could not import test module 'tests.{test_module}'")
         return 1
 
+
+def _run_module(name):
+    """Run one test module in a worker; returns its results and timings."""
+    before = dict(FIXTURE_STATS)
+    stream = io.StringIO()
+    start = time.perf_counter()
+    suite = unittest.TestLoader().loadTestsFromName(name)
+    result = unittest.TextTestRunner(stream=stream, verbosity=1).run(suite)
+    return {
+        'module': name,
+        'pid': os.getpid(),
+        'tests': result.testsRun,
+        'ok': result.wasSuccessful(),
+        'seconds': time.perf_counter() - start,
+        'output': stream.getvalue(),
+        'fixtures': {key: FIXTURE_STATS[key] - before[key] for key in FIXTURE_STATS},
+    }
+
+
+def run_parallel(workers):
+    """Run each test module in a pool of ``workers`` processes."""
+    modules = sorted(
+        f'tests.{name[:-3]}' for name in os.listdir('tests')
+        if name.startswith('test_') and name.endswith('.py')
+    )
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_module, name) for name in modules]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = 'ok' if result['ok'] else 'FAILED'
+            print(f"{result['module']:<32} {result['tests']:4d} tests {result['seconds']:6.2f}s  {status}")
+    wall = time.perf_counter() - start
+
+    failed = [result for result in results if not result['ok']]
+    for result in failed:
+        print('=' * 70)
+        print(result['module'])
+        print(result['output'])
+
+    busy = sum(result['seconds'] for result in results)
+    print('-' * 70)
+    # busy / wall is the speedup over running the same modules one after another
+    print(f"Ran {sum(result['tests'] for result in results)} tests in {wall:.2f}s wall"
+          f" on {len({result['pid'] for result in results})} processes"
+          f" ({busy:.2f}s of module time, {busy / wall:.1f}x)")
+    report_fixtures({key: sum(result['fixtures'][key] for result in results) for key in FIXTURE_STATS})
+    print('FAILED' if failed else 'OK')
+    return 1 if failed else 0
+
+
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description='Run the test suite')
+    parser.add_argument('module', nargs='?', help='Test module to run, e.g. test_routes')
+    parser.add_argument('--parallel', type=int, nargs='?', const=os.cpu_count() or 1, metavar='N',
+                        help='Run test modules in N worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.module:
         # Run specific test module
-        test_module = sys.argv[1]
-        exit_code = run_specific_test(test_module)
+        exit_code = run_specific_test(args.module)
+    elif args.parallel:
+        exit_code = run_parallel(args.parallel)
     else:
         # Run all tests
         print("Running all tests for Fantasy Hockey Flask application...")
@@ -37,6 +37,29 @@ class AppTestCase(unittest.TestCase):
         self.assertIn('teams', blueprint_names)
         self.assertIn('leagues', blueprint_names)
 
+    def test_templates_preloaded(self):
+        """Test that templates are compiled into the Jinja cache at startup."""
+        app = create_app({'TESTING': True})
+        cached = {key[1] for key in app.jinja_env.cache.keys()}
+        self.assertIn('players.html', cached)
+        self.assertIn('base.html', cached)
+
+        app = create_app({'TESTING': True, 'TEMPLATES_PRELOAD': False})
+        self.assertEqual(len(app.jinja_env.cache), 0)
+
+    def test_stats_endpoints_off_by_default(self):
+        """Test that the internal counters are only served when STATS_ENDPOINTS is on."""
+        paths = ('/_pool', '/_cache', '/_writes', '/_metrics')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = os.path.join(temp_dir, 'hockey.sqlite')
+            app = create_app({'TESTING': True, 'DATABASE': database, 'PROFILING': True})
+            for path in paths:
+                self.assertEqual(app.test_client().get(path).status_code, 404, path)
+
+            app = create_app({'TESTING': True, 'DATABASE': database, 'PROFILING': True, 'STATS_ENDPOINTS': True})
+            for path in paths:
+                self.assertEqual(app.test_client().get(path).status_code, 200, path)
+
     def test_app_context(self):
         """Test that app context works correctly."""
         app = create_app({'TESTING': True})
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from flaskr.asgi import AsgiAdapter
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+async def call(adapter, path, query=b'', method='GET', headers=(), body=b'', disconnect_after=None):
+    """Run one HTTP request through ``adapter``; returns the sent messages."""
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'query_string': query, 'root_path': '', 'headers': list(headers),
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+    }
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+
+    await adapter(scope, receive, send)
+    return messages
+
+
+def response(messages):
+    """``(status, headers, body)`` from sent messages."""
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
+
+
+class AsgiTestCase(HockeyTestCase):
+    """Test the ASGI adapter and the /changes long-poll."""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config.update(CHANGES_POLL_INTERVAL=0.01)
+        self.adapter = AsgiAdapter(self.app, workers=2)
+
+    def tearDown(self):
+        self.adapter.executor.shutdown()
+        super().tearDown()
+
+    def _request(self, *args, **kwargs):
+        return response(asyncio.run(call(self.adapter, *args, **kwargs)))
+
+    def _write(self):
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE players SET age = age + 1 WHERE id = 1")
+            db.commit()
+
+    def test_flask_views(self):
+        """Test that views answer the same as under WSGI."""
+        status, headers, body = self._request('/players/api', b'limit=2&fields=id,name')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(body, self.client.get('/players/api?limit=2&fields=id,name').data)
+        self.assertIn(b'rel="next"', headers[b'link'])
+
+        status, _, _ = self._request('/players/api', headers=[(b'if-none-match', headers[b'etag'])],
+                                     query=b'limit=2&fields=id,name')
+        self.assertEqual(status, 304)
+
+        status, _, body = self._request('/players/9999')
+        self.assertEqual((status, body), (404, b'Player not found'))
+
+    def test_streams_api_chunks(self):
+        """Test that streamed JSON goes out as several body messages."""
+        self.app.config['API_CHUNK_SIZE'] = 1
+        messages = asyncio.run(call(self.adapter, '/players/api'))
+        self.assertGreater(len(messages), 4)
+        self.assertTrue(all(message['more_body'] for message in messages[1:-1]))
+        self.assertEqual(len(json.loads(response(messages)[2])), 4)
+
+    def test_changes_returns_current_token(self):
+        """Test that a stale or missing token is answered at once."""
+        status, _, body = self._request('/changes', b'tables=players,nhl_teams')
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertTrue(data['changed'])
+        self.assertEqual(set(data['versions']), {'players', 'nhl_teams'})
+        self.assertEqual(data, json.loads(self.client.get('/changes?tables=players,nhl_teams').data))
+
+        query = f'tables=nhl_teams,players&since={data["token"]}&timeout=0.05'
+        status, _, body = self._request('/changes', query.encode())
+        self.assertFalse(json.loads(body)['changed'])
+        self.assertFalse(json.loads(self.client.get('/changes?' + query).data)['changed'])
+
+    def test_changes_waits_for_write(self):
+        """Test that a long-poll returns once a watched table is written."""
+        token = json.loads(self._request('/changes', b'tables=players')[2])['token']
+        threading.Timer(0.1, self._write).start()
+        start = time.monotonic()
+        _, _, body = self._request('/changes', f'tables=players&since={token}&timeout=5'.encode())
+        self.assertTrue(json.loads(body)['changed'])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_changes_errors_and_disconnect(self):
+        """Test bad arguments and a client that goes away mid-wait."""
+        for query in (b'', b'tables=nope', b'tables=players&timeout=soon'):
+            status, _, body = self._request('/changes', query)
+            self.assertEqual(status, 400, query)
+            self.assertIn(b'error', body)
+            self.assertEqual(self.client.get('/changes?' + query.decode()).status_code, 400)
+
+        token = json.loads(self._request('/changes', b'tables=players')[2])['token']
+        messages = asyncio.run(call(self.adapter, '/changes', f'tables=players&since={token}&timeout=5'.encode(),
+                                    disconnect_after=0.05))
+        self.assertEqual(messages, [])
+
+    def test_long_polls_hold_no_threads(self):
+        """Test that API requests are served while long-polls outnumber workers."""
+        token = json.loads(self._request('/changes', b'tables=players')[2])['token']
+
+        async def scenario():
+            query = f'tables=players&since={token}&timeout=5'.encode()
+            polls = [asyncio.ensure_future(call(self.adapter, '/changes', query)) for _ in range(20)]
+            await asyncio.sleep(0.05)
+            start = time.monotonic()
+            api = await call(self.adapter, '/players/api', b'limit=1')
+            elapsed = time.monotonic() - start
+            self.assertFalse(any(poll.done() for poll in polls))
+            await asyncio.get_running_loop().run_in_executor(None, self._write)
+            return api, elapsed, await asyncio.gather(*polls)
+
+        api, elapsed, polls = asyncio.run(scenario())
+        self.assertEqual(response(api)[0], 200)
+        self.assertLess(elapsed, 1)
+        self.assertTrue(all(json.loads(response(poll)[2])['changed'] for poll in polls))
+        self.assertLessEqual(len(self.adapter.executor._threads), 2)
+
+    def test_lifespan(self):
+        """Test that shutdown stops the workers and closes the pool."""
+        sent = []
+        incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.adapter({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        with self.assertRaises(RuntimeError):
+            self.adapter.executor.submit(print)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import time
+import unittest
+from flaskr.autocomplete import PrefixIndex, get_index, log_reload, normalize
+from flaskr.db import get_db, get_pool
+from tests.test_base import HockeyTestCase
+
+
+class AutocompleteTestCase(HockeyTestCase):
+    """Test the in-memory player name autocomplete."""
+
+    def _names(self, prefix, limit=10):
+        with self.app.app_context():
+            return [name for _, name, _ in get_index().lookup(prefix, limit)]
+
+    def test_normalize(self):
+        """Test that lookups ignore case and accents."""
+        self.assertEqual(normalize('Tim Stützle'), 'tim stutzle')
+        self.assertEqual(normalize('ÅSE'), 'ase')
+
+    def test_lookup(self):
+        """Test prefix lookups on the full name and on later words."""
+        self.assertEqual(self._names('con'), ['Connor McDavid'])
+        self.assertEqual(self._names('MCD'), ['Connor McDavid'])
+        self.assertEqual(self._names('connor  m'), ['Connor McDavid'])
+        self.assertEqual(self._names('da'), ['David Pastrnak'])
+        self.assertEqual(self._names('player'), ['Test Player'])
+        self.assertEqual(self._names('x'), [])
+        self.assertEqual(self._names('  '), [])
+
+    def test_lookup_order_and_limit(self):
+        """Test that results come in key order, each player once, up to limit."""
+        index = PrefixIndex(self.app, interval=0)
+        index.add(1, 'Mark Mark', 'C')
+        index.add(2, 'Marc Staal', 'D')
+        index.add(3, 'Mats Sundin', 'C')
+        self.assertEqual([row[0] for row in index.lookup('ma')], [2, 1, 3])
+        self.assertEqual([row[0] for row in index.lookup('ma', limit=2)], [2, 1])
+
+        index.add(2, 'Eric Staal', 'C')
+        self.assertEqual([row[0] for row in index.lookup('ma')], [1, 3])
+        self.assertEqual([row[0] for row in index.lookup('sta')], [2])
+        index.remove(1)
+        index.remove(99)
+        self.assertEqual([row[0] for row in index.lookup('ma')], [3])
+
+    def test_patch_matches_build(self):
+        """Test that merging a batch of changes gives the arrays a full build would."""
+        index = PrefixIndex(self.app, interval=0)
+        rows = [(n, f'Player {n % 7} Number {n % 5}', 'C') for n in range(1, 60)]
+        index._swap(index._build(rows))
+        changed = [(n, f'Renamed {n % 3} Number {n % 4}', 'D') for n in range(1, 90, 4)]
+        changed.append((5, 'Player Five', 'C'))
+        index._swap(index._patch(changed, [n for n in range(3, 60, 9)] + [999]))
+
+        players = {row[0]: row for row in rows}
+        for n in range(3, 60, 9):
+            players.pop(n, None)
+        players.update((row[0], row) for row in changed)
+        keys, ids, _ = index._build(list(players.values()))
+        self.assertEqual(index._keys, keys)
+        self.assertEqual(sorted(zip(index._keys, index._ids)), list(zip(keys, ids)))
+        self.assertEqual(index._players, players)
+
+    def test_refresh_applies_changes(self):
+        """Test that a refresh picks up inserts, renames and deletes."""
+        with self.app.app_context():
+            index = get_index()
+            db = get_db()
+            db.execute("INSERT INTO players (name, position) VALUES ('Matty Beniers', 'C')")
+            db.execute("UPDATE players SET name = 'Connor McDrive' WHERE id = 1")
+            db.execute('DELETE FROM players WHERE id = 4')
+            db.commit()
+
+            self.assertEqual(self._names('beni'), [])
+            self.assertTrue(index.refresh())
+            self.assertFalse(index.refresh())
+
+        self.assertEqual(self._names('beni'), ['Matty Beniers'])
+        self.assertEqual(self._names('mcd'), ['Connor McDrive'])
+        self.assertEqual(self._names('test'), [])
+        self.assertEqual(len(get_index(self.app)), 4)
+
+    def test_refresh_reads_changed_players(self):
+        """Test that a refresh selects only the logged players, and reloads on a marker."""
+        with self.app.app_context():
+            index = get_index()
+            db = get_db()
+            db.execute("UPDATE players SET name = 'Connor McDrive' WHERE id = 1")
+            db.execute('UPDATE players SET team_id = NULL WHERE id = 2')
+            db.commit()
+            statements = []
+            pool = get_pool(self.app)
+            connection = pool.acquire()
+            connection.set_trace_callback(statements.append)
+            pool.release(connection)
+            try:
+                self.assertTrue(index.refresh())
+                self.assertFalse(any('FROM players' in sql and 'player_changes' not in sql for sql in statements))
+
+                log_reload(db)
+                db.execute('UPDATE table_versions SET version = version + 1 WHERE name = ?', ('players',))
+                db.commit()
+                self.assertTrue(index.refresh())
+                self.assertIn('SELECT id, name, position FROM players', statements)
+            finally:
+                connection.set_trace_callback(None)
+        self.assertEqual(self._names('mcd'), ['Connor McDrive'])
+        self.assertEqual(len(get_index(self.app)), 4)
+
+    def test_refresher_thread(self):
+        """Test that the background thread applies changes on its own."""
+        index = PrefixIndex(self.app, interval=0.01)
+        index.start()
+        try:
+            with self.app.app_context():
+                db = get_db()
+                db.execute("INSERT INTO players (name, position) VALUES ('Matty Beniers', 'C')")
+                db.commit()
+            deadline = time.monotonic() + 5
+            while not index.lookup('beni') and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual([row[1] for row in index.lookup('beni')], ['Matty Beniers'])
+        finally:
+            index.stop()
+
+    def test_endpoint(self):
+        """Test the JSON endpoint and its limit."""
+        response = self.client.get('/players/autocomplete?q=mcd')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), [{'id': 1, 'name': 'Connor McDavid', 'position': 'C'}])
+
+        response = self.client.get('/players/autocomplete?q=a&limit=1')
+        self.assertEqual(len(json.loads(response.data)), 1)
+
+        response = self.client.get('/players/autocomplete?q=mcd&limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_skips_database(self):
+        """Test that once loaded, lookups never check out a connection."""
+        self.client.get('/players/autocomplete?q=c')
+        before = get_pool(self.app).stats()
+        for prefix in ('c', 'co', 'con', 'm', 'ma', 'x'):
+            self.client.get(f'/players/autocomplete?q={prefix}')
+        after = get_pool(self.app).stats()
+        self.assertEqual((after['hits'], after['misses']), (before['hits'], before['misses']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,31 @@
 import os
+import sqlite3
 import tempfile
+import time
 import unittest
 from flaskr import create_app
-from flaskr.db import get_db, init_db
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.writes import get_write_queue
+
+# In-memory template databases, one per fixture set (_populate_test_data
+# implementation), built on first use in each test process
+_templates = {}
+
+# fixture setup cost in this process in CPU seconds (so parallel workers
+# sharing CPUs do not inflate it), reported by run_tests.py; build_seconds
+# times one warm rebuild per template, what each test would pay without it
+FIXTURE_STATS = {'templates': 0, 'template_seconds': 0.0, 'build_seconds': 0.0, 'copies': 0, 'copy_seconds': 0.0}
+
+
+def _app(database):
+    return create_app({
+        'TESTING': True,
+        'DATABASE': database,
+        'TEMPLATES_PRELOAD': False,
+        'AUTOCOMPLETE_PRELOAD': False,
+        'AUTOCOMPLETE_REFRESH': 0,
+        'STATS_ENDPOINTS': True,
+    })
 
 
 class HockeyTestCase(unittest.TestCase):
@@ -10,28 +33,75 @@ class HockeyTestCase(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures before each test method."""
-        # Create a temporary file for the test database
+        # Create a temporary file for the test database, copied from the template
         self.db_fd, self.db_path = tempfile.mkstemp()
-
-        # Create test app with temporary database
-        self.app = create_app({
-            'TESTING': True,
-            'DATABASE': self.db_path,
-        })
-
-        # Create application context and initialize database
-        with self.app.app_context():
-            init_db()
-            self._populate_test_data()
+        start = time.process_time()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._template().backup(conn)
+        finally:
+            conn.close()
+        FIXTURE_STATS['copies'] += 1
+        FIXTURE_STATS['copy_seconds'] += time.process_time() - start
+
+        # Create test app with temporary database, with one warm pool
+        # connection (which also switches the copy to WAL)
+        self.app = _app(self.db_path)
+        pool = get_pool(self.app)
+        pool.release(pool.acquire())
 
         # Create test client
         self.client = self.app.test_client()
 
     def tearDown(self):
         """Clean up after each test method."""
+        get_write_queue(self.app).stop()
+        get_pool(self.app).close()
         os.close(self.db_fd)
         os.unlink(self.db_path)
 
+    def _template(self):
+        """The schema, migrations and fixtures as an in-memory database.
+
+        Built once per process with ``init_db`` and ``_populate_test_data``
+        and copied into each test's database file with the backup API.
+        """
+        populate = type(self)._populate_test_data
+        template = _templates.get(populate)
+        if template is None:
+            start = time.process_time()
+            template = sqlite3.connect(':memory:', check_same_thread=False)
+            self._build(template)
+            _templates[populate] = template
+            FIXTURE_STATS['templates'] += 1
+            FIXTURE_STATS['template_seconds'] += time.process_time() - start
+
+            # the first build also pays for imports and cold caches
+            start = time.process_time()
+            self._build()
+            FIXTURE_STATS['build_seconds'] += time.process_time() - start
+        return template
+
+    def _build(self, target=None):
+        """Build the fixtures into a temporary file with ``init_db``, as a
+        test without the template would, and back it up into ``target``."""
+        fd, path = tempfile.mkstemp()
+        app = _app(path)
+        try:
+            with app.app_context():
+                init_db()
+                self._populate_test_data()
+            get_pool(app).close()
+            if target is not None:
+                source = sqlite3.connect(path)
+                source.backup(target)
+                source.close()
+        finally:
+            os.close(fd)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.unlink(path + suffix)
+
     def _populate_test_data(self):
         """Populate the test database with minimal test data."""
         db = get_db()
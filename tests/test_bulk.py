@@ -0,0 +1,185 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from flaskr.bulk import BulkImportError, import_files, read_records
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+class BulkImportTestCase(HockeyTestCase):
+    """Test the streaming bulk importer."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def _write_csv(self, name, rows):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _write_jsonl(self, name, rows):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        return path
+
+    def _players(self, count):
+        return [
+            {'name': f'Prospect {i}', 'position': 'C', 'team': ('BOS', 'EDM', '')[i % 3],
+             'jersey_number': str(i % 99), 'age': '20', 'height': '6-0', 'weight': '190'}
+            for i in range(count)
+        ]
+
+    def test_read_records(self):
+        """Test that CSV and JSONL files are read as dicts."""
+        rows = [{'a': '1', 'b': 'x'}, {'a': '2', 'b': 'y'}]
+        self.assertEqual(list(read_records(self._write_csv('r.csv', rows))), rows)
+        self.assertEqual(list(read_records(self._write_jsonl('r.jsonl', rows))), rows)
+        with self.assertRaises(BulkImportError):
+            list(read_records(self._write_csv('r.txt', rows)))
+
+    def test_import_resolves_foreign_keys(self):
+        """Test that team abbreviations and player names are resolved to ids."""
+        teams = self._write_jsonl('teams.jsonl', [
+            {'name': 'Kraken', 'city': 'Seattle', 'abbreviation': 'SEA',
+             'conference': 'Western', 'division': 'Pacific'},
+        ])
+        players = self._write_csv('players.csv', self._players(50) + [
+            {'name': 'Matty Beniers', 'position': 'C', 'team': 'SEA', 'jersey_number': '10',
+             'age': '21', 'height': '6-2', 'weight': '180'},
+        ])
+        stats = self._write_csv('stats.csv', [
+            {'player': 'Matty Beniers', 'season': '2023-24', 'games_played': '77', 'goals': '15',
+             'assists': '22', 'points': '37', 'save_percentage': ''},
+            {'player': 'Connor McDavid', 'season': '2022-23', 'games_played': '82', 'goals': '64',
+             'assists': '89', 'points': '153', 'save_percentage': ''},
+        ])
+
+        with self.app.app_context():
+            db = get_db()
+            versions = dict(db.execute('SELECT name, version FROM table_versions').fetchall())
+            triggers = db.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+
+            counts, seconds = import_files(db, teams, players, stats, batch_size=7)
+            self.assertEqual(counts, {'nhl_teams': 1, 'players': 51, 'player_stats': 2})
+
+            # version triggers are restored and each table is bumped once
+            after = dict(db.execute('SELECT name, version FROM table_versions').fetchall())
+            self.assertEqual(after['players'], versions['players'] + 1)
+            self.assertEqual(after['users'], versions['users'])
+            self.assertEqual(
+                db.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0],
+                triggers
+            )
+
+            row = db.execute(
+                'SELECT t.abbreviation, s.points FROM players p'
+                ' JOIN nhl_teams t ON p.team_id = t.id'
+                ' JOIN player_stats s ON s.player_id = p.id'
+                " WHERE p.name = 'Matty Beniers'"
+            ).fetchone()
+            self.assertEqual(tuple(row), ('SEA', 37))
+            free_agents = db.execute(
+                "SELECT COUNT(*) FROM players WHERE name LIKE 'Prospect %' AND team_id IS NULL"
+            ).fetchone()[0]
+            self.assertEqual(free_agents, 16)
+            seasons = db.execute('SELECT COUNT(*) FROM player_stats WHERE player_id = 1').fetchone()[0]
+            self.assertEqual(seasons, 2)
+
+    def test_failed_import_rolls_back(self):
+        """Test that a bad record leaves the database untouched."""
+        players = self._write_csv('players.csv', self._players(20) + [
+            {'name': 'Nobody', 'position': 'C', 'team': 'XXX', 'jersey_number': '',
+             'age': '', 'height': '', 'weight': ''},
+        ])
+        with self.app.app_context():
+            with self.assertRaises(BulkImportError):
+                import_files(get_db(), players=players, batch_size=5)
+            count = get_db().execute('SELECT COUNT(*) FROM players').fetchone()[0]
+            self.assertEqual(count, 4)
+
+    def test_shared_names(self):
+        """Test that a name shared by two players needs a player_id."""
+        players = self._write_csv('players.csv', [
+            {'name': 'Sebastian Aho', 'position': 'C', 'team': 'BOS'},
+            {'name': 'Sebastian Aho', 'position': 'D', 'team': 'EDM'},
+        ])
+        stats = self._write_csv('stats.csv', [
+            {'player': 'Sebastian Aho', 'player_id': '', 'season': '2023-24', 'goals': '36'},
+        ])
+        with self.app.app_context():
+            db = get_db()
+            with self.assertRaisesRegex(BulkImportError, 'shared by several players'):
+                import_files(db, players=players, stats=stats)
+            import_files(db, players=players)
+            with self.assertRaisesRegex(BulkImportError, 'shared by several players'):
+                import_files(db, stats=stats)
+
+            defenceman = db.execute("SELECT id FROM players WHERE name = 'Sebastian Aho' AND position = 'D'").fetchone()[0]
+            by_id = self._write_csv('by_id.csv', [
+                {'player': 'Sebastian Aho', 'player_id': str(defenceman), 'season': '2023-24', 'goals': '5'},
+            ])
+            import_files(db, stats=by_id)
+            row = db.execute("SELECT player_id, goals FROM player_stats WHERE season = '2023-24' AND goals = 5").fetchone()
+            self.assertEqual(tuple(row), (defenceman, 5))
+            with self.assertRaisesRegex(BulkImportError, 'unknown player id'):
+                import_files(db, stats=self._write_csv('bad.csv', [{'player_id': '999', 'season': '2023-24'}]))
+
+    def test_duplicate_records(self):
+        """Test that repeated game and season lines name the record and write nothing."""
+        games = self._write_jsonl('games.jsonl', [
+            {'player': 'Auston Matthews', 'season': '2024-25', 'game_date': f'2024-10-{day:02d}', 'goals': 1}
+            for day in (9, 11, 9)
+        ])
+        stats = self._write_csv('stats.csv', [
+            {'player': 'Connor McDavid', 'season': '2023-24', 'games_played': '76', 'goals': '32'},
+        ])
+        runner = self.app.test_cli_runner()
+        for option, path, record in (('--games', games, 'player_game_stats record 3'),
+                                     ('--stats', stats, 'player_stats record 1')):
+            with self.app.app_context():
+                result = runner.invoke(args=['import-data', option, path, '--batch-size', '2'])
+            self.assertEqual(result.exit_code, 1, result.output)
+            self.assertIn('nothing was written', result.output)
+            self.assertIn(record, result.output)
+            self.assertIn('UNIQUE', result.output)
+        with self.app.app_context():
+            self.assertEqual(get_db().execute('SELECT COUNT(*) FROM player_game_stats').fetchone()[0], 0)
+
+    def test_durability_settings_restored(self):
+        """Test that synchronous/journal_mode are put back after the load."""
+        players = self._write_csv('players.csv', self._players(3))
+        with self.app.app_context():
+            db = get_db()
+            import_files(db, players=players)
+            self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(db.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+    def test_import_command(self):
+        """Test the import-data CLI command reports throughput."""
+        players = self._write_csv('players.csv', self._players(10))
+        runner = self.app.test_cli_runner()
+        with self.app.app_context():
+            result = runner.invoke(args=['import-data', '--players', players, '--batch-size', '3'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('players: 10 rows', result.output)
+        self.assertIn('rows/sec', result.output)
+
+        with self.app.app_context():
+            result = runner.invoke(args=['import-data'])
+        self.assertNotEqual(result.exit_code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import unittest
+from flaskr.cache import Cache, get_cache, invalidate
+from flaskr.db import get_db, get_pool
+from flaskr.writes import get_write_queue
+from tests.test_base import HockeyTestCase, _app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CacheTestCase(unittest.TestCase):
+    """Test the TTL/LRU read-through cache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = Cache(max_entries=2, ttl=10, clock=self.clock)
+        self.loads = 0
+
+    def _loader(self, value):
+        def load():
+            self.loads += 1
+            return value
+        return load
+
+    def test_read_through(self):
+        """Test that a second lookup is served without calling the loader."""
+        self.assertEqual(self.cache.get_or_load(('players',), 'k', self._loader([1, 2])), [1, 2])
+        self.assertEqual(self.cache.get_or_load(('players',), 'k', self._loader([3])), [1, 2])
+        self.assertEqual(self.loads, 1)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+        self.assertEqual(stats['entries'], 1)
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_ttl_expiry(self):
+        """Test that entries are reloaded after the TTL."""
+        self.cache.get_or_load(('players',), 'k', self._loader('old'))
+        self.clock.now = 11
+        self.assertEqual(self.cache.get_or_load(('players',), 'k', self._loader('new')), 'new')
+        self.assertEqual(self.loads, 2)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        self.cache.get_or_load(('t',), 'a', self._loader('a'))
+        self.cache.get_or_load(('t',), 'b', self._loader('b'))
+        self.cache.get_or_load(('t',), 'a', self._loader('a'))  # a is now most recent
+        self.cache.get_or_load(('t',), 'c', self._loader('c'))  # evicts b
+
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.cache.get_or_load(('t',), 'a', self._loader('a2'))
+        self.assertEqual(self.loads, 3)
+        self.assertEqual(self.cache.get_or_load(('t',), 'b', self._loader('b2')), 'b2')
+
+    def test_invalidate_only_dependent_entries(self):
+        """Test that bumping a table's generation only misses its entries."""
+        self.cache.get_or_load(('players', 'nhl_teams'), 'p', self._loader('p'))
+        self.cache.get_or_load(('users',), 'u', self._loader('u'))
+
+        self.cache.invalidate('nhl_teams')
+
+        self.assertEqual(self.cache.get_or_load(('players', 'nhl_teams'), 'p', self._loader('p2')), 'p2')
+        self.assertEqual(self.cache.get_or_load(('users',), 'u', self._loader('u2')), 'u')
+
+    def test_invalidate_during_load_is_not_cached(self):
+        """Test that a value loaded across an invalidation is not stored."""
+        def racing_loader():
+            self.cache.invalidate('players')
+            return 'stale'
+
+        self.assertEqual(self.cache.get_or_load(('players',), 'k', racing_loader), 'stale')
+        self.assertEqual(self.cache.get_or_load(('players',), 'k', self._loader('fresh')), 'fresh')
+
+
+class CachedRoutesTestCase(HockeyTestCase):
+    """Test that the teams and players blueprints read through the cache."""
+
+    def _rename_team(self, name):
+        with self.app.app_context():
+            db = get_db()
+            db.execute('UPDATE nhl_teams SET name = ? WHERE id = 1', (name,))
+            db.commit()
+
+    def test_teams_served_from_cache(self):
+        """Test that reference data is not re-read until nhl_teams is written."""
+        self.client.get('/teams/').data
+        self.client.get('/teams/api').data
+        with self.app.app_context():
+            misses = get_cache().stats()['misses']
+        self.client.get('/teams/').data
+        self.client.get('/teams/api').data
+        with self.app.app_context():
+            self.assertEqual(get_cache().stats()['misses'], misses)
+
+        self._rename_team('Black Bears')
+        self.assertIn(b'Boston Black Bears', self.client.get('/teams/').data)
+
+    def test_write_from_another_process(self):
+        """Test that a write through another app on the database reaches this app's cache and ETag."""
+        first = self.client.get('/players/1')
+        other = _app(self.db_path)
+        try:
+            response = other.test_client().post('/players/games', json=[
+                {'player_id': 1, 'season': '2023-24', 'game_date': '2024-04-20', 'goals': 3}
+            ])
+            self.assertEqual(response.status_code, 201, response.data)
+        finally:
+            get_write_queue(other).stop()
+            get_pool(other).close()
+
+        second = self.client.get('/players/1')
+        self.assertNotEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertNotEqual(second.data, first.data)
+        revalidated = self.client.get('/players/1', headers={'If-None-Match': second.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_player_invalidated_by_team_write(self):
+        """Test that player entries depend on nhl_teams as well."""
+        self.client.get('/players/3').data
+        self._rename_team('Black Bears')
+        with self.app.app_context():
+            invalidate('nhl_teams')
+        self.assertIn(b'Black Bears', self.client.get('/players/3').data)
+
+    def test_cache_stats_endpoint(self):
+        """Test that cache statistics are exposed."""
+        self.client.get('/teams/').data
+        self.client.get('/teams/').data
+        data = self.client.get('/_cache').get_json()
+        self.assertGreater(data['hit_ratio'], 0)
+        self.assertGreater(data['entries'], 0)
+        self.assertGreater(data['bytes'], 0)
+
+    def test_init_db_clears_cache(self):
+        """Test that rebuilding the schema empties the cache."""
+        self.client.get('/teams/').data
+        with self.app.app_context():
+            from flaskr.db import init_db
+            init_db()
+            self.assertEqual(get_cache().stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
-from flaskr.db import get_db
+from flaskr.db import (
+    ConnectionPool, PoolTimeout, _drop_all, get_db, get_migrations, get_pool, migrate_db,
+    schema_version,
+)
 from tests.test_base import HockeyTestCase
 
 
@@ -97,6 +100,174 @@ class DatabaseTestCase(HockeyTestCase):
             self.assertEqual(roster['name'], 'Connor McDavid')
             self.assertEqual(roster['position_type'], 'starter')
 
+    def test_fixtures_are_copies(self):
+        """Test that each test gets its own migrated copy of the template."""
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(schema_version(db), get_migrations()[-1][0])
+            self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            db.execute('DELETE FROM fantasy_team_players')
+            db.execute('DELETE FROM players WHERE id = 4')
+            db.commit()
+
+        other = type(self)('test_database_connection')
+        other.setUp()
+        try:
+            self.assertNotEqual(other.db_path, self.db_path)
+            with other.app.app_context():
+                db = get_db()
+                self.assertEqual(db.execute('SELECT COUNT(*) FROM players').fetchone()[0], 4)
+                self.assertEqual(db.execute('SELECT COUNT(*) FROM fantasy_team_players').fetchone()[0], 1)
+                self.assertEqual(db.execute('SELECT COUNT(*) FROM players_fts').fetchone()[0], 4)
+        finally:
+            other.tearDown()
+
+
+class ConnectionPoolTestCase(HockeyTestCase):
+    """Test the pooled, pre-tuned database connections."""
+
+    def test_pragmas_applied(self):
+        """Test that pooled connections come with the tuning PRAGMAs set."""
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(db.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(db.execute('PRAGMA temp_store').fetchone()[0], 2)  # MEMORY
+            self.assertEqual(db.execute('PRAGMA cache_size').fetchone()[0],
+                             self.app.config['DATABASE_CACHE_SIZE'])
+
+    def test_connection_reused_across_requests(self):
+        """Test that requests reuse warm connections instead of reconnecting."""
+        pool = get_pool(self.app)
+        before = pool.stats()
+        for _ in range(3):
+            self.assertEqual(self.client.get('/players/1').status_code, 200)
+        after = pool.stats()
+
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertGreaterEqual(after['hits'], before['hits'] + 3)
+        self.assertEqual(after['idle'], after['open'])
+
+    def test_pool_stats_endpoint(self):
+        """Test that pool counters are exposed as JSON."""
+        response = self.client.get('/_pool')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        for key in ('size', 'open', 'idle', 'hits', 'misses', 'waits', 'timeouts'):
+            self.assertIn(key, data)
+
+    def test_pool_exhaustion_times_out(self):
+        """Test that an exhausted pool waits and then raises PoolTimeout."""
+        pool = ConnectionPool(self.db_path, size=1, timeout=0.05)
+        conn = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['waits'], 1)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        pool.release(conn)
+        pool.close()
+
+    def test_release_rolls_back_open_transaction(self):
+        """Test that uncommitted work is discarded when a connection is returned."""
+        pool = ConnectionPool(self.db_path, size=1)
+        conn = pool.acquire()
+        conn.execute("INSERT INTO users (username, email, password_hash) VALUES ('x', 'x@x', 'x')")
+        pool.release(conn)
+
+        conn = pool.acquire()
+        count = conn.execute("SELECT COUNT(*) FROM users WHERE username = 'x'").fetchone()[0]
+        self.assertEqual(count, 0)
+        pool.release(conn)
+        pool.close()
+
+
+class MigrationTestCase(HockeyTestCase):
+    """Test the versioned migration runner."""
+
+    def test_init_db_applies_all_migrations(self):
+        """Test that a fresh database ends up at the latest version."""
+        with self.app.app_context():
+            latest = get_migrations()[-1][0]
+            self.assertEqual(schema_version(), latest)
+            self.assertEqual(migrate_db(), [])
+
+    def test_migrate_keeps_existing_data(self):
+        """Test that migrating an old database applies missing versions only."""
+        with self.app.app_context():
+            # rebuild the database as it was before any migration ran
+            db = get_db()
+            _drop_all(db)
+            with self.app.open_resource('schema.sql') as f:
+                db.executescript(f.read().decode('utf8'))
+            db.execute('PRAGMA user_version = 0')
+            self._populate_test_data()
+
+            applied = migrate_db()
+
+            self.assertEqual(applied, [v for v, _ in get_migrations()])
+            count = db.execute('SELECT COUNT(*) FROM players').fetchone()[0]
+            self.assertEqual(count, 4)
+            index = db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_players_team'"
+            ).fetchone()
+            self.assertIsNotNone(index)
+
+    def test_migrate_stops_on_duplicate_season_rows(self):
+        """Test that duplicate player_stats rows stop migration 003 with a clear message."""
+        runner = self.app.test_cli_runner()
+        with self.app.app_context():
+            db = get_db()
+            _drop_all(db)
+            with self.app.open_resource('schema.sql') as f:
+                db.executescript(f.read().decode('utf8'))
+            db.execute('PRAGMA user_version = 0')
+            self._populate_test_data()
+            db.execute(
+                'INSERT INTO player_stats (player_id, season, goals)'
+                ' SELECT player_id, season, goals FROM player_stats WHERE id = 1'
+            )
+            db.commit()
+
+            result = runner.invoke(args=['migrate-db'])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn('several rows for the same (player_id, season)', result.output)
+            self.assertEqual(schema_version(db), 2)
+            self.assertIsNone(db.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'player_game_stats'"
+            ).fetchone())
+
+            db.execute('DELETE FROM player_stats WHERE id = (SELECT max(id) FROM player_stats)')
+            db.commit()
+            result = runner.invoke(args=['migrate-db'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(schema_version(db), get_migrations()[-1][0])
+
+    def test_migrate_command(self):
+        """Test the migrate-db CLI command."""
+        runner = self.app.test_cli_runner()
+        with self.app.app_context():
+            result = runner.invoke(args=['migrate-db'])
+        self.assertIn('up to date', result.output)
+
+    def test_hot_queries_use_indexes(self):
+        """Test that detail-view lookups are index searches, not table scans."""
+        queries = [
+            ('SELECT * FROM players WHERE team_id = ? ORDER BY position, name', (1,)),
+            ('SELECT * FROM player_stats WHERE player_id = ? ORDER BY season DESC', (1,)),
+            ('SELECT * FROM fantasy_teams WHERE league_id = ? ORDER BY name', (1,)),
+            ('SELECT * FROM fantasy_teams WHERE owner_id = ?', (1,)),
+            ('SELECT * FROM fantasy_team_players WHERE player_id = ?', (1,)),
+        ]
+        with self.app.app_context():
+            db = get_db()
+            for sql, params in queries:
+                plan = ' '.join(row['detail'] for row in db.execute('EXPLAIN QUERY PLAN ' + sql, params))
+                self.assertIn('USING', plan, sql)
+                self.assertNotIn('TEMP B-TREE', plan, sql)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,125 @@
+import csv
+import os
+import tempfile
+import unittest
+from flaskr.bulk import import_files
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+class GameStatsTestCase(HockeyTestCase):
+    """Test incremental maintenance of season totals from game lines."""
+
+    def _season(self, player_id, season):
+        return get_db().execute(
+            'SELECT * FROM player_stats WHERE player_id = ? AND season = ?',
+            (player_id, season)
+        ).fetchone()
+
+    def _add_game(self, player_id, season, game_date, **stats):
+        columns = ['player_id', 'season', 'game_date', *stats]
+        get_db().execute(
+            f'INSERT INTO player_game_stats ({", ".join(columns)})'
+            f' VALUES ({", ".join("?" for _ in columns)})',
+            (player_id, season, game_date, *stats.values())
+        )
+
+    def test_insert_creates_and_extends_season(self):
+        """Test that game lines create the season row, then add to it."""
+        with self.app.app_context():
+            self._add_game(3, '2024-25', '2024-10-09', goals=1, assists=2, plus_minus=1)
+            self._add_game(3, '2024-25', '2024-10-12', goals=2, penalty_minutes=4, plus_minus=-2)
+
+            season = self._season(3, '2024-25')
+            self.assertEqual(season['games_played'], 2)
+            self.assertEqual(season['goals'], 3)
+            self.assertEqual(season['assists'], 2)
+            self.assertEqual(season['points'], 5)
+            self.assertEqual(season['plus_minus'], -1)
+            self.assertEqual(season['penalty_minutes'], 4)
+
+    def test_games_add_to_existing_totals(self):
+        """Test that games are added on top of an existing season row."""
+        with self.app.app_context():
+            self._add_game(1, '2023-24', '2024-04-18', goals=1, assists=1)
+
+            season = self._season(1, '2023-24')
+            self.assertEqual(season['games_played'], 77)
+            self.assertEqual(season['points'], 134)
+
+    def test_update_and_delete_apply_deltas(self):
+        """Test that corrections and deletions are reflected in the totals."""
+        with self.app.app_context():
+            db = get_db()
+            self._add_game(3, '2024-25', '2024-10-09', goals=1)
+            self._add_game(3, '2024-25', '2024-10-12', goals=2)
+
+            db.execute("UPDATE player_game_stats SET goals = 0, assists = 1 WHERE game_date = '2024-10-12'")
+            season = self._season(3, '2024-25')
+            self.assertEqual((season['games_played'], season['goals'], season['points']), (2, 1, 2))
+
+            db.execute("DELETE FROM player_game_stats WHERE game_date = '2024-10-09'")
+            season = self._season(3, '2024-25')
+            self.assertEqual((season['games_played'], season['goals'], season['points']), (1, 0, 1))
+
+    def test_goalie_rates(self):
+        """Test that goalie decisions and rate stats are derived from totals."""
+        with self.app.app_context():
+            self._add_game(4, '2024-25', '2024-10-09', decision='W', saves=30, goals_against=0,
+                           minutes=60, shutout=1)
+            self._add_game(4, '2024-25', '2024-10-11', decision='L', saves=27, goals_against=3,
+                           minutes=60)
+
+            season = self._season(4, '2024-25')
+            self.assertEqual((season['wins'], season['losses'], season['shutouts']), (1, 1, 1))
+            self.assertAlmostEqual(season['save_percentage'], 57 / 60)
+            self.assertAlmostEqual(season['goals_against_average'], 1.5)
+
+    def test_matches_full_recompute(self):
+        """Test that incremental totals equal a SUM over every game."""
+        with self.app.app_context():
+            db = get_db()
+            for day in range(1, 21):
+                self._add_game(2, '2024-25', f'2024-11-{day:02d}', goals=day % 3, assists=day % 2)
+            db.execute("DELETE FROM player_game_stats WHERE game_date < '2024-11-06'")
+            db.execute("UPDATE player_game_stats SET goals = goals + 1 WHERE game_date > '2024-11-15'")
+
+            expected = db.execute(
+                'SELECT COUNT(*), SUM(goals), SUM(assists) FROM player_game_stats'
+                " WHERE player_id = 2 AND season = '2024-25'"
+            ).fetchone()
+            season = self._season(2, '2024-25')
+            self.assertEqual(
+                (season['games_played'], season['goals'], season['assists']), tuple(expected)
+            )
+
+    def test_player_page_shows_game_totals(self):
+        """Test that the player page reads the maintained season row."""
+        with self.app.app_context():
+            self._add_game(3, '2024-25', '2024-10-09', goals=2, assists=1)
+            get_db().commit()
+
+        response = self.client.get('/players/3')
+        self.assertIn(b'2024-25', response.data)
+
+    def test_bulk_import_games(self):
+        """Test that the importer loads game lines and updates totals."""
+        with tempfile.TemporaryDirectory() as tmp:
+            games = os.path.join(tmp, 'games.csv')
+            with open(games, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['player', 'season', 'game_date', 'goals', 'assists', 'decision', 'minutes'])
+                writer.writerow(['David Pastrnak', '2024-25', '2024-10-09', '1', '1', '', '19.5'])
+                writer.writerow(['David Pastrnak', '2024-25', '2024-10-12', '2', '0', '', '21'])
+
+            with self.app.app_context():
+                db = get_db()
+                counts, _ = import_files(db, games=games)
+
+                self.assertEqual(counts, {'player_game_stats': 2})
+                season = self._season(3, '2024-25')
+                self.assertEqual((season['games_played'], season['points']), (2, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import json
+import random
+import unittest
+from flaskr.db import get_db
+from flaskr.leaders import LEADERS_SIZE, check_leaders, leaders, rebuild_leaders
+from tests.test_base import HockeyTestCase
+
+
+class LeadersTestCase(HockeyTestCase):
+    """Test the materialized season leaderboards."""
+
+    def _add_depth(self, db, count, season='2023-24'):
+        db.executemany(
+            "INSERT INTO players (id, name, position) VALUES (?, ?, 'D')",
+            [(100 + i, f'Depth {i}') for i in range(count)]
+        )
+        db.executemany(
+            'INSERT INTO player_stats (player_id, season, goals, points) VALUES (?, ?, ?, ?)',
+            [(100 + i, season, i % 20, i % 40) for i in range(count)]
+        )
+
+    def test_leaders(self):
+        """Test reading a leaderboard with ranks and team."""
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(
+                [(row['rank'], row['name'], row['abbreviation'], row['value'])
+                 for row in leaders(db, '2023-24', 'goals')],
+                [(1, 'Auston Matthews', 'TOR', 69), (2, 'Connor McDavid', 'EDM', 32)]
+            )
+            self.assertEqual(len(leaders(db, '2023-24', 'points', limit=1)), 1)
+            self.assertEqual(leaders(db, '1999-00', 'points'), [])
+            with self.assertRaises(ValueError):
+                leaders(db, '2023-24', 'height')
+
+    def test_ties_share_rank(self):
+        """Test that tied players share a rank and keep id order."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO player_stats (player_id, season, goals) VALUES (3, '2023-24', 32)")
+            rows = leaders(db, '2023-24', 'goals')
+            self.assertEqual([(row['rank'], row['id']) for row in rows], [(1, 2), (2, 1), (2, 3)])
+
+    def test_triggers_keep_top_list(self):
+        """Test that writes below, into and out of the top list are reflected."""
+        with self.app.app_context():
+            db = get_db()
+            self._add_depth(db, LEADERS_SIZE + 30)
+            self.assertEqual(check_leaders(db), [])
+            count = db.execute(
+                "SELECT count(*) FROM player_leaders WHERE season = '2023-24' AND stat = 'goals'"
+            ).fetchone()[0]
+            self.assertEqual(count, LEADERS_SIZE)
+
+            # the leader drops out and the next player moves up into the list
+            db.execute("UPDATE player_stats SET goals = 0 WHERE player_id = 2")
+            db.execute("UPDATE player_stats SET goals = 70 WHERE player_id = 101")
+            db.execute("DELETE FROM player_stats WHERE player_id = 119")
+            db.execute("UPDATE player_stats SET season = '2022-23' WHERE player_id = 1")
+            self.assertEqual(check_leaders(db), [])
+            self.assertEqual(leaders(db, '2023-24', 'goals', 1)[0]['id'], 101)
+            self.assertEqual(leaders(db, '2022-23', 'points', 1)[0]['id'], 1)
+
+            rng = random.Random(7)
+            for _ in range(300):
+                player_id = 100 + rng.randrange(LEADERS_SIZE + 30)
+                db.execute(
+                    'UPDATE player_stats SET goals = ?, points = ? WHERE player_id = ?',
+                    (rng.randrange(25), rng.randrange(45), player_id)
+                )
+            self.assertEqual(check_leaders(db), [])
+
+    def test_game_lines_update_leaders(self):
+        """Test that ingested game lines flow through season totals into leaders."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute(
+                'INSERT INTO player_game_stats (player_id, season, game_date, goals, assists)'
+                " VALUES (4, '2024-25', '2024-10-10', 3, 1)"
+            )
+            rows = leaders(db, '2024-25', 'goals')
+            self.assertEqual([(row['name'], row['value']) for row in rows], [('Test Player', 3)])
+
+    def test_rebuild(self):
+        """Test that a rebuild restores a damaged table."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE player_leaders SET value = 0 WHERE stat = 'points'")
+            db.execute("DELETE FROM player_leaders WHERE stat = 'goals'")
+            self.assertEqual(check_leaders(db), [('2023-24', 'goals'), ('2023-24', 'points')])
+            rebuild_leaders(db)
+            self.assertEqual(check_leaders(db), [])
+
+    def test_rebuild_revalidates(self):
+        """Test that clients and the cache see a rebuilt leaderboard."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE player_leaders SET value = 0 WHERE stat = 'points'")
+            db.commit()
+        damaged = self.client.get('/players/leaders')
+        self.assertEqual(json.loads(damaged.data)[0]['value'], 0)
+
+        with self.app.app_context():
+            result = self.app.test_cli_runner().invoke(args=['rebuild-leaders'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        response = self.client.get('/players/leaders', headers={'If-None-Match': damaged.headers['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)[0]['value'], 132)
+
+    def test_endpoint(self):
+        """Test the JSON endpoint, its defaults and bad stats."""
+        response = self.client.get('/players/leaders')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([player['name'] for player in data], ['Connor McDavid', 'Auston Matthews'])
+        self.assertEqual(data[0]['value'], 132)
+
+        response = self.client.get('/players/leaders?stat=goals&season=2023-24&limit=1')
+        self.assertEqual([player['name'] for player in json.loads(response.data)], ['Auston Matthews'])
+
+        response = self.client.get('/players/leaders?stat=height')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reads_use_index(self):
+        """Test that a leaderboard read never scans."""
+        with self.app.app_context():
+            plan = [row['detail'] for row in get_db().execute(
+                'EXPLAIN QUERY PLAN SELECT player_id, value FROM player_leaders'
+                " WHERE season = '2023-24' AND stat = 'goals' ORDER BY value DESC, player_id LIMIT 10"
+            )]
+            self.assertEqual(plan, ['SEARCH player_leaders USING COVERING INDEX idx_player_leaders_value (season=? AND stat=?)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
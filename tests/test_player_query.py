@@ -0,0 +1,130 @@
+import itertools
+import json
+import unittest
+from werkzeug.datastructures import MultiDict
+from flaskr.db import get_db
+from flaskr.player_query import PlayerQuery
+from tests.test_base import HockeyTestCase
+
+
+class PlayerQueryTestCase(HockeyTestCase):
+    """Test filtering, sorting and field selection on /players/api."""
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO players (name, position, team_id) VALUES ('Jeremy Swayman', 'G', 1)")
+            db.execute(
+                'INSERT INTO player_stats (player_id, season, games_played, wins, saves, save_percentage)'
+                " VALUES (5, '2023-24', 44, 25, 1200, 0.916)"
+            )
+            db.execute(
+                'INSERT INTO player_stats (player_id, season, games_played, goals, assists, points)'
+                " VALUES (3, '2023-24', 82, 47, 63, 110)"
+            )
+            db.commit()
+
+    def _get(self, query):
+        response = self.client.get('/players/api?' + query)
+        self.assertEqual(response.status_code, 200, response.data)
+        return json.loads(response.data)
+
+    def _names(self, query):
+        return [player['name'] for player in self._get(query)]
+
+    def test_defaults_unchanged(self):
+        """Test that without parameters the API returns the usual columns."""
+        players = self._get('')
+        self.assertEqual(len(players), 5)
+        self.assertEqual(
+            set(players[0]), {'id', 'name', 'position', 'jersey_number', 'age', 'team_name', 'abbreviation'}
+        )
+
+    def test_player_filters(self):
+        """Test position, team and free agent filters."""
+        self.assertEqual(self._names('position=C'), ['Auston Matthews', 'Connor McDavid'])
+        self.assertEqual(self._names('position=G,RW'), ['David Pastrnak', 'Jeremy Swayman'])
+        self.assertEqual(self._names('team=bos'), ['David Pastrnak', 'Jeremy Swayman'])
+        self.assertEqual(self._names('team_id=3'), ['Connor McDavid'])
+        self.assertEqual(self._names('team=BOS&position=G'), ['Jeremy Swayman'])
+        self.assertEqual(self._names('free_agent=true'), ['Test Player'])
+        self.assertEqual(len(self._names('free_agent=false')), 4)
+        self.assertEqual(self._names('team=XXX'), [])
+
+    def test_stat_filters_and_sorts(self):
+        """Test season thresholds and stat sorts."""
+        self.assertEqual(
+            self._names('season=2023-24&sort=-points'),
+            ['Connor McDavid', 'David Pastrnak', 'Auston Matthews', 'Jeremy Swayman']
+        )
+        self.assertEqual(self._names('season=2023-24&min_goals=40&sort=goals'),
+                         ['David Pastrnak', 'Auston Matthews'])
+        self.assertEqual(self._names('season=2023-24&min_points=108'), ['Connor McDavid', 'David Pastrnak'])
+        self.assertEqual(self._names('season=2023-24&min_save_percentage=0.9'), ['Jeremy Swayman'])
+        self.assertEqual(self._names('season=2023-24&min_points=100&position=C&sort=-goals'),
+                         ['Auston Matthews', 'Connor McDavid'])
+        self.assertEqual(self._names('season=2022-23'), [])
+
+    def test_fields(self):
+        """Test that only the requested fields are returned."""
+        players = self._get('fields=id,name&limit=1')
+        self.assertEqual(players, [{'id': 2, 'name': 'Auston Matthews'}])
+
+        players = self._get('season=2023-24&fields=name,goals,points&sort=-points&limit=1')
+        self.assertEqual(players, [{'name': 'Connor McDavid', 'goals': 32, 'points': 132}])
+
+    def test_stat_sorted_pages(self):
+        """Test keyset paging over a descending stat sort with ties."""
+        with self.app.app_context():
+            db = get_db()
+            db.executemany(
+                "INSERT INTO players (id, name, position) VALUES (?, ?, 'D')",
+                [(100 + i, f'Depth {i}') for i in range(7)]
+            )
+            db.executemany(
+                "INSERT INTO player_stats (player_id, season, points) VALUES (?, '2023-24', ?)",
+                [(100 + i, 10 * (i % 3)) for i in range(7)]
+            )
+            db.commit()
+
+        url = '/players/api?season=2023-24&sort=-points&fields=id,points&limit=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen.extend(json.loads(response.data))
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+            if url:
+                self.assertIn('sort=-points', url)
+                self.assertIn('fields=id', url)
+        self.assertEqual(len(seen), 11)
+        self.assertEqual(seen, sorted(seen, key=lambda p: (-p['points'], -p['id'])))
+
+    def test_bad_requests(self):
+        """Test that unknown or malformed parameters are rejected."""
+        for query in ('fields=password', 'sort=height', 'sort=points', 'min_goals=5', 'fields=goals',
+                      'season=2023-24&min_goals=lots', 'team_id=x', 'free_agent=maybe',
+                      'season=2023-24&sort=-points&after=not-a-cursor'):
+            response = self.client.get('/players/api?' + query)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_filters_use_indexes(self):
+        """Test that every filter combination is an index search, not a scan."""
+        filters = {'position': 'C', 'team': 'EDM', 'team_id': '3', 'free_agent': 'true',
+                   'season': '2023-24', 'min_goals': '10', 'min_points': '20', 'min_save_percentage': '0.9'}
+        with self.app.test_request_context():
+            db = get_db()
+            for n in range(1, 4):
+                for combo in itertools.combinations(filters, n):
+                    for sort in ('name', '-points'):
+                        args = {key: filters[key] for key in combo}
+                        if sort != 'name' or any(key.startswith('min_') for key in combo):
+                            args['season'] = filters['season']
+                        body, params = PlayerQuery(MultiDict({**args, 'sort': sort}))._body(None)
+                        plan = [row['detail'] for row in db.execute('EXPLAIN QUERY PLAN SELECT p.id ' + body, params)]
+                        self.assertFalse([step for step in plan if step.startswith('SCAN')], (args, plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import urllib.request
+from flaskr.prefork import RequestCounter
+from tests.test_base import HockeyTestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = '''
+import sys
+from flaskr import create_app
+from flaskr.prefork import PreforkServer
+app = create_app({'DATABASE': sys.argv[1], 'AUTOCOMPLETE_REFRESH': 0.1, 'PREFORK_GRACEFUL_TIMEOUT': 5,
+                  'STATS_ENDPOINTS': True})
+server = PreforkServer(app, '127.0.0.1', 0, workers=2)
+print(server.bind()[1], flush=True)
+server.run()
+'''
+
+
+class RequestCounterTestCase(unittest.TestCase):
+    """Test the per-worker request counting middleware."""
+
+    def test_counts_and_in_flight(self):
+        """Test that a request stays in flight until its response is closed."""
+        counts = [0, 0]
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        counter = RequestCounter(app, counts, 1)
+        result = counter({}, lambda *args: None)
+        self.assertEqual((counts, counter.in_flight), ([0, 1], 1))
+        self.assertFalse(counter.wait_idle(0.01))
+
+        threading.Timer(0.05, result.close).start()
+        self.assertTrue(counter.wait_idle(5))
+        self.assertEqual(counter.in_flight, 0)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'needs fork()')
+class PreforkServerTestCase(HockeyTestCase):
+    """Test the pre-forking server end to end in a child process."""
+
+    def setUp(self):
+        super().setUp()
+        self.server = subprocess.Popen([sys.executable, '-c', SERVER, self.db_path], cwd=ROOT,
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self.port = int(self.server.stdout.readline())
+
+    def tearDown(self):
+        if self.server.poll() is None:
+            self.server.kill()
+            self.server.wait()
+        self.server.stdout.close()
+        super().tearDown()
+
+    def _get(self, path, timeout=10):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{self.port}{path}', timeout=5) as response:
+                    return response.status, response.read()
+            except OSError:
+                # workers still starting
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _workers(self):
+        return json.loads(self._get('/_workers')[1])['workers']
+
+    def test_serves_and_counts(self):
+        """Test that workers answer requests and report shared counts."""
+        for _ in range(20):
+            status, body = self._get('/players/api?limit=2&fields=id,name')
+            self.assertEqual(status, 200)
+            self.assertEqual(len(json.loads(body)), 2)
+        status, body = self._get('/players/autocomplete?q=mcd')
+        self.assertIn(b'McDavid', body)
+
+        workers = self._workers()
+        self.assertEqual([worker['worker'] for worker in workers], [0, 1])
+        self.assertEqual(len({worker['pid'] for worker in workers}), 2)
+        self.assertNotIn(self.server.pid, {worker['pid'] for worker in workers})
+        # the /_workers request itself is counted before it answers
+        self.assertEqual(sum(worker['requests'] for worker in workers), 22)
+
+    def test_reload_and_stop(self):
+        """Test that SIGHUP replaces the workers and SIGTERM stops everything."""
+        before = {worker['pid'] for worker in self._workers()}
+        self.server.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 20
+        while {worker['pid'] for worker in self._workers()} & before:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.1)
+        self.assertEqual(self._get('/players/')[0], 200)
+
+        self.server.send_signal(signal.SIGTERM)
+        self.assertEqual(self.server.wait(timeout=20), 0)
+        for pid in before:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import unittest
+from flaskr import create_app
+from flaskr.db import get_db, get_pool
+from flaskr.profiling import ProfiledConnection, _percentiles
+from tests.test_base import HockeyTestCase
+
+
+class PercentilesTestCase(unittest.TestCase):
+    """Test the nearest-rank percentile summary."""
+
+    def test_percentiles(self):
+        """Test p50/p95/p99 over 100 samples, in milliseconds."""
+        summary = _percentiles([i / 1000 for i in range(1, 101)])
+        self.assertEqual(summary, {'p50': 51.0, 'p95': 95.0, 'p99': 99.0, 'max': 100.0})
+        self.assertIsNone(_percentiles([]))
+
+
+class ProfilingTestCase(HockeyTestCase):
+    """Test Server-Timing headers and the /_metrics endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        # PROFILING is read at startup, so build a profiled app on the same database
+        get_pool(self.app).close()
+        self.app = create_app({
+            'TESTING': True,
+            'DATABASE': self.db_path,
+            'TEMPLATES_PRELOAD': False,
+            'AUTOCOMPLETE_PRELOAD': False,
+            'AUTOCOMPLETE_REFRESH': 0,
+            'PROFILING': True,
+            'STATS_ENDPOINTS': True,
+            'PROFILING_VM_STEP': 10,
+        })
+        self.client = self.app.test_client()
+
+    def _metrics(self):
+        return json.loads(self.client.get('/_metrics').data)
+
+    def test_server_timing_header(self):
+        """Test that responses carry the SQL and total time spent."""
+        response = self.client.get('/players/1')
+        self.assertEqual(response.status_code, 200)
+        # three table_versions rows for the ETag, then the player
+        self.assertRegex(response.headers['Server-Timing'],
+                         r'^sql;dur=\d+\.\d\d;desc="2 statements, 4 rows", app;dur=\d+\.\d\d$')
+
+    def test_metrics_per_endpoint(self):
+        """Test that requests are aggregated per endpoint with percentiles."""
+        for _ in range(5):
+            self.assertEqual(len(json.loads(self.client.get('/players/api?limit=2').data)), 2)
+        self.client.get('/teams/api').data
+        self.client.get('/nowhere')
+
+        metrics = self._metrics()
+        api = metrics['endpoints']['players.api']
+        self.assertEqual(api['rule'], '/players/api')
+        self.assertEqual((api['requests'], api['errors']), (5, 0))
+        self.assertEqual(set(api['wall_ms']), {'p50', 'p95', 'p99', 'max'})
+        self.assertLessEqual(api['sql_ms']['p50'], api['wall_ms']['p50'])
+        # streamed rows are fetched after the view returns and still counted
+        self.assertGreaterEqual(api['rows_per_request'], 3)
+        self.assertGreater(api['vm_steps_per_request'], 0)
+        self.assertEqual(metrics['endpoints']['teams.api']['requests'], 1)
+        self.assertEqual(metrics['endpoints']['<unmatched>']['requests'], 1)
+        self.assertIn('hits', metrics['pool'])
+        self.assertIn('hit_ratio', metrics['cache'])
+
+    def test_trigger_statements_counted(self):
+        """Test that statements run by triggers are included in the count."""
+        with self.app.app_context():
+            get_db().execute('SELECT 1').fetchall()
+            self.assertNotIsInstance(get_db(), ProfiledConnection)
+
+        with self.app.test_request_context():
+            self.app.preprocess_request()
+            db = get_db()
+            self.assertIsInstance(db, ProfiledConnection)
+            db.execute('UPDATE players SET age = age + 1 WHERE id = 1')
+            # the statement itself plus the table_versions trigger program
+            self.assertGreater(db._profile.statements, 1)
+            self.app.do_teardown_request()
+
+    def test_connection_detached(self):
+        """Test that pooled connections lose the callbacks after the request."""
+        self.client.get('/players/1')
+        pool = get_pool(self.app)
+        conn = pool.acquire()
+        try:
+            self.assertNotIsInstance(conn, ProfiledConnection)
+            statements = []
+            conn.set_trace_callback(statements.append)
+            conn.execute('SELECT 1')
+            self.assertEqual(len(statements), 1)
+        finally:
+            conn.set_trace_callback(None)
+            pool.release(conn)
+
+    def test_disabled_by_default(self):
+        """Test that the default app has no profiling."""
+        app = create_app({'TESTING': True, 'DATABASE': self.db_path, 'AUTOCOMPLETE_PRELOAD': False})
+        self.assertNotIn('profiler', app.extensions)
+        self.assertNotIn('Server-Timing', app.test_client().get('/players/1').headers)
+        self.assertEqual(app.test_client().get('/_metrics').status_code, 404)
+        get_pool(app).close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from flaskr import queries
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+class DetailQueriesTestCase(HockeyTestCase):
+    """Test the single-statement detail page fetches."""
+
+    def test_player_detail(self):
+        """Test that a player comes back with stats in one payload."""
+        with self.app.app_context():
+            player = queries.player_detail(get_db(), 1)
+        self.assertEqual(player['name'], 'Connor McDavid')
+        self.assertEqual(player['team_name'], 'Oilers')
+        self.assertEqual([s['season'] for s in player['stats']], ['2023-24'])
+        self.assertEqual(player['stats'][0]['points'], 132)
+
+    def test_player_without_stats(self):
+        """Test that a player with no stats gets an empty list."""
+        with self.app.app_context():
+            player = queries.player_detail(get_db(), 4)
+            self.assertIsNone(queries.player_detail(get_db(), 999))
+        self.assertEqual(player['stats'], [])
+        self.assertIsNone(player['team_name'])
+
+    def test_nhl_team_detail(self):
+        """Test that a team comes back with its roster."""
+        with self.app.app_context():
+            team = queries.nhl_team_detail(get_db(), 3)
+        self.assertEqual(team['city'], 'Edmonton')
+        self.assertEqual([p['name'] for p in team['players']], ['Connor McDavid'])
+
+    def test_league_detail(self):
+        """Test that a league comes back with its teams and owners."""
+        with self.app.app_context():
+            league = queries.league_detail(get_db(), 1)
+        self.assertEqual(league['commissioner_name'], 'commissioner')
+        self.assertEqual(league['teams'], [
+            {'id': 1, 'name': 'Test Team', 'owner_id': 1, 'owner_name': 'testuser',
+             'points': 0, 'rank': 1}
+        ])
+
+    def test_fantasy_team_detail(self):
+        """Test that a fantasy team comes back with its roster."""
+        with self.app.app_context():
+            team = queries.fantasy_team_detail(get_db(), 1, 1)
+            self.assertIsNone(queries.fantasy_team_detail(get_db(), 2, 1))
+        self.assertEqual(team['league_name'], 'Test League')
+        self.assertEqual(team['roster'], [
+            {'position_type': 'starter', 'name': 'Connor McDavid', 'position': 'C', 'team_abbr': 'EDM'}
+        ])
+
+
+class QueryCountTestCase(HockeyTestCase):
+    """Guard against N+1 regressions: count statements per endpoint."""
+
+    # one lookup in table_versions for the conditional GET, one for the payload
+    EXPECTED = {
+        '/players/1': 2,
+        '/teams/3': 2,
+        '/leagues/1': 2,
+        '/leagues/1/teams/1': 2,
+    }
+
+    def _count_statements(self, url):
+        with self.app.app_context():
+            statements = []
+            get_db().set_trace_callback(statements.append)
+            response = self.client.get(url)
+            response.data
+            get_db().set_trace_callback(None)
+        self.assertEqual(response.status_code, 200, url)
+        return statements
+
+    def test_detail_pages_query_count(self):
+        """Test that each detail page is fetched in a single statement."""
+        for url, expected in self.EXPECTED.items():
+            statements = self._count_statements(url)
+            self.assertEqual(len(statements), expected, f'{url}: {statements}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+import json
+import random
+import sqlite3
+import threading
+import unittest
+from flaskr.db import get_db
+from flaskr.scoring import check_standings
+from flaskr.writes import backoff_delays, is_busy
+from tests.test_base import HockeyTestCase
+
+
+class RosterWriteTestCase(HockeyTestCase):
+    """Test the roster write API."""
+
+    def _roster(self, team_id=1, league_id=1, client=None):
+        return json.loads((client or self.client).get(f'/leagues/{league_id}/teams/{team_id}/roster').data)
+
+    def _moves(self, body, team_id=1, league_id=1, client=None):
+        return (client or self.client).post(f'/leagues/{league_id}/teams/{team_id}/roster', json=body)
+
+    def test_roster(self):
+        """Test reading a roster and its version."""
+        roster = self._roster()
+        self.assertEqual(roster['roster'], [{'player_id': 1, 'position_type': 'starter'}])
+        self.assertEqual(self.client.get('/leagues/2/teams/1/roster').status_code, 404)
+
+    def test_moves(self):
+        """Test add, move and drop in one transaction, each bumping the version."""
+        version = self._roster()['version']
+        response = self._moves({
+            'version': version,
+            'add': [{'player_id': 2, 'position_type': 'starter'}, {'player_id': 3}],
+            'move': [{'player_id': 1, 'position_type': 'bench'}],
+        })
+        self.assertEqual(response.status_code, 200, response.data)
+        roster = response.get_json()
+        self.assertEqual(roster['roster'], [
+            {'player_id': 1, 'position_type': 'bench'},
+            {'player_id': 2, 'position_type': 'starter'},
+            {'player_id': 3, 'position_type': 'bench'},
+        ])
+        self.assertGreater(roster['version'], version)
+        self.assertEqual(self._roster(), roster)
+
+        response = self._moves({'version': roster['version'], 'drop': [3]})
+        self.assertEqual([p['player_id'] for p in response.get_json()['roster']], [1, 2])
+
+        # standings follow the moves through the existing triggers
+        with self.app.app_context():
+            self.assertEqual(check_standings(get_db()), [])
+        self.assertIn(b'Auston Matthews', self.client.get('/leagues/1/teams/1').data)
+
+    def test_stale_version(self):
+        """Test that moves made against an old roster are rejected."""
+        version = self._roster()['version']
+        self.assertEqual(self._moves({'version': version, 'add': [{'player_id': 2}]}).status_code, 200)
+
+        response = self._moves({'version': version, 'add': [{'player_id': 3}]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['version'], self._roster()['version'])
+        self.assertEqual(len(self._roster()['roster']), 2)
+
+    def test_league_rules(self):
+        """Test one team per player in a league and the roster limits."""
+        self.app.config.update(ROSTER_SIZE=2, ROSTER_STARTERS=1)
+        team = self.client.post('/leagues/1/teams', json={'name': 'Rivals', 'owner_id': 2}).get_json()
+
+        response = self._moves({'version': team['version'], 'add': [{'player_id': 1}]}, team_id=team['id'])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['fantasy_team_id'], 1)
+
+        version = self._roster()['version']
+        response = self._moves({'version': version, 'add': [{'player_id': 2, 'position_type': 'starter'}]})
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('1 starters', response.get_json()['error'])
+        response = self._moves({'version': version, 'add': [{'player_id': 2}, {'player_id': 3}]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['roster_size'], 2)
+        self.assertEqual(self._roster()['version'], version)
+
+    def test_bad_requests(self):
+        """Test validation of move bodies."""
+        version = self._roster()['version']
+        for body, status in [
+            (None, 400),
+            ({'add': [{'player_id': 2}]}, 400),
+            ({'version': version}, 400),
+            ({'version': version, 'add': [{'player_id': 'x'}]}, 400),
+            ({'version': version, 'add': [{'player_id': 2, 'position_type': 'goalie'}]}, 400),
+            ({'version': version, 'add': [{'player_id': 2}], 'drop': [2]}, 400),
+            ({'version': version, 'drop': [3]}, 400),
+            ({'version': version, 'add': [{'player_id': 99}]}, 404),
+        ]:
+            response = self._moves(body)
+            self.assertEqual(response.status_code, status, body)
+            self.assertIn('error', response.get_json())
+        self.assertEqual(self._moves({'version': 0, 'drop': [1]}, team_id=9).status_code, 404)
+
+    def test_create_team(self):
+        """Test team creation against max_teams and one team per owner."""
+        response = self.client.post('/leagues/1/teams', json={'name': 'Second', 'owner_id': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['roster'], [])
+        self.assertEqual(self.client.post('/leagues/1/teams', json={'name': 'Again', 'owner_id': 2}).status_code, 409)
+        self.assertEqual(self.client.post('/leagues/1/teams', json={'name': 'X', 'owner_id': 9}).status_code, 400)
+        self.assertEqual(self.client.post('/leagues/9/teams', json={'name': 'X', 'owner_id': 1}).status_code, 404)
+        self.assertEqual(self.client.post('/leagues/1/teams', json={'owner_id': 1}).status_code, 400)
+
+        with self.app.app_context():
+            db = get_db()
+            for i in range(3, 6):
+                db.execute('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                           (i, f'user{i}', f'user{i}@example.com', 'x'))
+            db.commit()
+        for owner in (3, 4):
+            response = self.client.post('/leagues/1/teams', json={'name': f'Team {owner}', 'owner_id': owner})
+            self.assertEqual(response.status_code, 201)
+        response = self.client.post('/leagues/1/teams', json={'name': 'Fifth', 'owner_id': 5})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['max_teams'], 4)
+        self.assertIn(b'Team 4', self.client.get('/leagues/1').data)
+
+    def test_busy_retries(self):
+        """Test that a held write lock is waited out, and reported once retries run out."""
+        self.app.config.update(WRITE_BUSY_TIMEOUT=0.01, WRITE_RETRIES=20, WRITE_BACKOFF=0.005, WRITE_MAX_BACKOFF=0.02)
+        blocker = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        blocker.execute('BEGIN IMMEDIATE')
+        timer = threading.Timer(0.1, blocker.rollback)
+        timer.start()
+        try:
+            response = self._moves({'version': self._roster()['version'], 'add': [{'player_id': 2}]})
+        finally:
+            timer.join()
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.app.config.update(WRITE_RETRIES=2)
+        blocker.execute('BEGIN IMMEDIATE')
+        try:
+            response = self._moves({'version': self._roster()['version'], 'drop': [2]})
+        finally:
+            blocker.rollback()
+            blocker.close()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(len(self._roster()['roster']), 2)
+
+    def test_concurrent_draft(self):
+        """Test that teams drafting the same players at once never share one."""
+        with self.app.app_context():
+            db = get_db()
+            db.executemany(
+                'INSERT INTO players (name, position) VALUES (?, ?)', [(f'Prospect {i}', 'C') for i in range(40)]
+            )
+            db.executemany(
+                'INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                [(i, f'user{i}', f'user{i}@example.com', 'x') for i in range(3, 9)]
+            )
+            db.execute('UPDATE fantasy_leagues SET max_teams = 8 WHERE id = 1')
+            db.commit()
+        teams = [1] + [
+            self.client.post('/leagues/1/teams', json={'name': f'Team {owner}', 'owner_id': owner}).get_json()['id']
+            for owner in range(2, 9)
+        ]
+        players = list(range(2, 45))
+        statuses = []
+        lock = threading.Lock()
+
+        def draft(team_id, seed):
+            client = self.app.test_client()
+            order = players[:]
+            random.Random(seed).shuffle(order)
+            for player_id in order[:15]:
+                while True:
+                    version = self._roster(team_id, client=client)['version']
+                    response = self._moves({'version': version, 'add': [{'player_id': player_id}]},
+                                           team_id=team_id, client=client)
+                    # a stale version is retried; a taken player is skipped
+                    if response.status_code != 409 or 'version' not in response.get_json():
+                        break
+                with lock:
+                    statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=draft, args=(team_id, team_id)) for team_id in teams]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(statuses) - {200, 409}, set())
+        with self.app.app_context():
+            db = get_db()
+            rostered = db.execute(
+                'SELECT player_id, count(*) FROM fantasy_team_players GROUP BY player_id HAVING count(*) > 1'
+            ).fetchall()
+            self.assertEqual(rostered, [])
+            self.assertEqual(
+                db.execute('SELECT count(*) FROM fantasy_team_players').fetchone()[0], 1 + statuses.count(200)
+            )
+            self.assertEqual(check_standings(get_db()), [])
+
+
+class WriteTransactionTestCase(unittest.TestCase):
+    """Test the busy detection and backoff helpers."""
+
+    def test_is_busy(self):
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute('SELECT * FROM missing')
+        except sqlite3.OperationalError as e:
+            self.assertFalse(is_busy(e))
+        self.assertTrue(is_busy(sqlite3.OperationalError('database is locked')))
+        self.assertFalse(is_busy(ValueError('locked')))
+
+    def test_backoff_delays(self):
+        delays = backoff_delays(6, 0.01, 0.05, random.Random(1))
+        self.assertEqual(len(delays), 6)
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(0.05, 0.01 * 2 ** attempt))
+            self.assertGreaterEqual(delay, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import json
 import unittest
+from flaskr.db import get_db
+from flaskr.pagination import encode_cursor
 from tests.test_base import HockeyTestCase
 
 
@@ -94,6 +96,18 @@ class RoutesTestCase(HockeyTestCase):
         response = self.client.get('/leagues/999')
         self.assertEqual(response.status_code, 404)
 
+    def test_html_pages_are_streamed_and_escaped(self):
+        """Test that pages render through streamed, autoescaping templates."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE players SET name = '<b>Bold</b>' WHERE id = 4")
+            db.commit()
+
+        response = self.client.get('/players/')
+        self.assertTrue(response.is_streamed)
+        self.assertIn(b'&lt;b&gt;Bold&lt;/b&gt;', response.data)
+        self.assertNotIn(b'<b>Bold</b>', response.data)
+
     def test_fantasy_team_not_found(self):
         """Test that non-existent fantasy team returns 404."""
         response = self.client.get('/leagues/1/teams/999')
@@ -145,5 +159,196 @@ class APITestCase(HockeyTestCase):
         self.assertEqual(data[0]['name'], 'Test League')
 
 
+class PaginationTestCase(HockeyTestCase):
+    """Test keyset pagination of the players list and API."""
+
+    def _next_url(self, response):
+        link = response.headers.get('Link')
+        if link is None:
+            return None
+        return link[link.index('<') + 1:link.index('>')]
+
+    def test_players_api_pages(self):
+        """Test walking the players API page by page via the Link header."""
+        names = []
+        url = '/players/api?limit=3'
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertLessEqual(len(data), 3)
+            names.extend(p['name'] for p in data)
+            url = self._next_url(response)
+            pages += 1
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 4)
+
+    def test_players_api_duplicate_names(self):
+        """Test that players sharing a name are not skipped across pages."""
+        with self.app.app_context():
+            db = get_db()
+            db.executemany(
+                'INSERT INTO players (name, position) VALUES (?, ?)',
+                [('Auston Matthews', 'C'), ('Auston Matthews', 'D')]
+            )
+            db.commit()
+
+        first = self.client.get('/players/api?limit=2')
+        players = json.loads(first.data)
+        second = self.client.get(self._next_url(first))
+        players += json.loads(second.data)
+        ids = [p['id'] for p in players]
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(len(set(ids)), 4)
+
+    def test_page_size_is_capped(self):
+        """Test that limit cannot exceed MAX_PAGE_SIZE."""
+        self.app.config['MAX_PAGE_SIZE'] = 2
+        response = self.client.get('/players/api?limit=1000')
+        self.assertEqual(len(json.loads(response.data)), 2)
+        self.assertIn('rel="next"', response.headers['Link'])
+
+    def test_players_list_next_link(self):
+        """Test that the HTML list links to the next page."""
+        response = self.client.get('/players/?limit=2')
+        self.assertIn(b'Next page', response.data)
+        self.assertIn(b'after=', response.data)
+
+        response = self.client.get('/players/?limit=10')
+        self.assertNotIn(b'Next page', response.data)
+
+    def test_last_page_has_no_link(self):
+        """Test that an exactly full last page does not advertise a next page."""
+        response = self.client.get('/players/api?limit=4')
+        self.assertEqual(len(json.loads(response.data)), 4)
+        self.assertNotIn('Link', response.headers)
+
+    def test_invalid_page_args(self):
+        """Test that bad cursors and limits are rejected."""
+        self.assertEqual(self.client.get('/players/api?after=not-a-cursor').status_code, 400)
+        self.assertEqual(self.client.get('/players/api?limit=0').status_code, 400)
+
+    def test_cursor_values_must_be_scalars(self):
+        """Test that well-formed cursors holding non-scalar values are rejected."""
+        for values in ([{}, 1], ['Connor McDavid', [1]], [True, 1]):
+            cursor = encode_cursor(values)
+            for url in ('/players/', '/players/api'):
+                self.assertEqual(self.client.get(f'{url}?after={cursor}').status_code, 400, (url, values))
+        cursor = encode_cursor(['Auston Matthews', 2])
+        self.assertEqual(self.client.get(f'/players/api?after={cursor}').status_code, 200)
+
+
+class StreamingAPITestCase(HockeyTestCase):
+    """Test that /api endpoints stream their JSON arrays."""
+
+    def test_api_responses_are_streamed(self):
+        """Test that the API bodies are generated incrementally."""
+        for url in ('/players/api', '/teams/api', '/leagues/api'):
+            response = self.client.get(url)
+            self.assertTrue(response.is_streamed, url)
+            self.assertIsInstance(json.loads(response.data), list)
+
+    def test_chunked_output_is_valid_json(self):
+        """Test that chunk boundaries produce a well-formed array."""
+        for chunk_size in (1, 2, 3, 1000):
+            self.app.config['API_CHUNK_SIZE'] = chunk_size
+            data = json.loads(self.client.get('/teams/api').data)
+            self.assertEqual([t['abbreviation'] for t in data], ['BOS', 'TOR', 'EDM'])
+
+    def test_empty_result_is_empty_array(self):
+        """Test that an empty table streams as []."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute('DELETE FROM fantasy_teams')
+            db.execute('DELETE FROM fantasy_leagues')
+            db.commit()
+        response = self.client.get('/leagues/api')
+        self.assertEqual(response.data, b'[]')
+
+
+class ConditionalGetTestCase(HockeyTestCase):
+    """Test ETag / Last-Modified handling and 304 responses."""
+
+    URLS = ['/players/', '/players/1', '/players/api', '/teams/', '/teams/3', '/teams/api',
+            '/leagues/', '/leagues/1', '/leagues/1/teams/1', '/leagues/api']
+
+    def _get(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        response.data  # drain streamed bodies inside the request context
+        return response
+
+    def test_responses_carry_validators(self):
+        """Test that every page and API response has an ETag and Last-Modified."""
+        for url in self.URLS:
+            response = self._get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIsNotNone(response.headers.get('ETag'), url)
+            self.assertIsNotNone(response.headers.get('Last-Modified'), url)
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag short-circuits with an empty 304."""
+        for url in self.URLS:
+            etag = self._get(url).headers['ETag']
+            response = self._get(url, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.data, b'', url)
+            self.assertEqual(response.headers['ETag'], etag, url)
+
+    def test_304_skips_row_queries(self):
+        """Test that only the version lookup runs for a 304."""
+        etag = self._get('/leagues/api').headers['ETag']
+        with self.app.app_context():
+            statements = []
+            get_db().set_trace_callback(statements.append)
+            response = self._get('/leagues/api', headers={'If-None-Match': etag})
+            get_db().set_trace_callback(None)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('table_versions', statements[0])
+
+    def test_write_changes_etag(self):
+        """Test that writing to a dependent table invalidates the ETag."""
+        etag = self._get('/leagues/api').headers['ETag']
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE fantasy_leagues SET name = 'Renamed League' WHERE id = 1")
+            db.commit()
+
+        response = self._get('/leagues/api', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn(b'Renamed League', response.data)
+
+    def test_unrelated_write_keeps_etag(self):
+        """Test that writes to other tables do not invalidate the ETag."""
+        etag = self._get('/teams/api').headers['ETag']
+        with self.app.app_context():
+            db = get_db()
+            db.execute("UPDATE fantasy_leagues SET name = 'Renamed League' WHERE id = 1")
+            db.commit()
+
+        response = self._get('/teams/api', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified based revalidation."""
+        last_modified = self._get('/teams/').headers['Last-Modified']
+        response = self._get('/teams/', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        response = self._get('/teams/', headers={'If-Modified-Since': 'Sat, 01 Jan 2000 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_found_has_no_etag(self):
+        """Test that error responses are not given validators."""
+        response = self._get('/players/999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from flaskr import queries, scoring
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+class ScoringTestCase(HockeyTestCase):
+    """Test the fantasy scoring engine."""
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            db = get_db()
+            # a second team in the league, and 2024-25 stats for both rosters
+            db.execute(
+                'INSERT INTO fantasy_teams (name, owner_id, league_id) VALUES (?, ?, ?)',
+                ('Rival Team', 2, 1)
+            )
+            db.executemany(
+                'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)',
+                [(2, 2, 'starter'), (2, 3, 'bench')]
+            )
+            db.executemany(
+                'INSERT INTO player_stats (player_id, season, goals, assists, plus_minus, penalty_minutes)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                [(1, '2024-25', 10, 20, 4, 2), (2, '2024-25', 20, 5, -2, 4), (3, '2024-25', 50, 50, 0, 0)]
+            )
+            db.commit()
+
+    def test_points_per_player(self):
+        """Test that each rostered player's points use the league's weights."""
+        with self.app.app_context():
+            points = {row['name']: row['points'] for row in scoring.player_points(get_db(), 1)}
+        # standard: 2/goal, 1/assist, 0.5/plus-minus, 0.25/PIM
+        self.assertEqual(points['Connor McDavid'], 20 + 20 + 2 + 0.5)
+        self.assertEqual(points['Auston Matthews'], 40 + 5 - 1 + 1)
+        self.assertEqual(points['David Pastrnak'], 150)
+
+    def test_team_points_count_starters_only(self):
+        """Test that team totals are one grouped pass over starters."""
+        with self.app.app_context():
+            points = {row['fantasy_team_id']: row['points'] for row in scoring.team_points(get_db())}
+        self.assertEqual(points, {1: 42.5, 2: 45.0})
+
+    def test_batched_matches_per_player(self):
+        """Test that the batched pass equals summing weighted stats in Python."""
+        with self.app.app_context():
+            db = get_db()
+            weights = scoring.get_weights(db, 'standard')
+            expected = {}
+            for row in db.execute(
+                'SELECT ftp.fantasy_team_id, s.* FROM fantasy_team_players ftp'
+                " JOIN player_stats s ON s.player_id = ftp.player_id AND s.season = '2024-25'"
+                " WHERE ftp.position_type = 'starter'"
+            ):
+                team = row['fantasy_team_id']
+                expected[team] = expected.get(team, 0) + sum(row[k] * w for k, w in weights.items())
+            points = {row['fantasy_team_id']: row['points'] for row in scoring.team_points(db, [1])}
+        self.assertEqual(points, expected)
+
+    def test_standings(self):
+        """Test that standings rank teams by points, sharing tied ranks."""
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(
+                [(row['fantasy_team_id'], row['rank']) for row in scoring.standings(db, 1)],
+                [(2, 1), (1, 2)]
+            )
+            scoring.define_system(db, 'flat', {})
+            db.execute("UPDATE fantasy_leagues SET scoring_system = 'flat'")
+            self.assertEqual([row['rank'] for row in scoring.standings(db, 1)], [1, 1])
+
+    def test_define_system(self):
+        """Test that scoring systems are validated and stored as weights."""
+        with self.app.app_context():
+            db = get_db()
+            scoring.define_system(db, 'goals only', {'goals': 1})
+            self.assertEqual(scoring.get_weights(db, 'goals only')['goals'], 1.0)
+            self.assertEqual(scoring.get_weights(db, 'goals only')['assists'], 0.0)
+            self.assertIsNone(scoring.get_weights(db, 'missing'))
+            with self.assertRaises(scoring.ScoringError):
+                scoring.define_system(db, 'bad', {'hits': 1})
+            with self.assertRaises(scoring.ScoringError):
+                scoring.define_system(db, 'bad', {'goals': 'lots'})
+
+    def test_league_page_standings(self):
+        """Test that the league page lists teams in standings order."""
+        with self.app.app_context():
+            league = queries.league_detail(get_db(), 1)
+        self.assertEqual(
+            [(team['name'], team['points'], team['rank']) for team in league['teams']],
+            [('Rival Team', 45.0, 1), ('Test Team', 42.5, 2)]
+        )
+
+        response = self.client.get('/leagues/1')
+        self.assertLess(response.data.index(b'Rival Team'), response.data.index(b'Test Team'))
+        self.assertIn(b'45.0', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
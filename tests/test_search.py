@@ -0,0 +1,117 @@
+import json
+import unittest
+from flaskr.cache import invalidate
+from flaskr.db import get_db
+from flaskr.search import fts_query, search_players
+from tests.test_base import HockeyTestCase
+
+
+class SearchTestCase(HockeyTestCase):
+    """Test full-text player search."""
+
+    def _names(self, text, limit=10):
+        return [player['name'] for player in search_players(get_db(), text, limit)]
+
+    def test_fts_query(self):
+        """Test that user input becomes quoted prefix terms."""
+        self.assertEqual(fts_query('con mcd'), '"con"* "mcd"*')
+        self.assertEqual(fts_query('"NEAR(a b)" OR -x'), '"NEAR"* "a"* "b"* "OR"* "x"*')
+        self.assertIsNone(fts_query('  -- '))
+        self.assertIsNone(fts_query(None))
+
+    def test_prefix_matching(self):
+        """Test that partial words find players as the user types."""
+        with self.app.app_context():
+            self.assertEqual(self._names('mcd'), ['Connor McDavid'])
+            self.assertEqual(self._names('con mc'), ['Connor McDavid'])
+            self.assertEqual(self._names('Matthews'), ['Auston Matthews'])
+            self.assertEqual(self._names('zzz'), [])
+            self.assertEqual(self._names(''), [])
+
+    def test_team_and_position(self):
+        """Test that team names, cities, abbreviations and positions match."""
+        with self.app.app_context():
+            self.assertEqual(self._names('edm'), ['Connor McDavid'])
+            self.assertEqual(self._names('toronto'), ['Auston Matthews'])
+            self.assertEqual(self._names('bruins'), ['David Pastrnak'])
+            self.assertEqual(sorted(self._names('c')), ['Auston Matthews', 'Connor McDavid'])
+
+    def test_name_matches_rank_first(self):
+        """Test that a name match outranks a team match."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO players (name, position, team_id) VALUES ('Eddie Oilerson', 'D', 1)")
+            self.assertEqual(self._names('oiler'), ['Eddie Oilerson', 'Connor McDavid'])
+
+    def test_index_follows_writes(self):
+        """Test that the triggers keep the index in sync with players and teams."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO players (name, position, team_id) VALUES ('Matty Beniers', 'C', NULL)")
+            self.assertEqual(self._names('beni'), ['Matty Beniers'])
+
+            db.execute("UPDATE players SET name = 'Matthew Beniers', team_id = 3 WHERE name = 'Matty Beniers'")
+            self.assertEqual(self._names('matty'), [])
+            self.assertEqual(self._names('matthew oil'), ['Matthew Beniers'])
+
+            db.execute("UPDATE nhl_teams SET name = 'Icemen' WHERE abbreviation = 'EDM'")
+            self.assertEqual(sorted(self._names('icemen')), ['Connor McDavid', 'Matthew Beniers'])
+
+            db.execute("DELETE FROM players WHERE name = 'Matthew Beniers'")
+            self.assertEqual(self._names('beni'), [])
+
+    def test_broad_queries_are_capped(self):
+        """Test that queries matching many players still return ``limit`` rows."""
+        with self.app.app_context():
+            db = get_db()
+            db.executemany(
+                'INSERT INTO players (name, position, team_id) VALUES (?, ?, ?)',
+                [(f'Prospect {i}', 'D', 1) for i in range(1100)]
+            )
+            results = self._names('pros', limit=5)
+            self.assertEqual(len(results), 5)
+            self.assertTrue(all(name.startswith('Prospect') for name in results))
+            self.assertEqual(len(self._names('bos', limit=7)), 7)
+
+    def test_search_page(self):
+        """Test the HTML search page."""
+        response = self.client.get('/players/search?q=mcd')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Connor McDavid', response.data)
+        self.assertNotIn(b'Auston Matthews', response.data)
+
+        response = self.client.get('/players/search?q=nobody')
+        self.assertIn(b'No players match', response.data)
+
+        response = self.client.get('/players/search')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<form', response.data)
+
+    def test_search_api(self):
+        """Test the JSON search endpoint and its limit."""
+        response = self.client.get('/players/search/api?q=c&limit=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(len(data), 1)
+        self.assertIn(data[0]['name'], ('Connor McDavid', 'Auston Matthews'))
+
+        response = self.client.get('/players/search/api?q=')
+        self.assertEqual(json.loads(response.data), [])
+
+        response = self.client.get('/players/search/api?q=mcd&limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_sees_new_players(self):
+        """Test that cached results are invalidated by player writes."""
+        self.assertEqual(json.loads(self.client.get('/players/search/api?q=beni').data), [])
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO players (name, position) VALUES ('Matty Beniers', 'C')")
+            db.commit()
+            invalidate('players')
+        data = json.loads(self.client.get('/players/search/api?q=beni').data)
+        self.assertEqual([player['name'] for player in data], ['Matty Beniers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
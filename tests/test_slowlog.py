@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from flaskr import create_app
+from flaskr.db import get_db, get_pool
+from flaskr.slowlog import format_plan, redact_params, scanned_tables
+from tests.test_base import HockeyTestCase
+
+
+class SlowLogHelpersTestCase(unittest.TestCase):
+    """Test redaction and plan inspection."""
+
+    def test_redact_params(self):
+        """Test that text and blobs are replaced by their length."""
+        self.assertEqual(redact_params((1, 2.5, None, 'secret', b'\x00\x01')),
+                         [1, 2.5, None, '<str:6>', '<bytes:2>'])
+        self.assertEqual(redact_params({'email': 'a@b.c'}), {'email': '<str:5>'})
+
+    def test_format_plan(self):
+        """Test that plan rows are indented under their parents."""
+        rows = [(2, 0, 0, 'SCAN p'), (5, 0, 0, 'CORRELATED SCALAR SUBQUERY 1'), (9, 5, 0, 'SCAN s')]
+        self.assertEqual(format_plan(rows), ['SCAN p', 'CORRELATED SCALAR SUBQUERY 1', '  SCAN s'])
+
+    def test_scanned_tables(self):
+        """Test that scans are resolved through aliases to the large tables."""
+        tables = {'players', 'player_stats'}
+        sql = 'SELECT * FROM players AS p LEFT JOIN nhl_teams t ON t.id = p.team_id JOIN player_stats s ON 1'
+        self.assertEqual(scanned_tables(['SCAN p', 'SCAN t', '  SCAN s USING INDEX i'], sql, tables), [
+            {'table': 'players', 'detail': 'SCAN p'},
+            {'table': 'player_stats', 'detail': 'SCAN s USING INDEX i'},
+        ])
+        self.assertEqual(scanned_tables(['SEARCH p USING INTEGER PRIMARY KEY (rowid=?)'], sql, tables), [])
+        self.assertEqual(scanned_tables(['SCAN players'], 'SELECT count(*) FROM players WHERE 1', tables),
+                         [{'table': 'players', 'detail': 'SCAN players'}])
+
+
+class SlowQueryLogTestCase(HockeyTestCase):
+    """Test that slow statements run through get_db() are logged."""
+
+    def setUp(self):
+        super().setUp()
+        self.log_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.log_dir, 'slow.log')
+        get_pool(self.app).close()
+        # a threshold of 0 logs every statement
+        self.app = self._app(0)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.app.extensions['profiler'].slow_log.close()
+        super().tearDown()
+        shutil.rmtree(self.log_dir)
+
+    def _app(self, threshold):
+        return create_app({
+            'TESTING': True,
+            'DATABASE': self.db_path,
+            'TEMPLATES_PRELOAD': False,
+            'AUTOCOMPLETE_PRELOAD': False,
+            'AUTOCOMPLETE_REFRESH': 0,
+            'SLOW_QUERY_MS': threshold,
+            'SLOW_QUERY_LOG': self.log_path,
+        })
+
+    def _entries(self):
+        self.app.extensions['profiler'].slow_log.handler.flush()
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path, encoding='utf8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_logs_statements_with_plans(self):
+        """Test that entries carry the SQL, redacted parameters and plan."""
+        self.assertEqual(self.client.get('/players/1').status_code, 200)
+        entries = self._entries()
+        self.assertEqual(len(entries), 2)
+        detail = entries[1]
+        self.assertIn('FROM players', detail['sql'])
+        self.assertEqual(detail['params'], [1])
+        self.assertTrue(any(line.startswith('SEARCH') for line in detail['plan']), detail['plan'])
+        self.assertEqual(detail['scans'], [])
+        self.assertGreaterEqual(detail['duration_ms'], 0)
+
+    def test_flags_scans(self):
+        """Test that a full scan of a large table is flagged."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute('SELECT count(*) FROM players p WHERE p.name LIKE ?', ('%Mc%',)).fetchone()
+            db.execute('SELECT name FROM nhl_teams').fetchall()
+        # the count cursor is never exhausted, so it is logged when the connection is released
+        teams, players = self._entries()
+        self.assertEqual([scan['table'] for scan in players['scans']], ['players'])
+        self.assertEqual(players['params'], ['<str:4>'])
+        self.assertEqual(teams['scans'], [])
+        self.assertEqual(teams['plan'], ['SCAN nhl_teams'])
+
+    def test_writes_and_executemany(self):
+        """Test that writes are logged once each, with executemany's size."""
+        with self.app.app_context():
+            db = get_db()
+            db.executemany('UPDATE players SET age = ? WHERE id = ?', [(30, 1), (31, 2)])
+            db.executemany('UPDATE players SET age = ? WHERE id = ?', iter([(32, 3)]))
+            db.commit()
+        many, iterated = self._entries()
+        self.assertEqual((many['executemany_rows'], many['params']), (2, [30, 1]))
+        self.assertIn('SEARCH players USING INTEGER PRIMARY KEY (rowid=?)', many['plan'])
+        self.assertEqual((iterated['params'], iterated['plan']), (None, None))
+
+    def test_threshold(self):
+        """Test that statements under the threshold are not logged."""
+        self.app.extensions['profiler'].slow_log.close()
+        self.app = self._app(60_000)
+        self.app.test_client().get('/players/1')
+        self.assertEqual(self._entries(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
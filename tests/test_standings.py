@@ -0,0 +1,188 @@
+import random
+import unittest
+from flaskr import scoring
+from flaskr.db import get_db
+from tests.test_base import HockeyTestCase
+
+
+class StandingsTestCase(HockeyTestCase):
+    """Test incremental maintenance of the materialized standings."""
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            db = get_db()
+            db.execute(
+                'INSERT INTO fantasy_teams (name, owner_id, league_id) VALUES (?, ?, ?)',
+                ('Rival Team', 2, 1)
+            )
+            db.execute(
+                'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)',
+                (2, 2, 'starter')
+            )
+            db.commit()
+
+    def _points(self):
+        return dict(get_db().execute('SELECT fantasy_team_id, points FROM fantasy_standings').fetchall())
+
+    def _assert_consistent(self):
+        self.assertEqual(scoring.check_standings(get_db()), [])
+
+    def test_new_teams_start_at_zero(self):
+        """Test that every team gets a standings row when it is created."""
+        with self.app.app_context():
+            self.assertEqual(self._points(), {1: 0, 2: 0})
+
+    def test_stat_changes_apply_deltas(self):
+        """Test that season stat writes move the rostered starters' teams."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO player_stats (player_id, season, goals, assists) VALUES (1, '2024-25', 10, 5)")
+            self.assertEqual(self._points(), {1: 25, 2: 0})
+
+            db.execute("UPDATE player_stats SET goals = 12 WHERE player_id = 1 AND season = '2024-25'")
+            self.assertEqual(self._points(), {1: 29, 2: 0})
+
+            # other seasons don't count towards a 2024-25 league
+            db.execute("UPDATE player_stats SET goals = 99 WHERE player_id = 1 AND season = '2023-24'")
+            self.assertEqual(self._points(), {1: 29, 2: 0})
+
+            db.execute("DELETE FROM player_stats WHERE player_id = 1 AND season = '2024-25'")
+            self.assertEqual(self._points(), {1: 0, 2: 0})
+            self._assert_consistent()
+
+    def test_game_lines_flow_through(self):
+        """Test that per-game lines update standings via the season totals."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO player_game_stats (player_id, season, game_date, goals, assists)"
+                " VALUES (2, '2024-25', '2024-10-09', 2, 1)"
+            )
+            self.assertEqual(self._points(), {1: 0, 2: 5})
+            self._assert_consistent()
+
+    def test_roster_moves(self):
+        """Test that adds, drops and bench moves change team points."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO player_stats (player_id, season, goals) VALUES (3, '2024-25', 10)")
+            db.execute(
+                "INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (2, 3, 'bench')"
+            )
+            self.assertEqual(self._points()[2], 0)
+
+            db.execute("UPDATE fantasy_team_players SET position_type = 'starter' WHERE player_id = 3")
+            self.assertEqual(self._points()[2], 20)
+
+            db.execute('UPDATE fantasy_team_players SET fantasy_team_id = 1 WHERE player_id = 3')
+            self.assertEqual(self._points(), {1: 20, 2: 0})
+
+            db.execute('DELETE FROM fantasy_team_players WHERE player_id = 3')
+            self.assertEqual(self._points(), {1: 0, 2: 0})
+            self._assert_consistent()
+
+    def test_league_and_weight_changes_recompute(self):
+        """Test that scoring system, season and weight changes recompute teams."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO player_stats (player_id, season, goals, assists) VALUES (1, '2024-25', 10, 5)")
+
+            db.execute("UPDATE fantasy_leagues SET scoring_system = 'points' WHERE id = 1")
+            self.assertEqual(self._points()[1], 15)
+
+            db.execute("UPDATE scoring_systems SET goals = 3 WHERE name = 'points'")
+            self.assertEqual(self._points()[1], 35)
+
+            db.execute("UPDATE fantasy_leagues SET season = '2023-24' WHERE id = 1")
+            self.assertEqual(self._points()[1], 3 * 32 + 100)
+
+            db.execute("DELETE FROM scoring_systems WHERE name = 'points'")
+            self.assertEqual(self._points()[1], 0)
+            self._assert_consistent()
+
+    def test_team_lifecycle(self):
+        """Test that deleted teams drop out of the standings."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute('DELETE FROM fantasy_team_players WHERE fantasy_team_id = 2')
+            db.execute('DELETE FROM fantasy_teams WHERE id = 2')
+            self.assertEqual(self._points(), {1: 0})
+            self._assert_consistent()
+
+    def test_random_writes_stay_consistent(self):
+        """Test that a random mix of writes matches a full recompute."""
+        rng = random.Random(7)
+        with self.app.app_context():
+            db = get_db()
+            for _ in range(200):
+                player_id = rng.randint(1, 4)
+                choice = rng.random()
+                if choice < 0.4:
+                    db.execute(
+                        'INSERT OR IGNORE INTO player_game_stats'
+                        ' (player_id, season, game_date, goals, assists, plus_minus, penalty_minutes)'
+                        " VALUES (?, '2024-25', ?, ?, ?, ?, ?)",
+                        (player_id, f'2024-{rng.randint(10, 12)}-{rng.randint(1, 28):02d}',
+                         rng.randint(0, 3), rng.randint(0, 3), rng.randint(-2, 2), rng.randint(0, 4))
+                    )
+                elif choice < 0.6:
+                    db.execute('DELETE FROM fantasy_team_players WHERE player_id = ?', (player_id,))
+                    db.execute(
+                        'INSERT INTO fantasy_team_players (fantasy_team_id, player_id, position_type) VALUES (?, ?, ?)',
+                        (rng.randint(1, 2), player_id, rng.choice(['starter', 'bench']))
+                    )
+                elif choice < 0.8:
+                    db.execute(
+                        "UPDATE player_game_stats SET goals = ? WHERE id = (SELECT MIN(id) FROM player_game_stats WHERE player_id = ?)",
+                        (rng.randint(0, 3), player_id)
+                    )
+                else:
+                    db.execute(
+                        "DELETE FROM player_game_stats WHERE id = (SELECT MAX(id) FROM player_game_stats WHERE player_id = ?)",
+                        (player_id,)
+                    )
+            self._assert_consistent()
+
+    def test_check_and_rebuild(self):
+        """Test that drift is reported and fixed by a rebuild."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute('UPDATE fantasy_standings SET points = 7 WHERE fantasy_team_id = 2')
+            db.execute('DELETE FROM fantasy_standings WHERE fantasy_team_id = 1')
+            self.assertEqual(scoring.check_standings(db), [(1, 1, None, 0), (1, 2, 7, 0)])
+
+            self.assertEqual(scoring.rebuild_standings(db), 2)
+            self._assert_consistent()
+
+    def test_standings_commands(self):
+        """Test the check-standings and rebuild-standings CLI commands."""
+        runner = self.app.test_cli_runner()
+        with self.app.app_context():
+            result = runner.invoke(args=['check-standings'])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn('consistent', result.output)
+
+            get_db().execute('UPDATE fantasy_standings SET points = 7 WHERE fantasy_team_id = 2')
+            get_db().commit()
+            result = runner.invoke(args=['check-standings'])
+            self.assertNotEqual(result.exit_code, 0)
+            self.assertIn('team 2', result.output)
+
+            result = runner.invoke(args=['rebuild-standings'])
+            self.assertIn('2 teams', result.output)
+            self.assertEqual(scoring.check_standings(get_db()), [])
+
+    def test_standings_ranks(self):
+        """Test that standings are read ranked from the materialized table."""
+        with self.app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO player_stats (player_id, season, goals) VALUES (2, '2024-25', 1)")
+            self.assertEqual(
+                [(row['fantasy_team_id'], row['rank']) for row in scoring.standings(db, 1)],
+                [(2, 1), (1, 2)]
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from flaskr.db import get_db, init_db
+from flaskr.leaders import check_leaders
+from flaskr.scoring import check_standings
+from flaskr.search import search_players
+from flaskr.synthetic import NHL_PLAYERS, NHL_TEAMS, ROSTER, Generator, SyntheticDataError, generate
+from tests.test_base import HockeyTestCase
+
+OPTIONS = {'players': 900, 'leagues': 6, 'seasons': 3, 'seed': 7}
+
+
+class SyntheticDataTestCase(HockeyTestCase):
+    """Test the seeded synthetic data generator."""
+
+    def _generate(self, **options):
+        with self.app.app_context():
+            init_db()
+            return generate(get_db(), batch_size=100, **{**OPTIONS, **options})
+
+    def _rows(self, table):
+        with self.app.app_context():
+            return get_db().execute(f'SELECT * FROM {table} ORDER BY 1').fetchall()
+
+    def test_seeded(self):
+        """Test that a seed always produces the same rows, and another seed others."""
+        def dataset(seed):
+            generator = Generator(**{**OPTIONS, 'seed': seed})
+            return [list(getattr(generator, method)()) for method in (
+                'team_rows', 'player_rows', 'stat_rows', 'user_rows', 'league_rows',
+                'fantasy_team_rows', 'roster_rows',
+            )]
+
+        self.assertEqual(dataset(7), dataset(7))
+        self.assertNotEqual(dataset(7), dataset(8))
+
+        self._generate()
+        players = [tuple(row) for row in self._rows('players')]
+        self._generate()
+        self.assertEqual([tuple(row) for row in self._rows('players')], players)
+
+    def test_rosters(self):
+        """Test full NHL rosters and fantasy rosters without repeated players."""
+        counts, _ = self._generate()
+        self.assertEqual(counts['nhl_teams'], len(NHL_TEAMS))
+        self.assertEqual(counts['players'], OPTIONS['players'])
+
+        with self.app.app_context():
+            db = get_db()
+            sizes = db.execute(
+                'SELECT team_id, count(*), count(DISTINCT jersey_number) FROM players'
+                ' WHERE team_id IS NOT NULL GROUP BY team_id'
+            ).fetchall()
+            self.assertEqual(len(sizes), len(NHL_TEAMS))
+            self.assertTrue(all(row[1] == row[2] == len(ROSTER) for row in sizes))
+            self.assertEqual(db.execute(
+                "SELECT count(*) FROM players WHERE team_id IS NOT NULL AND position = 'G'"
+            ).fetchone()[0], 3 * len(NHL_TEAMS))
+
+            # every league full, every team a full roster, no player twice in a league
+            for league in db.execute('SELECT id, max_teams FROM fantasy_leagues'):
+                teams = db.execute('SELECT id FROM fantasy_teams WHERE league_id = ?', (league['id'],)).fetchall()
+                self.assertEqual(len(teams), league['max_teams'])
+                rostered = db.execute(
+                    'SELECT count(*), count(DISTINCT ftp.player_id), count(DISTINCT ft.owner_id)'
+                    ' FROM fantasy_team_players ftp JOIN fantasy_teams ft ON ftp.fantasy_team_id = ft.id'
+                    ' WHERE ft.league_id = ?',
+                    (league['id'],)
+                ).fetchone()
+                self.assertEqual(rostered[0], league['max_teams'] * 20)
+                self.assertEqual(rostered[1], rostered[0])
+                self.assertEqual(rostered[2], league['max_teams'])
+            self.assertLessEqual(
+                db.execute('SELECT max(player_id) FROM fantasy_team_players').fetchone()[0], NHL_PLAYERS
+            )
+
+            seasons = [row[0] for row in db.execute('SELECT DISTINCT season FROM player_stats ORDER BY 1')]
+            self.assertEqual(seasons, ['2021-22', '2022-23', '2023-24'])
+
+    def test_derived_tables(self):
+        """Test that standings, leaders and the search index are rebuilt."""
+        self._generate()
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(check_standings(db), [])
+            self.assertEqual(check_leaders(db), [])
+            self.assertEqual(db.execute('SELECT count(*) FROM players_fts').fetchone()[0], OPTIONS['players'])
+            name = db.execute('SELECT name FROM players WHERE id = 1').fetchone()[0]
+            self.assertIn(1, [player['id'] for player in search_players(db, name, 50)])
+            # the suspended triggers are back
+            self.assertGreater(db.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'fantasy_team_players'"
+            ).fetchone()[0], 0)
+
+    def test_requires_empty_database(self):
+        """Test that existing data is left alone."""
+        with self.app.app_context():
+            with self.assertRaises(SyntheticDataError):
+                generate(get_db(), **OPTIONS)
+            self.assertEqual(get_db().execute('SELECT count(*) FROM players').fetchone()[0], 4)
+        with self.assertRaises(SyntheticDataError):
+            Generator(players=NHL_PLAYERS - 1)
+
+    def test_generate_command(self):
+        """Test the generate-data CLI command."""
+        runner = self.app.test_cli_runner()
+        with self.app.app_context():
+            result = runner.invoke(args=['generate-data', '--players', '800', '--leagues', '2'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('--reset', result.output)
+
+        with self.app.app_context():
+            result = runner.invoke(args=['generate-data', '--reset', '--players', '800', '--leagues', '2'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('players: 800 rows', result.output)
+        self.assertIn('rows/sec', result.output)
+
+        response = self.client.get('/teams/api')
+        self.assertEqual(len(response.get_json()), len(NHL_TEAMS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from flaskr.db import get_db
+from flaskr.leaders import check_leaders
+from flaskr.scoring import check_standings
+from flaskr.writes import WriteBusy, WriteQueue, WriteQueueFull, WriterStopped, get_write_queue
+from tests.test_base import HockeyTestCase
+
+
+class WriteQueueTestCase(HockeyTestCase):
+    """Test the single-writer queue and the writes that go through it."""
+
+    def _insert_user(self, name):
+        def work(db):
+            return db.execute(
+                'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                (name, f'{name}@example.com', 'x')
+            ).lastrowid
+        return work
+
+    def _usernames(self):
+        with self.app.app_context():
+            return {row[0] for row in get_db().execute('SELECT username FROM users')}
+
+    def _hold(self, writes):
+        """Block the writer on one write while ``writes`` are queued behind it."""
+        started, release = threading.Event(), threading.Event()
+
+        def blocker(db):
+            started.set()
+            release.wait(5)
+
+        queue = get_write_queue(self.app)
+        first = queue.submit(blocker)
+        started.wait(5)
+        futures = [queue.submit(work) for work in writes]
+        release.set()
+        first.result(5)
+        return futures
+
+    def test_group_commit(self):
+        """Test that writes queued together commit as one batch."""
+        futures = self._hold([self._insert_user(f'fan{i}') for i in range(5)])
+        ids = [future.result(5) for future in futures]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertLessEqual({f'fan{i}' for i in range(5)}, self._usernames())
+
+        stats = self.client.get('/_writes').get_json()
+        self.assertEqual(stats['writes'], 6)
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(stats['batch_size']['max'], 5)
+        self.assertGreaterEqual(stats['max_depth'], 1)
+        self.assertEqual(stats['depth'], 0)
+        for key in ('queue_wait_ms', 'commit_ms', 'latency_ms'):
+            self.assertIsNotNone(stats[key], key)
+
+    def test_failed_write_rolls_back_alone(self):
+        """Test that a write that raises is rolled back without its batch."""
+        def fails(db):
+            self._insert_user('ghost')(db)
+            raise ValueError('rejected')
+
+        before, failing, after = self._hold([self._insert_user('before'), fails, self._insert_user('after')])
+        self.assertIsInstance(before.result(5), int)
+        self.assertIsInstance(after.result(5), int)
+        with self.assertRaises(ValueError):
+            failing.result(5)
+        usernames = self._usernames()
+        self.assertIn('before', usernames)
+        self.assertIn('after', usernames)
+        self.assertNotIn('ghost', usernames)
+        self.assertEqual(get_write_queue(self.app).stats()['errors'], 1)
+
+    def test_writer_restarts(self):
+        """Test that a write killing the writer fails its batch, and the writer restarts."""
+        def exits(db):
+            self._insert_user('ghost')(db)
+            raise SystemExit
+
+        queue = get_write_queue(self.app)
+        # the writer thread is meant to die here; keep its traceback quiet
+        with mock.patch('threading.excepthook', lambda args: None):
+            future = queue.submit(exits)
+            writer = queue._thread
+            with self.assertRaises(WriterStopped):
+                future.result(5)
+            writer.join(5)
+        self.assertFalse(queue.stats()['running'])
+        self.assertIsInstance(queue.run(self._insert_user('after')), int)
+        usernames = self._usernames()
+        self.assertIn('after', usernames)
+        self.assertNotIn('ghost', usernames)
+
+    def test_result_timeout(self):
+        """Test that a write stuck behind the writer gives up with WriteBusy and is cancelled."""
+        self.app.config['WRITE_QUEUE_RESULT_TIMEOUT'] = 0.05
+        queue = get_write_queue(self.app)
+        started, release = threading.Event(), threading.Event()
+        first = queue.submit(lambda db: (started.set(), release.wait(5)))
+        started.wait(5)
+        try:
+            with self.assertRaisesRegex(WriteBusy, 'cancelled'):
+                queue.run(self._insert_user('late'))
+        finally:
+            release.set()
+        first.result(5)
+        self.assertIsInstance(queue.run(self._insert_user('next')), int)
+        self.assertNotIn('late', self._usernames())
+
+    def test_result_timeout_waits_for_started_write(self):
+        """Test that a write the writer started is waited on past the timeout, not reported busy."""
+        self.app.config['WRITE_QUEUE_RESULT_TIMEOUT'] = 0.05
+        queue = get_write_queue(self.app)
+        insert = self._insert_user('slow')
+
+        def slow(db):
+            time.sleep(0.2)
+            return insert(db)
+
+        self.assertIsInstance(queue.run(slow), int)
+        self.assertIn('slow', self._usernames())
+
+    def test_queue_full(self):
+        """Test that a full queue is reported rather than waited on forever."""
+        self.app.config['WRITE_QUEUE_TIMEOUT'] = 0.01
+        queue = WriteQueue(self.app, max_size=1)
+        started, release = threading.Event(), threading.Event()
+        try:
+            queue.submit(lambda db: (started.set(), release.wait(5)))
+            started.wait(5)
+            queue.submit(self._insert_user('queued'))
+            with self.assertRaises(WriteQueueFull):
+                queue.submit(self._insert_user('rejected'))
+        finally:
+            release.set()
+            queue.stop()
+        self.assertEqual(queue.stats()['rejected'], 1)
+        self.assertIn('queued', self._usernames())
+        self.assertNotIn('rejected', self._usernames())
+
+    def test_without_queue(self):
+        """Test that writes run on the request's connection with WRITE_QUEUE off."""
+        self.app.config['WRITE_QUEUE'] = False
+        response = self.client.post('/leagues/1/teams', json={'name': 'Direct', 'owner_id': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(self.client.get('/_writes').get_json()['running'])
+
+    def test_create_league(self):
+        """Test league creation through the writer."""
+        response = self.client.post('/leagues/', json={'name': 'Beer League', 'commissioner_id': 1,
+                                                       'season': '2024-25', 'max_teams': 8})
+        self.assertEqual(response.status_code, 201, response.data)
+        league = response.get_json()
+        self.assertEqual((league['id'], league['max_teams'], league['scoring_system']), (2, 8, 'standard'))
+        self.assertIn(b'Beer League', self.client.get('/leagues/api').data)
+
+        for body in [None, {'name': 'X', 'commissioner_id': 9, 'season': '2024-25'},
+                     {'name': 'X', 'commissioner_id': 1}, {'name': 'X', 'commissioner_id': 1,
+                                                           'season': '2024-25', 'scoring_system': 'nope'}]:
+            self.assertEqual(self.client.post('/leagues/', json=body).status_code, 400, body)
+
+    def test_add_games(self):
+        """Test game stat ingestion through the writer, derived tables included."""
+        games = [
+            {'player_id': 2, 'season': '2024-25', 'game_date': '2024-10-09', 'goals': 2, 'assists': 1},
+            {'player_id': 3, 'season': '2024-25', 'game_date': '2024-10-09', 'assists': 2},
+        ]
+        response = self.client.post('/players/games', json=games)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.get_json(), {'games': 2})
+        leaders = self.client.get('/players/leaders?season=2024-25').get_json()
+        self.assertEqual([(row['id'], row['value']) for row in leaders[:2]], [(2, 3), (3, 2)])
+
+        # a repeated game, an unknown player or a stat SQLite can't store rejects the whole request
+        for body in [games[:1], [{**games[0], 'game_date': '2024-10-11'}, {**games[1], 'player_id': 99}],
+                     [], [{'player_id': 2}], [{**games[0], 'decision': 'T'}],
+                     [{**games[0], 'game_date': '2024-10-11', 'goals': 10 ** 30}],
+                     [{**games[0], 'game_date': '2024-10-11', 'goals': 2.9}],
+                     [{**games[0], 'game_date': '2024-10-11', 'goals': True}]]:
+            self.assertEqual(self.client.post('/players/games', json=body).status_code, 400, body)
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(db.execute('SELECT count(*) FROM player_game_stats').fetchone()[0], 2)
+            self.assertEqual(check_leaders(db), [])
+            self.assertEqual(check_standings(db), [])
+
+
+if __name__ == '__main__':
+    unittest.main()